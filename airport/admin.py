@@ -7,9 +7,11 @@ from airport.models import (
     Country,
     Crew,
     Flight,
+    FlightSchedule,
     Order,
     Role,
     Route,
+    SeatHold,
     Ticket,
 )
 
@@ -20,7 +22,9 @@ admin.site.register(Airport)
 admin.site.register(Country)
 admin.site.register(Crew)
 admin.site.register(Flight)
+admin.site.register(FlightSchedule)
 admin.site.register(Order)
 admin.site.register(Role)
 admin.site.register(Route)
+admin.site.register(SeatHold)
 admin.site.register(Ticket)
@@ -0,0 +1,144 @@
+from django.db import NotSupportedError, connections
+from django.db.models import (
+    CharField,
+    Count,
+    JSONField,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Value,
+    Window,
+)
+from django.db.models.functions import Coalesce, Concat, JSONObject, RowNumber
+
+from airport.models import Crew, Ticket
+
+
+class JSONArraySubquery(Subquery):
+    """
+    JSON array of the single `item` column of a queryset, in the order of
+    the queryset, built by the database in one correlated subquery. The
+    rows are numbered by the ordering of the queryset and the aggregate
+    orders by that number, as an aggregate over an ordered derived table
+    is not guaranteed to keep its order. SQLite before 3.44 has no
+    ordered aggregates and aggregates the derived table in order.
+    """
+
+    template = "(SELECT %(function)s(%(item)s%(ordering)s) FROM (%(subquery)s) items)"
+    output_field = JSONField()
+    functions = {
+        "sqlite": "JSON_GROUP_ARRAY",
+        # json values would be decoded by the driver before the field does
+        "postgresql": "JSONB_AGG",
+    }
+
+    def __init__(self, queryset: QuerySet, **extra) -> None:
+        position = Window(RowNumber(), order_by=list(queryset.query.order_by))
+        super().__init__(queryset.annotate(position=position), **extra)
+
+    @classmethod
+    def is_supported(cls, connection) -> bool:
+        return connection.vendor in cls.functions
+
+    @staticmethod
+    def has_ordered_aggregates(connection) -> bool:
+        if connection.vendor == "sqlite":
+            return connection.Database.sqlite_version_info >= (3, 44)
+        return True
+
+    def as_sql(self, compiler, connection, template=None, **extra_context):
+        if not self.is_supported(connection):
+            raise NotSupportedError(
+                f"JSON array aggregation is not supported on {connection.vendor}"
+            )
+
+        item = "items.item"
+        if connection.vendor == "sqlite" and isinstance(
+            self.query.annotations["item"].output_field, JSONField
+        ):
+            # SQLite returns JSON objects as text, which would become strings
+            item = f"JSON({item})"
+
+        return super().as_sql(
+            compiler,
+            connection,
+            template=template,
+            function=self.functions[connection.vendor],
+            item=item,
+            ordering=(
+                " ORDER BY items.position"
+                if self.has_ordered_aggregates(connection)
+                else ""
+            ),
+            **extra_context,
+        )
+
+
+def flight_crews(item) -> JSONArraySubquery:
+    crews = (
+        Crew.objects.filter(flights=OuterRef("pk"))
+        .order_by(*Crew._meta.ordering, "id")
+        .annotate(item=item)
+        .values("item")
+    )
+    return JSONArraySubquery(crews)
+
+
+def flight_crew_names() -> JSONArraySubquery:
+    """Crew.__str__ of the crew members of a flight"""
+    return flight_crews(
+        Concat(
+            "first_name",
+            Value(" "),
+            "last_name",
+            Value(" ("),
+            "role__name",
+            Value(")"),
+            output_field=CharField(),
+        )
+    )
+
+
+def flight_crew_members() -> JSONArraySubquery:
+    """The crew members of a flight as CrewListSerializer data"""
+    return flight_crews(
+        JSONObject(
+            id="id",
+            full_name=Concat(
+                "first_name", Value(" "), "last_name", output_field=CharField()
+            ),
+            role="role__name",
+        )
+    )
+
+
+def annotate_flight_crews(queryset: QuerySet, members: bool = False) -> QuerySet:
+    """
+    Annotate flights with `crew_names`, or `crew_members` when members
+    is set, on databases that aggregate JSON, and prefetch the crews
+    with their roles on others.
+    """
+    if not JSONArraySubquery.is_supported(connections[queryset.db]):
+        return queryset.prefetch_related("crews__role")
+
+    if members:
+        return queryset.annotate(crew_members=flight_crew_members())
+    return queryset.annotate(crew_names=flight_crew_names())
+
+
+def annotate_order_summaries(queryset: QuerySet) -> QuerySet:
+    """
+    Annotate orders with ticket_count and flight_count. The counts are
+    correlated subqueries on the order index of tickets, so a page of
+    orders is read from the (user, -created_at) index and counts only the
+    tickets of its own orders, instead of grouping a join of all of them.
+    """
+    tickets = Ticket.objects.filter(order=OuterRef("pk")).order_by().values("order")
+
+    def count(expression: Count) -> Coalesce:
+        return Coalesce(Subquery(tickets.annotate(n=expression).values("n")), 0)
+
+    return queryset.annotate(
+        ticket_count=count(Count("pk")),
+        flight_count=count(Count("flight", distinct=True)),
+    )
@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class AirportConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "airport"
+
+    def ready(self) -> None:
+        # connect signal receivers
+        from airport import (  # noqa: F401
+            autocomplete,
+            caching,
+            checks,
+            counters,
+            itinerary,
+            response_cache,
+            schedules,
+            seat_map,
+        )
@@ -0,0 +1,22 @@
+from django.urls import path
+
+from airport.async_views import (
+    AsyncAirportView,
+    AsyncFlightView,
+    AsyncOrderView,
+    AsyncRouteView,
+)
+
+
+urlpatterns = [
+    path("airports/", AsyncAirportView.as_view(), name="airport-list"),
+    path("airports/<int:pk>/", AsyncAirportView.as_view(), name="airport-detail"),
+    path("routes/", AsyncRouteView.as_view(), name="route-list"),
+    path("routes/<int:pk>/", AsyncRouteView.as_view(), name="route-detail"),
+    path("flights/", AsyncFlightView.as_view(), name="flight-list"),
+    path("flights/<int:pk>/", AsyncFlightView.as_view(), name="flight-detail"),
+    path("orders/", AsyncOrderView.as_view(), name="order-list"),
+    path("orders/<int:pk>/", AsyncOrderView.as_view(), name="order-detail"),
+]
+
+app_name = "async-airport"
@@ -0,0 +1,206 @@
+from functools import partial
+from typing import Callable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from airport.fast_list import FastListMixin
+from airport.pagination import AsyncLimitOffsetPagination
+from airport.schedules import ensure_materialized
+from airport.views import AirportViewSet, FlightViewSet, OrderViewSet, RouteViewSet
+from user.authentication import ClaimsJWTAuthentication
+
+
+class AsyncJWTAuthentication(ClaimsJWTAuthentication):
+    """
+    ClaimsJWTAuthentication for async views. The user is built from the
+    token claims without a query, so async views read only its id and
+    is_staff; loading the rest would be a sync query.
+    """
+
+    async def aauthenticate(self, request) -> Optional[tuple]:
+        return self.authenticate(request)
+
+
+class AsyncReadView(View):
+    """
+    Async GET handler for the list and detail routes of a viewset, for
+    ASGI deployments. An instance of viewset_class supplies the queryset,
+    the serializers and the cache layers, so responses match the DRF
+    views; only the rows are read with the async ORM, so the event loop
+    serves other requests while one waits for the database. Throttling
+    and errors match the DRF views as well; only limit/offset pagination
+    is supported.
+
+    cache_layers names the async response wrappers of the viewset, such
+    as aconditional_response(), outermost first as in its bases. They look
+    the cache up and store responses in short calls to a thread, and await
+    alist() or aretrieve() on the event loop in between, so no thread is
+    held while the rows are read.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    authentication_required = False
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    pagination_class = AsyncLimitOffsetPagination
+    viewset_class = None
+    cache_layers = ()
+
+    async def get(self, request, pk: Optional[int] = None) -> HttpResponse:
+        request = Request(request)
+        try:
+            request.user = await self.authenticate(request)
+            await sync_to_async(self.check_throttles)(request)
+            viewset = self.get_viewset(request, pk)
+            await self.initial(viewset)
+            handler = self.alist if pk is None else self.aretrieve
+            response = await self.cached_response(
+                viewset, partial(handler, viewset), request
+            )
+        except exceptions.APIException as exc:
+            return self.handle_exception(request, exc)
+
+        if not isinstance(response, Response):
+            # 304 Not Modified
+            return response
+        headers = {
+            name: value for name, value in response.items() if name != "Content-Type"
+        }
+        return self.render(response.data, response.status_code, headers)
+
+    async def authenticate(self, request):
+        authenticator = AsyncJWTAuthentication()
+        result = await authenticator.aauthenticate(request)
+        if result is not None:
+            return result[0]
+
+        if self.authentication_required:
+            raise exceptions.NotAuthenticated()
+        return AnonymousUser()
+
+    def check_throttles(self, request) -> None:
+        # the throttles of the DRF views, sharing their cache entries
+        durations = []
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                durations.append(throttle.wait())
+
+        if durations:
+            durations = [duration for duration in durations if duration is not None]
+            raise exceptions.Throttled(max(durations, default=None))
+
+    def get_viewset(self, request, pk: Optional[int]):
+        # set up like the router does for the sync routes, so cache stats
+        # are shared with them
+        return self.viewset_class(
+            request=request,
+            args=(),
+            kwargs={} if pk is None else {"pk": pk},
+            action="list" if pk is None else "retrieve",
+            detail=pk is not None,
+            basename=self.viewset_class.queryset.model._meta.object_name.lower(),
+            format_kwarg=None,
+        )
+
+    async def initial(self, viewset) -> None:
+        """Runs before the cache layers, like the initial() of the viewset"""
+
+    async def cached_response(self, viewset, handler: Callable, request) -> Response:
+        for layer in reversed(self.cache_layers):
+            handler = partial(getattr(viewset, layer), handler)
+        return await handler(request, **viewset.kwargs)
+
+    def handle_exception(self, request, exc: exceptions.APIException) -> HttpResponse:
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            exc.auth_header = AsyncJWTAuthentication().authenticate_header(request)
+            exc.status_code = 401
+
+        response = exception_handler(exc, {"view": self, "request": request})
+        headers = {
+            name: value
+            for name, value in response.items()
+            if name in ("WWW-Authenticate", "Retry-After")
+        }
+        return self.render(response.data, response.status_code, headers)
+
+    @staticmethod
+    def render(data, status: int = 200, headers: Optional[dict] = None) -> HttpResponse:
+        return HttpResponse(
+            JSONRenderer().render(data),
+            status=status,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    async def paginate(self, request, queryset: QuerySet) -> tuple[list, Callable]:
+        paginator = self.pagination_class()
+        rows = await paginator.apaginate_queryset(queryset, request)
+        if rows is None:
+            return [row async for row in queryset], lambda data: data
+        return rows, paginator.get_paginated_data
+
+    async def alist(self, viewset, request) -> Response:
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        if isinstance(viewset, FastListMixin) and getattr(
+            settings, "AIRPORT_FAST_LIST", True
+        ):
+            rows, paginated = await self.paginate(
+                request, viewset.get_fast_list_rows(queryset)
+            )
+            # databases without JSON aggregation look flight crews up here
+            data = await sync_to_async(viewset.fast_list_representation)(rows)
+            return Response(paginated(data))
+
+        instances, paginated = await self.paginate(request, queryset)
+        serializer = viewset.get_serializer(instances, many=True)
+        return Response(paginated(await sync_to_async(lambda: serializer.data)()))
+
+    async def aretrieve(self, viewset, request, pk: int) -> Response:
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+        try:
+            instance = await queryset.aget(pk=pk)
+        except ObjectDoesNotExist:
+            raise exceptions.NotFound()
+
+        # related objects of the serializer may still be loaded lazily
+        serializer = viewset.get_serializer(instance)
+        return Response(await sync_to_async(lambda: serializer.data)())
+
+
+class AsyncAirportView(AsyncReadView):
+    viewset_class = AirportViewSet
+    cache_layers = ("aconditional_response", "acached_response")
+
+
+class AsyncRouteView(AsyncReadView):
+    viewset_class = RouteViewSet
+    cache_layers = ("aconditional_response", "acached_response")
+
+
+class AsyncFlightView(AsyncReadView):
+    viewset_class = FlightViewSet
+    cache_layers = ("atagged_cached_response", "aconditional_response")
+
+    async def initial(self, viewset) -> None:
+        # before the cached and conditional responses read the versions
+        if viewset.action == "list":
+            await sync_to_async(ensure_materialized)()
+
+
+class AsyncOrderView(AsyncReadView):
+    authentication_required = True
+    viewset_class = OrderViewSet
@@ -0,0 +1,252 @@
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.db_router import primary_reads
+
+from airport.caching import CHANGE_BUMPS, get_versions
+from airport.models import Airport, Country
+
+
+AUTOCOMPLETE_LIMIT = getattr(settings, "AUTOCOMPLETE_LIMIT", 10)
+
+# ranks of the matched fields, airport names first
+AIRPORT_NAME, CITY, COUNTRY_NAME = range(3)
+FIELDS = 3
+
+# indexed kinds, in the order of the index versions
+INDEXED_MODELS = {"airport": Airport, "country": Country}
+
+
+class Term(NamedTuple):
+    text: str
+    kind: str
+    id: int
+
+
+def normalize(value: str) -> str:
+    """Case and accent insensitive words of value, separated by spaces"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    letters = "".join(
+        char if char.isalnum() else " "
+        for char in decomposed
+        if not unicodedata.combining(char)
+    )
+    return " ".join(letters.casefold().split())
+
+
+def field_terms(value: str, field: int, kind: str, id: int) -> list[tuple[int, Term]]:
+    """
+    Terms of a field with the rank of their bucket: fields starting with
+    the text rank first, then fields with a later word starting with it,
+    so "halyt" finds "Danylo Halytskyi" after airports named "Halyt..."
+    """
+    words = normalize(value).split(" ")
+    return [
+        (min(index, 1) * FIELDS + field, Term(" ".join(words[index:]), kind, id))
+        for index in range(len(words))
+        if words[index]
+    ]
+
+
+def airport_result(id: int, name: str, city: str, country: str) -> dict:
+    return {
+        "type": "airport",
+        "id": id,
+        "name": name,
+        "closest_big_city": city,
+        "country": country,
+    }
+
+
+def country_result(id: int, name: str) -> dict:
+    return {"type": "country", "id": id, "name": name}
+
+
+def result_terms(result: dict) -> list[tuple[int, Term]]:
+    if result["type"] == "country":
+        return field_terms(result["name"], COUNTRY_NAME, "country", result["id"])
+
+    return field_terms(
+        result["name"], AIRPORT_NAME, "airport", result["id"]
+    ) + field_terms(result["closest_big_city"], CITY, "airport", result["id"])
+
+
+class PrefixIndex:
+    """
+    In-memory prefix index of airport names, their cities and country
+    names for autocomplete. Terms are kept in sorted buckets, one per
+    rank of match, so the terms starting with a prefix are found by
+    binary search and a search stops after limit results, however short
+    the prefix. Like the itinerary timetable, the buckets are replaced
+    copy-on-write under a lock.
+
+    Saves and deletes in this process update the index directly. Changes
+    made by other processes are noticed from the Airport and Country
+    cache versions, which reload the index. An update only counts the
+    bumps of its own change, so a bump by another process in between
+    still leaves the versions behind and the index is reloaded.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: list[list[Term]] = [[] for _ in range(2 * FIELDS)]
+        self.results: dict[tuple[str, int], dict] = {}
+        self.versions: Optional[list[int]] = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.versions is not None
+
+    def load(self) -> None:
+        versions = get_versions(INDEXED_MODELS.values())
+        countries = dict(Country.objects.order_by().values_list("id", "name"))
+
+        results = {
+            ("country", country_id): country_result(country_id, name)
+            for country_id, name in countries.items()
+        }
+        airports = Airport.objects.order_by().values_list(
+            "id", "name", "closest_big_city", "country_id"
+        )
+        for airport_id, name, city, country_id in airports:
+            results["airport", airport_id] = airport_result(
+                airport_id, name, city, countries[country_id]
+            )
+
+        buckets = [[] for _ in range(2 * FIELDS)]
+        for result in results.values():
+            for bucket, term in result_terms(result):
+                buckets[bucket].append(term)
+        for bucket in buckets:
+            bucket.sort()
+
+        with self.lock:
+            self.buckets = buckets
+            self.results = results
+            self.versions = versions
+
+    def ensure_loaded(self) -> None:
+        if self.versions != get_versions(INDEXED_MODELS.values()):
+            # kept under the versions, which a replica may lag behind
+            with primary_reads():
+                self.load()
+
+    def invalidate(self) -> None:
+        self.versions = None
+
+    def update(self, result: dict) -> None:
+        with self.lock:
+            buckets = self._without(result["type"], result["id"])
+            for bucket, term in result_terms(result):
+                insort(buckets[bucket], term)
+            self.results[result["type"], result["id"]] = result
+            self.buckets = buckets
+            self._changed(result["type"])
+
+    def remove(self, kind: str, id: int) -> None:
+        with self.lock:
+            self.buckets = self._without(kind, id)
+            self._changed(kind)
+
+    def _changed(self, kind: str) -> None:
+        # runs after commit, when model_changed() has bumped the version
+        # CHANGE_BUMPS times for this change
+        if self.versions is not None:
+            versions = self.versions.copy()
+            versions[list(INDEXED_MODELS).index(kind)] += CHANGE_BUMPS
+            self.versions = versions
+
+    def _without(self, kind: str, id: int) -> list[list[Term]]:
+        buckets = [bucket.copy() for bucket in self.buckets]
+        result = self.results.pop((kind, id), None)
+        if result is not None:
+            for bucket, term in result_terms(result):
+                terms = buckets[bucket]
+                index = bisect_left(terms, term)
+                if index < len(terms) and terms[index] == term:
+                    del terms[index]
+        return buckets
+
+    def search(self, query: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[dict]:
+        """
+        Airports and countries with a word starting with query. Exact
+        matches rank first, then matches of a field's first word, then
+        airport names before cities before countries, then by the text.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        buckets = self.buckets
+        results = self.results
+        starts = [bisect_left(terms, (prefix,)) for terms in buckets]
+
+        found = {}
+        # the exact matches of every bucket first, they start its range
+        for exact in (True, False):
+            for terms, start in zip(buckets, starts):
+                for index in range(start, len(terms)):
+                    text, kind, id = terms[index]
+                    if len(found) == limit or not text.startswith(prefix):
+                        break
+                    if exact and text != prefix:
+                        break
+                    if exact or text != prefix:
+                        found.setdefault((kind, id), results[kind, id])
+
+        return list(found.values())
+
+
+prefix_index = PrefixIndex()
+
+
+def autocomplete(query: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[dict]:
+    prefix_index.ensure_loaded()
+    return prefix_index.search(query, limit)
+
+
+@receiver(post_save, sender=Airport)
+def airport_saved(sender, instance, **kwargs) -> None:
+    if prefix_index.is_loaded:
+        result = airport_result(
+            instance.id,
+            instance.name,
+            instance.closest_big_city,
+            instance.country.name,
+        )
+        transaction.on_commit(lambda: prefix_index.update(result))
+
+
+@receiver(post_delete, sender=Airport)
+def airport_deleted(sender, instance, **kwargs) -> None:
+    if prefix_index.is_loaded:
+        # delete() clears the id before the transaction commits
+        airport_id = instance.id
+        transaction.on_commit(lambda: prefix_index.remove("airport", airport_id))
+
+
+@receiver(post_save, sender=Country)
+def country_saved(sender, instance, created, **kwargs) -> None:
+    if not prefix_index.is_loaded:
+        return
+
+    if created:
+        result = country_result(instance.id, instance.name)
+        transaction.on_commit(lambda: prefix_index.update(result))
+    else:
+        # a renamed country is shown with all of its airports
+        transaction.on_commit(prefix_index.invalidate)
+
+
+@receiver(post_delete, sender=Country)
+def country_deleted(sender, instance, **kwargs) -> None:
+    if prefix_index.is_loaded:
+        country_id = instance.id
+        transaction.on_commit(lambda: prefix_index.remove("country", country_id))
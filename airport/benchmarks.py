@@ -0,0 +1,510 @@
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from airport.caching import VERSIONED_MODELS, bump_version
+from airport.itinerary import timetable
+from airport.load_factors import rebuild_day_loads
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Crew,
+    Flight,
+    FlightSchedule,
+    Order,
+    Role,
+    Route,
+    Ticket,
+)
+from airport.schedules import materialize, schedule_horizon
+from airport.seat_map import get_seat_map
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "benchmark_baseline.json"
+BENCHMARK_USER_EMAIL = "benchmark@airport.com"
+BENCHMARK_ADMIN_EMAIL = "benchmark-admin@airport.com"
+BENCHMARK_PASSWORD = "Benchmark123@"
+
+# volumes seeded with --scale 1
+SEED_VOLUMES = {
+    "countries": 150,
+    "airports": 3000,
+    "routes": 10000,
+    "airplane_types": 10,
+    "airplanes": 500,
+    "roles": 5,
+    "crews": 2000,
+    "users": 1000,
+    "flights": 100000,
+    "flight_schedules": 200,
+    "tickets": 2000000,
+}
+
+
+class Endpoint(NamedTuple):
+    name: str
+    path: str
+    method: str = "get"
+    data: Optional[dict] = None
+    user: Optional[str] = "user"
+
+
+def scaled_volumes(scale: float) -> dict[str, int]:
+    # at least two of everything, so there are routes between airports
+    return {name: max(2, int(volume * scale)) for name, volume in SEED_VOLUMES.items()}
+
+
+def seed(
+    scale: float = 1.0,
+    batch_size: int = 5000,
+    random_seed: int = 0,
+    log: Callable[[str], None] = lambda message: None,
+) -> dict[str, int]:
+    """
+    Fill an empty database with generated reference data, flights and
+    sold tickets. Everything is inserted with bulk_create, so no signals
+    are sent and the sold seat counters are written directly.
+    """
+    volumes = scaled_volumes(scale)
+    rng = random.Random(random_seed)
+
+    def create(model, objects) -> list:
+        return model.objects.bulk_create(objects, batch_size=batch_size)
+
+    countries = create(
+        Country, [Country(name=f"Country {i}") for i in range(volumes["countries"])]
+    )
+    airports = create(
+        Airport,
+        [
+            Airport(
+                name=f"Airport {i}",
+                closest_big_city=f"City {i // 2}",
+                country=rng.choice(countries),
+            )
+            for i in range(volumes["airports"])
+        ],
+    )
+    log(f"Created {len(countries)} countries and {len(airports)} airports")
+
+    pairs = set()
+    while len(pairs) < min(volumes["routes"], len(airports) * (len(airports) - 1)):
+        pairs.add(tuple(rng.sample(airports, 2)))
+    routes = create(
+        Route,
+        [
+            Route(
+                source=source,
+                destination=destination,
+                distance=rng.randint(200, 9000),
+            )
+            for source, destination in pairs
+        ],
+    )
+    log(f"Created {len(routes)} routes")
+
+    airplane_types = create(
+        AirplaneType,
+        [AirplaneType(name=f"Type {i}") for i in range(volumes["airplane_types"])],
+    )
+    airplanes = create(
+        Airplane,
+        [
+            Airplane(
+                name=f"Airplane {i}",
+                rows=rng.randint(10, 40),
+                seats_in_row=rng.randint(4, 8),
+                airplane_type=rng.choice(airplane_types),
+            )
+            for i in range(volumes["airplanes"])
+        ],
+    )
+    roles = create(Role, [Role(name=f"Role {i}") for i in range(volumes["roles"])])
+    crews = create(
+        Crew,
+        [
+            Crew(first_name=f"First {i}", last_name=f"Last {i}", role=rng.choice(roles))
+            for i in range(volumes["crews"])
+        ],
+    )
+    log(f"Created {len(airplanes)} airplanes and {len(crews)} crew members")
+
+    password = make_password(BENCHMARK_PASSWORD)
+    users = create(
+        get_user_model(),
+        [
+            get_user_model()(email=f"user{i}@airport.com", password=password)
+            for i in range(volumes["users"])
+        ]
+        + [
+            get_user_model()(email=BENCHMARK_USER_EMAIL, password=password),
+            get_user_model()(
+                email=BENCHMARK_ADMIN_EMAIL, password=password, is_staff=True
+            ),
+        ],
+    )
+    log(f"Created {len(users)} users")
+
+    now = timezone.now()
+    tickets_per_flight = volumes["tickets"] / volumes["flights"]
+    flights_created = tickets_created = 0
+    for start in range(0, volumes["flights"], batch_size):
+        flights = []
+        seats = []
+        for _ in range(min(batch_size, volumes["flights"] - start)):
+            route = rng.choice(routes)
+            airplane = rng.choice(airplanes)
+            departure_time = now + timedelta(
+                days=rng.randint(-30, 180), minutes=rng.randint(0, 24 * 60)
+            )
+            sold = rng.sample(
+                range(airplane.capacity),
+                min(airplane.capacity, rng.randint(0, int(2 * tickets_per_flight))),
+            )
+            flights.append(
+                Flight(
+                    route=route,
+                    airplane=airplane,
+                    departure_time=departure_time,
+                    arrival_time=departure_time
+                    + timedelta(minutes=route.distance // 12 + 30),
+                    tickets_sold=len(sold),
+                )
+            )
+            seats.append(
+                [
+                    (
+                        index // airplane.seats_in_row + 1,
+                        index % airplane.seats_in_row + 1,
+                    )
+                    for index in sold
+                ]
+            )
+        flights = create(Flight, flights)
+        create(
+            Flight.crews.through,
+            [
+                Flight.crews.through(flight=flight, crew=crew)
+                for flight in flights
+                for crew in rng.sample(crews, min(len(crews), rng.randint(2, 4)))
+            ],
+        )
+
+        orders = []
+        tickets = []
+        for flight, flight_seats in zip(flights, seats):
+            while flight_seats:
+                size = rng.randint(1, 4)
+                # the benchmark user gets an order in every batch
+                order = Order(user=users[-2] if not orders else rng.choice(users))
+                orders.append(order)
+                tickets.extend(
+                    Ticket(row=row, seat=seat, flight=flight, order=order)
+                    for row, seat in flight_seats[:size]
+                )
+                flight_seats = flight_seats[size:]
+        create(Order, orders)
+        # the base manager skips the seats_changed signal of Ticket.objects
+        Ticket._base_manager.bulk_create(tickets, batch_size=batch_size)
+
+        flights_created += len(flights)
+        tickets_created += len(tickets)
+        log(f"Created {flights_created} flights and {tickets_created} tickets")
+
+    today = timezone.localdate()
+    schedules = []
+    for _ in range(volumes["flight_schedules"]):
+        route = rng.choice(routes)
+        valid_from = today + timedelta(days=rng.randint(-60, 30))
+        schedules.append(
+            FlightSchedule(
+                route=route,
+                airplane=rng.choice(airplanes),
+                departure_time=(
+                    datetime.min + timedelta(minutes=rng.randrange(0, 24 * 60, 15))
+                ).time(),
+                duration=timedelta(minutes=route.distance // 12 + 30),
+                weekdays="".join(sorted(rng.sample("1234567", rng.randint(1, 7)))),
+                valid_from=valid_from,
+                valid_until=valid_from + timedelta(days=rng.randint(30, 240)),
+            )
+        )
+    schedules = create(FlightSchedule, schedules)
+    create(
+        FlightSchedule.crews.through,
+        [
+            FlightSchedule.crews.through(flightschedule=schedule, crew=crew)
+            for schedule in schedules
+            for crew in rng.sample(crews, min(len(crews), rng.randint(2, 4)))
+        ],
+    )
+    flights_created += materialize(schedule_horizon())
+    log(f"Created {len(schedules)} flight schedules, {flights_created} flights")
+
+    # the flights and tickets were bulk created without updating the rollups
+    written, _ = rebuild_day_loads()
+    log(f"Created {written} route day load rollups")
+
+    for model in VERSIONED_MODELS:
+        bump_version(model)
+
+    return {**volumes, "flights": flights_created, "tickets": tickets_created}
+
+
+def get_endpoints() -> list[Endpoint]:
+    """
+    Every router endpoint of the airport app and the user endpoints, with
+    ids of seeded objects. Unsafe requests are rolled back after running.
+    """
+    user = get_user_model().objects.get(email=BENCHMARK_USER_EMAIL)
+    flight = Flight.objects.order_by("-tickets_sold", "id").first()
+    route = flight.route
+    order = Order.objects.filter(user=user).order_by("id").first()
+
+    seat_map = get_seat_map(flight)
+    free_seats = [
+        (row, seat)
+        for row in range(1, flight.airplane.rows + 1)
+        for seat in range(1, flight.airplane.seats_in_row + 1)
+        if not seat_map.is_taken(row, seat)
+    ][:2]
+
+    endpoints = []
+    for basename, model in (
+        ("role", Role),
+        ("crew", Crew),
+        ("country", Country),
+        ("airport", Airport),
+        ("route", Route),
+        ("airplanetype", AirplaneType),
+        ("airplane", Airplane),
+        ("flightschedule", FlightSchedule),
+    ):
+        instance = model.objects.order_by("id").first()
+        endpoints += [
+            Endpoint(f"{basename}-list", reverse(f"airport:{basename}-list")),
+            Endpoint(
+                f"{basename}-detail",
+                reverse(f"airport:{basename}-detail", args=[instance.id]),
+            ),
+        ]
+
+    airport = Airport.objects.order_by("id").first()
+    endpoints += [
+        Endpoint(
+            "airport-autocomplete",
+            reverse("airport:airport-autocomplete") + f"?q={airport.name[:3]}",
+        ),
+        Endpoint("flight-list", reverse("airport:flight-list")),
+        Endpoint(
+            "flight-list-keyset",
+            reverse("airport:flight-list") + "?pagination=keyset",
+        ),
+        Endpoint("flight-detail", reverse("airport:flight-detail", args=[flight.id])),
+        Endpoint(
+            "flight-search",
+            reverse("airport:flight-search")
+            + f"?source={route.source_id}&destination={route.destination_id}"
+            + f"&departure_from={flight.departure_time.date() - timedelta(days=30)}",
+        ),
+        Endpoint(
+            "itinerary-list",
+            reverse("airport:itinerary-list")
+            + f"?source={route.source_id}&destination={route.destination_id}",
+        ),
+        Endpoint("order-list", reverse("airport:order-list")),
+        Endpoint("order-detail", reverse("airport:order-detail", args=[order.id])),
+        Endpoint("order-tickets", reverse("airport:order-tickets", args=[order.id])),
+        Endpoint(
+            "order-create",
+            reverse("airport:order-list"),
+            method="post",
+            data={
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": flight.id}
+                    for row, seat in free_seats
+                ]
+            },
+        ),
+        Endpoint("seathold-list", reverse("airport:seathold-list")),
+        Endpoint(
+            "seathold-create",
+            reverse("airport:seathold-list"),
+            method="post",
+            data=[
+                {"row": row, "seat": seat, "flight": flight.id}
+                for row, seat in free_seats
+            ],
+        ),
+        Endpoint("cache-stats-list", reverse("airport:cache-stats-list"), user="admin"),
+        Endpoint(
+            "load-factor-list",
+            reverse("airport:load-factor-list")
+            + f"?departure_from={flight.departure_time.date() - timedelta(days=90)}"
+            + f"&departure_to={flight.departure_time.date()}",
+            user="admin",
+        ),
+        Endpoint(
+            "manifest-list",
+            reverse("airport:manifest-list") + f"?flight={flight.id}",
+            user="admin",
+        ),
+        Endpoint("user-manage", reverse("user:manage")),
+        Endpoint(
+            "user-create",
+            reverse("user:create"),
+            method="post",
+            data={"email": "new@airport.com", "password": BENCHMARK_PASSWORD},
+            user=None,
+        ),
+        Endpoint(
+            "user-token",
+            reverse("user:token_obtain_pair"),
+            method="post",
+            data={"email": BENCHMARK_USER_EMAIL, "password": BENCHMARK_PASSWORD},
+            user=None,
+        ),
+    ]
+
+    return endpoints
+
+
+def percentile(timings: list[float], percent: int) -> float:
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method="inclusive")[percent - 1]
+
+
+class Benchmark:
+    """
+    Runs requests against the endpoints in process with the test client.
+    The query count comes from a cold request, made after clearing the
+    cache, so cached responses can not hide N+1 queries; latencies are
+    measured over the following warm requests.
+    """
+
+    def __init__(self, iterations: int = 20) -> None:
+        self.iterations = iterations
+        # probed by SQLite on the first JSON query of a connection, which
+        # would otherwise be counted for whichever endpoint runs it first
+        connection.features.supports_json_field
+        self.clients = {None: Client()}
+        for name, email in (
+            ("user", BENCHMARK_USER_EMAIL),
+            ("admin", BENCHMARK_ADMIN_EMAIL),
+        ):
+            token = RefreshToken.for_user(
+                get_user_model().objects.get(email=email)
+            ).access_token
+            self.clients[name] = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def request(self, endpoint: Endpoint):
+        client = self.clients[endpoint.user]
+        if endpoint.method == "get":
+            response = client.get(endpoint.path)
+            if response.streaming:
+                # streamed bodies are queried while they are read
+                b"".join(response.streaming_content)
+            return response
+
+        with transaction.atomic():
+            response = getattr(client, endpoint.method)(
+                endpoint.path, endpoint.data, content_type="application/json"
+            )
+            transaction.set_rollback(True)
+        return response
+
+    def measure(self, endpoint: Endpoint) -> dict:
+        cache.clear()
+        timetable.invalidate()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.request(endpoint)
+        # every request resets the query log, count before the next one;
+        # savepoints depend on the caller's transaction, not on the endpoint
+        query_count = sum(
+            1 for query in queries if "SAVEPOINT" not in query["sql"].upper()
+        )
+        if response.status_code >= 400:
+            raise ValueError(
+                f"{endpoint.name} responded with {response.status_code}: "
+                f"{response.content[:200]!r}"
+            )
+
+        timings = []
+        for _ in range(self.iterations):
+            start = time.perf_counter()
+            self.request(endpoint)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return {
+            "queries": query_count,
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "p99_ms": round(percentile(timings, 99), 2),
+        }
+
+    def run(self, endpoints: list[Endpoint]) -> dict[str, dict]:
+        # throttling would reject the repeated requests of one user
+        with mock.patch.object(APIView, "throttle_classes", ()):
+            return {endpoint.name: self.measure(endpoint) for endpoint in endpoints}
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict[str, dict]:
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(results: dict[str, dict], path: Path = BASELINE_PATH) -> None:
+    with open(path, "w") as baseline:
+        json.dump(results, baseline, indent=2, sort_keys=True)
+        baseline.write("\n")
+
+
+def find_regressions(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    tolerance: Optional[float] = None,
+) -> list[str]:
+    """
+    Endpoints over their query budget, or with a p95 latency more than
+    tolerance (a fraction) above the baseline. Latency is not compared
+    when tolerance is None.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            regressions.append(f"{name}: no baseline")
+            continue
+        if result["queries"] > expected["queries"]:
+            regressions.append(
+                f"{name}: {result['queries']} queries, "
+                f"budget is {expected['queries']}"
+            )
+        if tolerance is not None and result["p95_ms"] > expected["p95_ms"] * (
+            1 + tolerance
+        ):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']} ms, "
+                f"baseline is {expected['p95_ms']} ms"
+            )
+
+    return regressions
@@ -0,0 +1,375 @@
+import hashlib
+import time
+from datetime import datetime
+from typing import Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Model, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from config.db_router import primary_reads, replica_reads
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Crew,
+    Flight,
+    FlightSchedule,
+    Role,
+    Route,
+)
+
+
+VIEW_CACHE_TIMEOUT = getattr(settings, "VIEW_CACHE_TIMEOUT", 60 * 60)
+VERSIONED_MODELS = (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Crew,
+    Flight,
+    FlightSchedule,
+    Role,
+    Route,
+)
+
+
+def version_cache_key(model: type[Model]) -> str:
+    return f"airport:version:{model._meta.label_lower}"
+
+
+def initial_version() -> int:
+    # a version that was evicted from the cache restarts above every value
+    # it could have reached before, so old entries can never match again
+    return time.time_ns() // 1000
+
+
+def get_key_versions(keys: list[str]) -> dict[str, int]:
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            version = initial_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+            versions[key] = version
+
+    return versions
+
+
+def get_versions(models: Iterable[type[Model]]) -> list[int]:
+    keys = [version_cache_key(model) for model in models]
+    versions = get_key_versions(keys)
+    return [versions[key] for key in keys]
+
+
+def bump_key_version(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, initial_version(), None)
+
+
+def changed_at_cache_key(model: type[Model]) -> str:
+    return f"airport:changed_at:{model._meta.label_lower}"
+
+
+def get_last_changed(models: Iterable[type[Model]]) -> float:
+    """Timestamp of the latest version bump of any of the models"""
+    keys = [changed_at_cache_key(model) for model in models]
+    changed_at = cache.get_many(keys)
+
+    for key in keys:
+        if key not in changed_at:
+            # like an evicted version, a lost timestamp restarts at now
+            now = time.time()
+            if not cache.add(key, now, None):
+                now = cache.get(key, now)
+            changed_at[key] = now
+
+    return max(changed_at.values())
+
+
+def bump_version(model: type[Model]) -> None:
+    bump_key_version(version_cache_key(model))
+    cache.set(changed_at_cache_key(model), time.time(), None)
+
+
+def record_cache_access(name: str, hit: bool) -> None:
+    key = f"airport:view_cache:{name}:{'hits' if hit else 'misses'}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_cache_stats(names: Iterable[str]) -> dict:
+    names = list(names)
+    counters = cache.get_many(
+        [
+            f"airport:view_cache:{name}:{kind}"
+            for name in names
+            for kind in ("hits", "misses")
+        ]
+    )
+
+    stats = {}
+    for name in names:
+        hits = counters.get(f"airport:view_cache:{name}:hits", 0)
+        misses = counters.get(f"airport:view_cache:{name}:misses", 0)
+        total = hits + misses
+        stats[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else None,
+        }
+
+    return stats
+
+
+class CachedReadMixin:
+    """
+    Read-through cache for list and retrieve of a viewset. Cache keys
+    include the versions of the viewset model and of cache_models, which
+    are bumped on every change, so stale entries are never read again and
+    simply expire.
+    """
+
+    cache_models = ()
+
+    def get_cache_models(self) -> list[type[Model]]:
+        return [self.queryset.model, *self.cache_models]
+
+    def get_cache_key(self, request) -> str:
+        versions = ".".join(
+            str(version) for version in get_versions(self.get_cache_models())
+        )
+        # pagination links are absolute urls
+        path = hashlib.md5(
+            request.build_absolute_uri(request.get_full_path()).encode()
+        ).hexdigest()
+        return f"airport:view:{self.basename}:{self.action}:{versions}:{path}"
+
+    def get_cached_response(self, request) -> tuple[str, Optional[Response]]:
+        """The cache key of the request and the cached response, if any"""
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        record_cache_access(self.basename, hit=data is not None)
+        if data is None:
+            return key, None
+        return key, Response(data, headers={"X-Cache": "HIT"})
+
+    def store_response(self, key: str, response: Response) -> Response:
+        if response.status_code == 200:
+            cache.set(key, response.data, VIEW_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def cached_response(self, handler, request, *args, **kwargs) -> Response:
+        key, response = self.get_cached_response(request)
+        if response is not None:
+            return response
+
+        with primary_reads():
+            response = handler(request, *args, **kwargs)
+        return self.store_response(key, response)
+
+    async def acached_response(self, handler, request, *args, **kwargs) -> Response:
+        """cached_response() around an async handler, see airport/async_views.py"""
+        key, response = await sync_to_async(self.get_cached_response)(request)
+        if response is not None:
+            return response
+
+        with primary_reads():
+            response = await handler(request, *args, **kwargs)
+        return await sync_to_async(self.store_response)(key, response)
+
+    def list(self, request, *args, **kwargs) -> Response:
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs) -> Response:
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for list and retrieve of a viewset, so that unchanged
+    resources answer 304 before anything is serialized.
+
+    The ETag comes from get_conditional_versions(), by default the versions
+    of the viewset model and cache_models, which are bumped whenever rows
+    are saved or deleted, and from one aggregate query for changes that
+    bypass save(), such as ticket counters: the latest updated_at of the
+    requested rows and of the related rows in get_conditional_related().
+    Viewsets without such changes, or that version them as well, turn
+    uses_conditional_query() off and answer from the cache alone.
+
+    Last-Modified is the latest updated_at found by the query, or the last
+    change of the versioned models without it. It is left out when
+    get_conditional_related() returns None because joining the related
+    tables would be too slow.
+    """
+
+    cache_models = ()
+    conditional_related = ()
+    conditional_query = True
+
+    def uses_conditional_query(self) -> bool:
+        return self.conditional_query
+
+    def get_conditional_related(self) -> Optional[tuple[str, ...]]:
+        return self.conditional_related
+
+    def get_conditional_queryset(self) -> QuerySet:
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return queryset
+
+    def get_conditional_aggregates(self) -> dict:
+        aggregates = {"updated_at": Max("updated_at")}
+        if self.action == "retrieve":
+            # related lookups may join many rows for the one object
+            aggregates["count"] = Count("pk", distinct=True)
+        for lookup in self.get_conditional_related() or ():
+            aggregates[f"{lookup}__updated_at"] = Max(f"{lookup}__updated_at")
+        return aggregates
+
+    def get_conditional_state(self) -> dict:
+        return (
+            self.get_conditional_queryset()
+            .order_by()
+            .aggregate(**self.get_conditional_aggregates())
+        )
+
+    async def aget_conditional_state(self) -> dict:
+        return (
+            await self.get_conditional_queryset()
+            .order_by()
+            .aaggregate(**self.get_conditional_aggregates())
+        )
+
+    def get_conditional_versions(self) -> list:
+        return get_versions([self.queryset.model, *self.cache_models])
+
+    def get_last_modified(self, state: dict) -> Optional[int]:
+        if self.get_conditional_related() is None:
+            return None
+        if not self.uses_conditional_query():
+            return int(get_last_changed([self.queryset.model, *self.cache_models]))
+
+        last_modified = max(
+            (value for value in state.values() if isinstance(value, datetime)),
+            default=None,
+        )
+        return int(last_modified.timestamp()) if last_modified else None
+
+    def get_validators(self, request, state: dict) -> tuple[str, Optional[int]]:
+        """The ETag and Last-Modified of the response"""
+        versions = self.get_conditional_versions()
+        etag = quote_etag(
+            hashlib.md5(
+                repr(
+                    (request.get_full_path(), versions, sorted(state.items()))
+                ).encode()
+            ).hexdigest()
+        )
+        return etag, self.get_last_modified(state)
+
+    def set_validators(
+        self, response, etag: str, last_modified: Optional[int], reads: int
+    ):
+        if not self.uses_conditional_query() and replica_reads() > reads:
+            # the versions may be ahead of the replica the response is
+            # read from, their ETag would keep its data until the next change
+            return response
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def conditional_response(self, handler, request, *args, **kwargs) -> Response:
+        state = {}
+        if self.uses_conditional_query():
+            state = self.get_conditional_state()
+            if self.action == "retrieve" and not state["count"]:
+                return handler(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(request, state)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        reads = replica_reads()
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified, reads)
+
+    async def aconditional_response(self, handler, request, *args, **kwargs):
+        """conditional_response() around an async handler"""
+        state = {}
+        if self.uses_conditional_query():
+            state = await self.aget_conditional_state()
+            if self.action == "retrieve" and not state["count"]:
+                return await handler(request, *args, **kwargs)
+
+        etag, last_modified = await sync_to_async(self.get_validators)(request, state)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        reads = replica_reads()
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+        return self.set_validators(response, etag, last_modified, reads)
+
+    def list(self, request, *args, **kwargs) -> Response:
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs) -> Response:
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+# version bumps of one model_changed(), once it has committed
+CHANGE_BUMPS = 2
+
+
+def model_changed(sender: type[Model]) -> None:
+    # bump right away for readers inside this transaction and once more
+    # after commit, so a response cached in between is not kept
+    bump_version(sender)
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+def model_saved_or_deleted(sender, **kwargs) -> None:
+    model_changed(sender)
+
+
+def flight_crews_changed(sender, instance, action, reverse, pk_set, **kwargs) -> None:
+    if not action.startswith("post_"):
+        return
+
+    model_changed(Flight)
+    # for Last-Modified, changed crews modify their flights; the flights of
+    # crew.flights.clear() are unknown by now and only get a new ETag
+    flight_ids = pk_set if reverse else {instance.pk}
+    if flight_ids:
+        Flight.objects.filter(pk__in=flight_ids).update(updated_at=timezone.now())
+
+
+# connected per model, a catch-all receiver would disable fast deletes
+for versioned_model in VERSIONED_MODELS:
+    post_save.connect(model_saved_or_deleted, sender=versioned_model)
+    post_delete.connect(model_saved_or_deleted, sender=versioned_model)
+m2m_changed.connect(flight_crews_changed, sender=Flight.crews.through)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+PROCESS_LOCAL_CACHES = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs) -> list[Warning]:
+    """
+    Seat maps, cache versions and tags live in the default cache. Kept per
+    process, a sale in one worker leaves the seat maps of the others stale
+    for up to SEAT_MAP_CACHE_TIMEOUT, and orders are validated against them.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+
+    return [
+        Warning(
+            "The default cache is local to each process, so seat maps and "
+            "cached responses are not invalidated across workers.",
+            hint="Set CACHE_URL to a Redis server, or run a single process.",
+            id="airport.W001",
+        )
+    ]
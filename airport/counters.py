@@ -0,0 +1,60 @@
+from django.db.models import Count, F, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.dispatch import receiver
+from django.utils import timezone
+
+from airport.load_factors import add_seats_sold, flight_deltas, refresh_flight_days
+from airport.models import Flight, Ticket
+from airport.response_cache import TICKETS_SOLD_TAG, flight_tag, invalidate_tags
+from airport.signals import seats_changed
+
+
+def tickets_count() -> Coalesce:
+    return Coalesce(
+        Subquery(
+            Ticket.objects.filter(flight=OuterRef("pk"))
+            .order_by()
+            .values("flight")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def drifted_flights() -> QuerySet:
+    """Flights whose stored tickets_sold differs from the actual ticket count."""
+    return (
+        Flight.objects.order_by()
+        .annotate(actual_tickets_sold=tickets_count())
+        .exclude(tickets_sold=F("actual_tickets_sold"))
+    )
+
+
+def repair_tickets_sold(flight_ids) -> int:
+    flight_ids = list(flight_ids)
+    repaired = Flight.objects.filter(pk__in=flight_ids).update(
+        tickets_sold=tickets_count(), updated_at=timezone.now()
+    )
+    invalidate_tags([TICKETS_SOLD_TAG, *map(flight_tag, flight_ids)])
+    refresh_flight_days(
+        Flight.objects.filter(pk__in=flight_ids).only("route_id", "departure_time")
+    )
+    return repaired
+
+
+@receiver(seats_changed)
+def update_tickets_sold(sender, flight_seats, taken, **kwargs) -> None:
+    # runs inside the transaction that inserts or deletes the tickets, one
+    # update for all of their flights; the taken seats of the flights
+    # changed too, so they count as modified
+    deltas = {
+        flight_id: len(seats) if taken else -len(seats)
+        for flight_id, seats in flight_seats.items()
+    }
+    Flight.objects.filter(pk__in=deltas).update(
+        tickets_sold=F("tickets_sold") + flight_deltas(deltas),
+        updated_at=timezone.now(),
+    )
+    invalidate_tags([TICKETS_SOLD_TAG])
+    add_seats_sold(deltas)
@@ -0,0 +1,13 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatsTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the seats have just been taken by another customer."
+    default_code = "seats_taken"
+
+    def __init__(self, seats: list[dict]) -> None:
+        super().__init__()
+        # set after __init__, which would turn the seat numbers into strings
+        self.detail = {"detail": self.detail, "seats": seats}
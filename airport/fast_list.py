@@ -0,0 +1,189 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, QuerySet
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from airport.models import Crew
+
+
+datetime_field = serializers.DateTimeField()
+
+
+def airport_name(name: str, country: str) -> str:
+    # Airport.__str__ without building Airport and Country instances
+    return f"{name} ({country})"
+
+
+def route_name(row: dict) -> str:
+    # Route.route_name
+    return (
+        f"{airport_name(row['source_name'], row['source_country'])}-"
+        f"{airport_name(row['destination_name'], row['destination_country'])}"
+    )
+
+
+def route_name_expressions(prefix: str = "") -> dict[str, F]:
+    return {
+        "source_name": F(f"{prefix}source__name"),
+        "source_country": F(f"{prefix}source__country__name"),
+        "destination_name": F(f"{prefix}destination__name"),
+        "destination_country": F(f"{prefix}destination__country__name"),
+    }
+
+
+class FastListMixin(ABC):
+    """
+    List action that reads flat rows with values() instead of building
+    model instances and running them through the list serializer. The
+    output is identical to the serializer's, which is still used when
+    the AIRPORT_FAST_LIST setting is off.
+
+    Subclasses set fast_list_fields and fast_list_expressions (the
+    arguments of values()) and turn a page of rows into the serializer
+    output in fast_list_representation().
+    """
+
+    fast_list_fields = ()
+    fast_list_expressions = {}
+
+    def get_fast_list_fields(self, queryset: QuerySet) -> tuple:
+        return self.fast_list_fields
+
+    def get_fast_list_rows(self, queryset: QuerySet) -> QuerySet:
+        return queryset.prefetch_related(None).values(
+            *self.get_fast_list_fields(queryset), **self.fast_list_expressions
+        )
+
+    @abstractmethod
+    def fast_list_representation(self, rows: list[dict]) -> list[dict]:
+        pass
+
+    def list_response(self, queryset: QuerySet) -> Response:
+        if not getattr(settings, "AIRPORT_FAST_LIST", True):
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+
+        rows = self.get_fast_list_rows(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.fast_list_representation(page))
+
+        return Response(self.fast_list_representation(list(rows)))
+
+    def list(self, request, *args, **kwargs) -> Response:
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+
+class AirportFastListMixin(FastListMixin):
+    fast_list_fields = ("id", "name", "closest_big_city")
+    fast_list_expressions = {"country_name": F("country__name")}
+
+    def fast_list_representation(self, rows: list[dict]) -> list[dict]:
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "closest_big_city": row["closest_big_city"],
+                "country": row["country_name"],
+            }
+            for row in rows
+        ]
+
+
+class RouteFastListMixin(FastListMixin):
+    fast_list_fields = ("id", "distance")
+    fast_list_expressions = route_name_expressions()
+
+    def fast_list_representation(self, rows: list[dict]) -> list[dict]:
+        return [
+            {
+                "id": row["id"],
+                "route_name": route_name(row),
+                "distance": row["distance"],
+            }
+            for row in rows
+        ]
+
+
+class AirplaneFastListMixin(FastListMixin):
+    fast_list_fields = ("id", "name", "rows", "seats_in_row")
+    fast_list_expressions = {"airplane_type_name": F("airplane_type__name")}
+
+    def fast_list_representation(self, rows: list[dict]) -> list[dict]:
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "rows": row["rows"],
+                "seats_in_row": row["seats_in_row"],
+                "airplane_type": row["airplane_type_name"],
+                "capacity": row["rows"] * row["seats_in_row"],
+            }
+            for row in rows
+        ]
+
+
+class FlightFastListMixin(FastListMixin):
+    # route_id is part of the keyset pagination ordering
+    fast_list_fields = (
+        "id",
+        "route_id",
+        "departure_time",
+        "arrival_time",
+        "tickets_sold",
+    )
+    fast_list_expressions = {
+        **route_name_expressions("route__"),
+        "airplane_name": F("airplane__name"),
+        "capacity": F("airplane__rows") * F("airplane__seats_in_row"),
+    }
+
+    def get_fast_list_fields(self, queryset: QuerySet) -> tuple:
+        if "crew_names" in queryset.query.annotations:
+            return (*self.fast_list_fields, "crew_names")
+        return self.fast_list_fields
+
+    @staticmethod
+    def get_crew_names(flight_ids: list[int]) -> dict[int, list[str]]:
+        # for databases without JSON aggregation of crew_names
+        crews = (
+            Crew.objects.filter(flights__in=flight_ids)
+            .order_by(*Crew._meta.ordering, "id")
+            .annotate(flight_id=F("flights"))
+            .values_list("flight_id", "first_name", "last_name", "role__name")
+        )
+        names = defaultdict(list)
+        for flight_id, first_name, last_name, role in crews:
+            # Crew.__str__
+            names[flight_id].append(f"{first_name} {last_name} ({role})")
+
+        return names
+
+    def fast_list_representation(self, rows: list[dict]) -> list[dict]:
+        if rows and "crew_names" not in rows[0]:
+            crew_names = self.get_crew_names([row["id"] for row in rows])
+        else:
+            crew_names = {row["id"]: row["crew_names"] or [] for row in rows}
+
+        return [
+            {
+                "id": row["id"],
+                "route": route_name(row),
+                "airplane": row["airplane_name"],
+                "departure_time": datetime_field.to_representation(
+                    row["departure_time"]
+                ),
+                "arrival_time": datetime_field.to_representation(row["arrival_time"]),
+                "crews": crew_names.get(row["id"], []),
+                "tickets_available": row["capacity"] - row["tickets_sold"],
+            }
+            for row in rows
+        ]
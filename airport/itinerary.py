@@ -0,0 +1,258 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from config.db_router import primary_reads
+
+from airport.models import Airplane, Flight, Route
+from airport.signals import seats_changed
+
+
+TIMETABLE_TTL = getattr(settings, "ITINERARY_TIMETABLE_TTL", 5 * 60)
+MAX_TRAVEL_TIME = getattr(settings, "ITINERARY_MAX_TRAVEL_TIME", timedelta(days=2))
+
+
+class Connection(NamedTuple):
+    departure: float
+    arrival: float
+    source: int
+    destination: int
+    flight_id: int
+
+
+class Leg(NamedTuple):
+    flight_id: int
+    source: int
+    destination: int
+    departure_time: datetime
+    arrival_time: datetime
+    tickets_available: int
+
+
+class Timetable:
+    """
+    In-memory timetable of upcoming flights for the connection scan
+    algorithm. Connections are kept sorted by departure and replaced
+    copy-on-write, so searches never see a half-applied update.
+    """
+
+    def __init__(self) -> None:
+        self.connections: list[Connection] = []
+        self.by_flight: dict[int, Connection] = {}
+        self.tickets_available: dict[int, int] = {}
+        self.loaded_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def load(self) -> None:
+        flights = (
+            Flight.objects.filter(departure_time__gte=timezone.now())
+            .order_by()
+            .values_list(
+                "id",
+                "route__source_id",
+                "route__destination_id",
+                "departure_time",
+                "arrival_time",
+                F("airplane__rows") * F("airplane__seats_in_row") - F("tickets_sold"),
+            )
+        )
+
+        connections = []
+        tickets_available = {}
+        for flight_id, source, destination, departure, arrival, available in flights:
+            connections.append(
+                Connection(
+                    departure.timestamp(),
+                    arrival.timestamp(),
+                    source,
+                    destination,
+                    flight_id,
+                )
+            )
+            tickets_available[flight_id] = available
+        connections.sort()
+
+        with self.lock:
+            self.connections = connections
+            self.by_flight = {
+                connection.flight_id: connection for connection in connections
+            }
+            self.tickets_available = tickets_available
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self) -> None:
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > TIMETABLE_TTL:
+            with primary_reads():
+                self.load()
+
+    def invalidate(self) -> None:
+        self.loaded_at = None
+
+    def update_flight(self, flight: Flight) -> None:
+        connection = Connection(
+            flight.departure_time.timestamp(),
+            flight.arrival_time.timestamp(),
+            flight.route.source_id,
+            flight.route.destination_id,
+            flight.id,
+        )
+        with self.lock:
+            connections = self._without(flight.id)
+            if flight.departure_time >= timezone.now():
+                insort(connections, connection)
+                self.by_flight[flight.id] = connection
+                self.tickets_available[flight.id] = (
+                    flight.airplane.capacity - flight.tickets_sold
+                )
+            self.connections = connections
+
+    def remove_flight(self, flight_id: int) -> None:
+        with self.lock:
+            self.connections = self._without(flight_id)
+
+    def _without(self, flight_id: int) -> list[Connection]:
+        connections = self.connections.copy()
+        connection = self.by_flight.pop(flight_id, None)
+        self.tickets_available.pop(flight_id, None)
+        if connection is not None:
+            index = bisect_left(connections, connection)
+            if index < len(connections) and connections[index] == connection:
+                del connections[index]
+        return connections
+
+    def change_tickets_available(self, flight_id: int, delta: int) -> None:
+        with self.lock:
+            if flight_id in self.tickets_available:
+                self.tickets_available[flight_id] += delta
+
+    def search(
+        self,
+        source: int,
+        destination: int,
+        departure_from: datetime,
+        max_legs: int = 3,
+        min_connection: timedelta = timedelta(hours=1),
+        seats: int = 1,
+    ) -> list[list[Leg]]:
+        """
+        Earliest arrival itineraries from source to destination, one for
+        every number of legs up to max_legs that arrives earlier than all
+        itineraries with fewer legs.
+        """
+        connections = self.connections
+        tickets_available = self.tickets_available
+        start = departure_from.timestamp()
+        transfer = min_connection.total_seconds()
+        deadline = start + MAX_TRAVEL_TIME.total_seconds()
+        infinity = float("inf")
+
+        # arrivals[k][airport] is the earliest arrival using exactly k legs;
+        # the source is "reached" early enough for any departure from start
+        arrivals = [{source: start - transfer}] + [{} for _ in range(max_legs)]
+        parents = [{} for _ in range(max_legs + 1)]
+
+        for index in range(bisect_left(connections, (start,)), len(connections)):
+            connection = connections[index]
+            # later departures cannot beat even the direct flight any more
+            if connection.departure > min(
+                arrivals[1].get(destination, infinity), deadline
+            ):
+                break
+            if connection.source == destination:
+                continue
+            if tickets_available.get(connection.flight_id, 0) < seats:
+                continue
+
+            latest_arrival = connection.departure - transfer
+            for legs in range(1, max_legs + 1):
+                arrival = arrivals[legs - 1].get(connection.source)
+                if arrival is None or arrival > latest_arrival:
+                    continue
+                if connection.arrival < arrivals[legs].get(
+                    connection.destination, infinity
+                ):
+                    arrivals[legs][connection.destination] = connection.arrival
+                    parents[legs][connection.destination] = connection
+
+        itineraries = []
+        best_arrival = infinity
+        for legs in range(1, max_legs + 1):
+            arrival = arrivals[legs].get(destination)
+            if arrival is None or arrival >= best_arrival:
+                continue
+            best_arrival = arrival
+            itineraries.append(self._journey(parents, legs, destination))
+
+        return itineraries
+
+    def _journey(self, parents: list[dict], legs: int, destination: int) -> list[Leg]:
+        journey = []
+        airport = destination
+        for level in range(legs, 0, -1):
+            connection = parents[level][airport]
+            journey.append(
+                Leg(
+                    connection.flight_id,
+                    connection.source,
+                    connection.destination,
+                    datetime.fromtimestamp(connection.departure, dt_timezone.utc),
+                    datetime.fromtimestamp(connection.arrival, dt_timezone.utc),
+                    self.tickets_available.get(connection.flight_id, 0),
+                )
+            )
+            airport = connection.source
+        journey.reverse()
+        return journey
+
+
+timetable = Timetable()
+
+
+def search_itineraries(*args, **kwargs) -> list[list[Leg]]:
+    timetable.ensure_loaded()
+    return timetable.search(*args, **kwargs)
+
+
+@receiver(post_save, sender=Flight)
+def flight_saved(sender, instance, **kwargs) -> None:
+    if timetable.is_loaded:
+        transaction.on_commit(lambda: timetable.update_flight(instance))
+
+
+@receiver(post_delete, sender=Flight)
+def flight_deleted(sender, instance, **kwargs) -> None:
+    if timetable.is_loaded:
+        transaction.on_commit(lambda: timetable.remove_flight(instance.id))
+
+
+@receiver(seats_changed)
+def flight_seats_changed(sender, flight_seats, taken, **kwargs) -> None:
+    if timetable.is_loaded:
+
+        def change() -> None:
+            for flight_id, seats in flight_seats.items():
+                delta = -len(seats) if taken else len(seats)
+                timetable.change_tickets_available(flight_id, delta)
+
+        transaction.on_commit(change)
+
+
+@receiver(post_save, sender=Route)
+@receiver(post_save, sender=Airplane)
+def layout_changed(sender, created, **kwargs) -> None:
+    # route airports and airplane capacity are shared by many flights
+    if not created:
+        transaction.on_commit(timetable.invalidate)
@@ -0,0 +1,242 @@
+import operator
+from datetime import date, timedelta
+from functools import reduce
+from typing import Iterable
+
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    FloatField,
+    IntegerField,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, NullIf, TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from airport.fast_list import route_name, route_name_expressions
+from airport.models import Airplane, DailyRouteLoad, Flight, Route
+
+
+ROLLUP_BATCH_SIZE = 1000
+ROLLUP_FIELDS = ["flights", "seats_sold", "capacity", "updated_at"]
+
+
+def day_loads(flights: QuerySet) -> QuerySet:
+    """Flights, seats sold and capacity per route and local departure date"""
+    return (
+        flights.order_by()
+        .annotate(date=TruncDate("departure_time"))
+        .values("route_id", "date")
+        .annotate(
+            flights=Count("id"),
+            seats_sold=Sum("tickets_sold"),
+            capacity=Sum(F("airplane__rows") * F("airplane__seats_in_row")),
+        )
+    )
+
+
+def flight_day(flight: Flight) -> tuple[int, date]:
+    # as saved, which may be from a string or a naive datetime
+    departure = Flight._meta.get_field("departure_time").get_prep_value(
+        flight.departure_time
+    )
+    return flight.route_id, timezone.localdate(departure)
+
+
+def save_day_loads(rows: Iterable[dict]) -> int:
+    loads = DailyRouteLoad.objects.bulk_create(
+        [DailyRouteLoad(**row) for row in rows],
+        batch_size=ROLLUP_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["route", "date"],
+        update_fields=ROLLUP_FIELDS,
+    )
+    return len(loads)
+
+
+def refresh_days(days: set[tuple[int, date]]) -> None:
+    """Recompute the rollups of (route id, date) pairs from their flights"""
+    if not days:
+        return
+
+    flights = Flight.objects.filter(
+        route_id__in={route_id for route_id, _ in days},
+        departure_time__date__in={day for _, day in days},
+    )
+    rows = [row for row in day_loads(flights) if (row["route_id"], row["date"]) in days]
+    save_day_loads(rows)
+
+    # days left without flights
+    empty = days - {(row["route_id"], row["date"]) for row in rows}
+    if empty:
+        DailyRouteLoad.objects.filter(
+            reduce(
+                operator.or_,
+                (Q(route_id=route_id, date=day) for route_id, day in empty),
+            )
+        ).delete()
+
+
+def refresh_flight_days(flights: Iterable[Flight]) -> None:
+    # for bulk_create and update(), which send no signals
+    refresh_days({flight_day(flight) for flight in flights})
+
+
+def rebuild_day_loads(date_from: date = None, date_to: date = None) -> tuple[int, int]:
+    """
+    Rewrite the rollups of a date range, all by default, from the flights.
+    Returns the number of rollups written and deleted.
+    """
+    flights = Flight.objects.all()
+    loads = DailyRouteLoad.objects.all()
+    if date_from:
+        flights = flights.filter(departure_time__date__gte=date_from)
+        loads = loads.filter(date__gte=date_from)
+    if date_to:
+        flights = flights.filter(departure_time__date__lte=date_to)
+        loads = loads.filter(date__lte=date_to)
+
+    now = timezone.now()
+    written = save_day_loads(day_loads(flights).iterator(ROLLUP_BATCH_SIZE))
+    # rollups of days whose flights are all gone were not rewritten
+    deleted, _ = loads.filter(updated_at__lt=now).delete()
+
+    return written, deleted
+
+
+def last_quarter(today: date) -> tuple[date, date]:
+    quarter_start = date(today.year, (today.month - 1) // 3 * 3 + 1, 1)
+    last_day = quarter_start - timedelta(days=1)
+    return date(last_day.year, (last_day.month - 1) // 3 * 3 + 1, 1), last_day
+
+
+def route_loads(date_from: date, date_to: date, route: int = None) -> QuerySet:
+    """Load factor of every route in a date range, from the rollups only"""
+    loads = DailyRouteLoad.objects.filter(date__range=(date_from, date_to))
+    if route is not None:
+        loads = loads.filter(route_id=route)
+
+    return (
+        loads.order_by()
+        .values("route_id")
+        .annotate(
+            flights=Sum("flights"),
+            seats_sold=Sum("seats_sold"),
+            capacity=Sum("capacity"),
+        )
+        .annotate(load_factor=Cast("seats_sold", FloatField()) / NullIf("capacity", 0))
+        .order_by(F("load_factor").desc(nulls_last=True), "route_id")
+    )
+
+
+def route_names(route_ids: Iterable[int]) -> dict[int, str]:
+    routes = Route.objects.filter(id__in=route_ids).values(
+        "id", **route_name_expressions()
+    )
+    return {route["id"]: route_name(route) for route in routes}
+
+
+def flight_deltas(deltas: dict[int, int]) -> Case:
+    """The change of a counter of each flight, by flight id"""
+    return Case(
+        *(When(pk=flight_id, then=Value(delta)) for flight_id, delta in deltas.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def add_seats_sold(deltas: dict[int, int]) -> None:
+    """
+    Counts seats sold or released on flights, by flight id, in the rollups
+    of their days with one update. Called by airport.counters after
+    tickets_sold of the flights has been updated.
+    """
+    flights = (
+        Flight.objects.filter(pk__in=deltas)
+        .order_by()
+        .annotate(date=TruncDate("departure_time"))
+    )
+    day_flights = flights.filter(route_id=OuterRef("route_id"), date=OuterRef("date"))
+    updated = DailyRouteLoad.objects.filter(
+        # the (route, date) index narrows the rollups down to the flights'
+        Exists(day_flights),
+        route_id__in=Subquery(flights.values("route_id")),
+        date__in=Subquery(flights.values("date")),
+    ).update(
+        seats_sold=F("seats_sold")
+        + Subquery(
+            day_flights.values("route_id")
+            .annotate(delta=Sum(flight_deltas(deltas)))
+            .values("delta")
+        ),
+        updated_at=timezone.now(),
+    )
+
+    days = {
+        flight_day(flight)
+        for flight in Flight.objects.filter(pk__in=deltas).only(
+            "route_id", "departure_time"
+        )
+    }
+    if updated < len(days):
+        # days without their rollups yet, tickets_sold includes the seats
+        existing = DailyRouteLoad.objects.filter(
+            reduce(
+                operator.or_,
+                (Q(route_id=route_id, date=day) for route_id, day in days),
+            )
+        ).values_list("route_id", "date")
+        refresh_days(days - set(existing))
+
+
+@receiver(pre_save, sender=Flight)
+def flight_saving(sender, instance, **kwargs) -> None:
+    # the day the flight leaves, if the route or departure change
+    if not instance._state.adding:
+        instance._previous_days = {
+            flight_day(flight)
+            for flight in Flight.objects.filter(pk=instance.pk).only(
+                "route_id", "departure_time"
+            )
+        }
+
+
+@receiver(post_save, sender=Flight)
+def flight_saved(sender, instance, **kwargs) -> None:
+    refresh_days({flight_day(instance), *getattr(instance, "_previous_days", set())})
+
+
+@receiver(post_delete, sender=Flight)
+def flight_deleted(sender, instance, **kwargs) -> None:
+    refresh_days({flight_day(instance)})
+
+
+@receiver(pre_save, sender=Airplane)
+def airplane_saving(sender, instance, **kwargs) -> None:
+    # the seats before the change, other fields leave the capacity alone
+    if not instance._state.adding:
+        instance._previous_seats = (
+            Airplane.objects.filter(pk=instance.pk)
+            .values_list("rows", "seats_in_row")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Airplane)
+def airplane_saved(sender, instance, created, **kwargs) -> None:
+    # the capacity of every day the airplane flies changed with its seats
+    previous_seats = getattr(instance, "_previous_seats", None)
+    if not created and previous_seats != (instance.rows, instance.seats_in_row):
+        refresh_flight_days(
+            Flight.objects.filter(airplane=instance).only("route_id", "departure_time")
+        )
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from airport.benchmarks import (
+    BASELINE_PATH,
+    Benchmark,
+    find_regressions,
+    get_endpoints,
+    load_baseline,
+    save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure SQL queries and latency percentiles of the API endpoints and "
+        "compare them with the stored baseline"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.5,
+            help="Allowed p95 slowdown as a fraction of the baseline",
+        )
+        parser.add_argument(
+            "--queries-only",
+            action="store_true",
+            help="Only check query budgets, latency depends on the machine",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="endpoints",
+            help="Only benchmark the given endpoint, can be repeated",
+        )
+        parser.add_argument("--baseline", default=BASELINE_PATH)
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Store the results as the new baseline",
+        )
+
+    def handle(self, *args, **options) -> None:
+        endpoints = get_endpoints()
+        if options["endpoints"]:
+            endpoints = [
+                endpoint
+                for endpoint in endpoints
+                if endpoint.name in options["endpoints"]
+            ]
+
+        # allows the test client host and turns off DEBUG
+        setup_test_environment(debug=False)
+        try:
+            results = Benchmark(iterations=options["iterations"]).run(endpoints)
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'endpoint':<24}{'queries':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<24}{result['queries']:>8}{result['p50_ms']:>10}"
+                f"{result['p95_ms']:>10}{result['p99_ms']:>10}"
+            )
+
+        if options["update_baseline"]:
+            baseline = (
+                load_baseline(options["baseline"]) if options["endpoints"] else {}
+            )
+            save_baseline({**baseline, **results}, options["baseline"])
+            self.stdout.write(self.style.SUCCESS("Baseline updated"))
+            return
+
+        regressions = find_regressions(
+            results,
+            load_baseline(options["baseline"]),
+            tolerance=None if options["queries_only"] else options["tolerance"],
+        )
+        if regressions:
+            raise CommandError("Benchmark regressions:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS("All endpoints are within budget"))
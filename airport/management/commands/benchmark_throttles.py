@@ -0,0 +1,99 @@
+import pickle
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from rest_framework import throttling
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from airport.benchmarks import percentile
+from config import throttling as sliding_window
+
+
+THROTTLES = {
+    "drf-anon": throttling.AnonRateThrottle,
+    "sliding-anon": sliding_window.AnonRateThrottle,
+    "drf-user": throttling.UserRateThrottle,
+    "sliding-user": sliding_window.UserRateThrottle,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per request overhead and cached state of DRF's "
+        "throttles with the sliding window throttles"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="Requests per client, over the rate they are denied",
+        )
+        parser.add_argument("--clients", type=int, default=10)
+        parser.add_argument("--rate", default="1000/day")
+
+    def handle(self, *args, **options) -> None:
+        self.stdout.write(
+            f"{'throttle':<16}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}"
+            f"{'state bytes':>14}{'denied':>8}"
+        )
+        for name, throttle_class in THROTTLES.items():
+            result = self.measure(throttle_class, options)
+            self.stdout.write(
+                f"{name:<16}{result['p50_us']:>10}{result['p95_us']:>10}"
+                f"{result['p99_us']:>10}{result['state_bytes']:>14}"
+                f"{result['denied']:>8}"
+            )
+
+    @staticmethod
+    def get_requests(throttle_class, clients: int) -> list[Request]:
+        factory = APIRequestFactory()
+        authenticated = throttle_class.scope == "user"
+        requests = []
+        for client in range(clients):
+            request = Request(
+                factory.get("/", REMOTE_ADDR=f"10.0.{client // 256}.{client % 256}")
+            )
+            request.user = SimpleNamespace(pk=client, is_authenticated=authenticated)
+            requests.append(request)
+
+        return requests
+
+    def measure(self, throttle_class, options: dict) -> dict:
+        requests = self.get_requests(throttle_class, options["clients"])
+        cache = caches[getattr(settings, "THROTTLE_CACHE", "default")]
+        cache.clear()
+        rates = {throttle_class.scope: options["rate"]}
+
+        timings = []
+        denied = 0
+        with mock.patch.object(throttle_class, "cache", cache), mock.patch.object(
+            throttle_class, "THROTTLE_RATES", rates
+        ):
+            for _ in range(options["requests"]):
+                for request in requests:
+                    throttle = throttle_class()
+                    start = time.perf_counter()
+                    if not throttle.allow_request(request, None):
+                        denied += 1
+                    timings.append((time.perf_counter() - start) * 1_000_000)
+
+        # the state kept for the last client
+        if hasattr(throttle, "history"):
+            state = throttle.history
+        else:
+            state = [throttle.previous, throttle.current]
+
+        return {
+            "p50_us": round(percentile(timings, 50), 1),
+            "p95_us": round(percentile(timings, 95), 1),
+            "p99_us": round(percentile(timings, 99), 1),
+            "state_bytes": len(pickle.dumps(state, pickle.HIGHEST_PROTOCOL)),
+            "denied": denied,
+        }
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from airport.counters import drifted_flights, repair_tickets_sold
+
+
+class Command(BaseCommand):
+    help = "Compare Flight.tickets_sold with the actual ticket count and repair drift"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rewrite drifted counters from the Ticket table",
+        )
+
+    def handle(self, *args, **options) -> None:
+        drifted = list(
+            drifted_flights().values_list("id", "tickets_sold", "actual_tickets_sold")
+        )
+
+        for flight_id, stored, actual in drifted:
+            self.stdout.write(
+                f"Flight {flight_id}: tickets_sold is {stored}, actual {actual}"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All flight counters are correct"))
+        elif options["repair"]:
+            repaired = repair_tickets_sold([flight_id for flight_id, *_ in drifted])
+            self.stdout.write(self.style.SUCCESS(f"Repaired {repaired} flight(s)"))
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{len(drifted)} flight(s) drifted, run with --repair to fix"
+                )
+            )
@@ -0,0 +1,45 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.manifest import MANIFEST_CHUNK_SIZE, MANIFEST_OUTPUTS, export_manifest
+
+
+class Command(BaseCommand):
+    help = "Write the passenger manifest of a flight or date range as CSV or NDJSON"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--flight", type=int, help="Flight id")
+        parser.add_argument(
+            "--from",
+            dest="departure_from",
+            type=date.fromisoformat,
+            help="First departure date, YYYY-MM-DD",
+        )
+        parser.add_argument(
+            "--to",
+            dest="departure_to",
+            type=date.fromisoformat,
+            help="Last departure date (inclusive), YYYY-MM-DD",
+        )
+        parser.add_argument("--output", choices=list(MANIFEST_OUTPUTS), default="csv")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=MANIFEST_CHUNK_SIZE,
+            help="Tickets read from the database at a time",
+        )
+
+    def handle(self, *args, **options) -> None:
+        filters = {
+            name: options[name]
+            for name in ("flight", "departure_from", "departure_to")
+            if options[name] is not None
+        }
+        if "flight" not in filters and len(filters) < 2:
+            raise CommandError("Set --flight or both --from and --to")
+
+        for line in export_manifest(
+            options["output"], options["chunk_size"], **filters
+        ):
+            self.stdout.write(line, ending="")
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.schedule_import import ScheduleError, ScheduleImporter, read_schedule
+
+
+class Command(BaseCommand):
+    help = (
+        "Import flights and their crews from a CSV, JSON or JSON lines schedule. "
+        "Flights that already exist are skipped, so an interrupted import "
+        "can be run again to resume."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("path", type=Path, help="Schedule file")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows imported in one transaction",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows inserted by one INSERT statement",
+        )
+
+    def handle(self, *args, **options) -> None:
+        path = options["path"]
+        if not path.is_file():
+            raise CommandError(f"No such file {path}")
+
+        importer = ScheduleImporter(
+            chunk_size=options["chunk_size"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write,
+        )
+        try:
+            result = importer.run(read_schedule(path))
+        except (ScheduleError, ValueError) as error:
+            raise CommandError(error)
+
+        for error in result.errors:
+            self.stderr.write(error)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.flights} flights and {result.crew_assignments} crew "
+                f"assignments imported from {result.rows} rows, "
+                f"{result.skipped} existing flights skipped, "
+                f"{len(result.errors)} invalid rows"
+            )
+        )
@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from airport.schedules import SCHEDULE_HORIZON_DAYS, materialize
+
+
+class Command(BaseCommand):
+    help = "Create the flights of the flight schedules up to the rolling horizon"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=SCHEDULE_HORIZON_DAYS,
+            help="Days from today to materialize",
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Last date to materialize, YYYY-MM-DD, instead of --days",
+        )
+
+    def handle(self, *args, **options) -> None:
+        until = options["until"] or timezone.localdate() + timedelta(
+            days=options["days"]
+        )
+        flights = materialize(until)
+        self.stdout.write(
+            self.style.SUCCESS(f"{flights} flights materialized up to {until}")
+        )
@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from airport.load_factors import rebuild_day_loads
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the route day load rollups from the flights, run "
+        "check_tickets_sold --repair first if the ticket counters drifted"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            type=date.fromisoformat,
+            help="First departure date, YYYY-MM-DD",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            type=date.fromisoformat,
+            help="Last departure date, YYYY-MM-DD",
+        )
+
+    def handle(self, *args, **options) -> None:
+        with transaction.atomic():
+            written, deleted = rebuild_day_loads(
+                options["date_from"], options["date_to"]
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{written} route day rollups rewritten, {deleted} empty days deleted"
+            )
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.benchmarks import seed
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    help = "Fill an empty database with realistic data volumes for benchmarks"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Multiplier of the default volumes (100k flights, 2M tickets)",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the random generator"
+        )
+
+    def handle(self, *args, **options) -> None:
+        if Flight.objects.exists():
+            raise CommandError(
+                "The database already has flights, seed an empty database "
+                "(python manage.py flush)"
+            )
+
+        volumes = seed(
+            scale=options["scale"],
+            batch_size=options["batch_size"],
+            random_seed=options["seed"],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Seeded "
+                + ", ".join(f"{volume} {name}" for name, volume in volumes.items())
+            )
+        )
@@ -0,0 +1,116 @@
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+from airport.fast_list import datetime_field, route_name, route_name_expressions
+from airport.models import Ticket
+
+
+MANIFEST_CHUNK_SIZE = getattr(settings, "MANIFEST_CHUNK_SIZE", 2000)
+MANIFEST_FIELDS = (
+    "flight",
+    "route",
+    "departure_time",
+    "row",
+    "seat",
+    "ticket",
+    "order",
+    "email",
+)
+
+
+def start_of_day(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def manifest_rows(
+    flight: Optional[int] = None,
+    departure_from: Optional[date] = None,
+    departure_to: Optional[date] = None,
+) -> QuerySet:
+    """Tickets of a flight or of the flights departing between two dates"""
+    tickets = Ticket.objects.all()
+    if flight is not None:
+        tickets = tickets.filter(flight_id=flight)
+    if departure_from is not None:
+        tickets = tickets.filter(
+            flight__departure_time__gte=start_of_day(departure_from)
+        )
+    if departure_to is not None:
+        tickets = tickets.filter(
+            flight__departure_time__lt=start_of_day(departure_to + timedelta(days=1))
+        )
+
+    return tickets.order_by(
+        "flight__departure_time", "flight_id", "row", "seat"
+    ).values(
+        "id",
+        "flight_id",
+        "order_id",
+        "row",
+        "seat",
+        departure_time=F("flight__departure_time"),
+        email=F("order__user__email"),
+        **route_name_expressions("flight__route__"),
+    )
+
+
+def manifest_records(
+    rows: QuerySet, chunk_size: int = MANIFEST_CHUNK_SIZE
+) -> Iterator[dict]:
+    # iterator() streams the rows instead of loading the whole manifest
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {
+            "flight": row["flight_id"],
+            "route": route_name(row),
+            "departure_time": datetime_field.to_representation(row["departure_time"]),
+            "row": row["row"],
+            "seat": row["seat"],
+            "ticket": row["id"],
+            "order": row["order_id"],
+            "email": row["email"],
+        }
+
+
+class Echo:
+    """File-like object that returns what is written, for csv.writer"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(records: Iterable[dict]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(MANIFEST_FIELDS)
+    for record in records:
+        yield writer.writerow([record[field] for field in MANIFEST_FIELDS])
+
+
+def iter_ndjson(records: Iterable[dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record) + "\n"
+
+
+MANIFEST_OUTPUTS = {
+    "csv": (iter_csv, "text/csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
+
+
+def export_manifest(
+    output: str = "csv",
+    chunk_size: int = MANIFEST_CHUNK_SIZE,
+    **filters,
+) -> Iterator[str]:
+    """
+    Lines of the manifest in the output format. Nothing is queried before
+    the first line is taken, and the rows are read in chunks, so the
+    export starts at once and needs the same memory for any size.
+    """
+    iter_output, _ = MANIFEST_OUTPUTS[output]
+    return iter_output(manifest_records(manifest_rows(**filters), chunk_size))
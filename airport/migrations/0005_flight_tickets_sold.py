@@ -0,0 +1,34 @@
+# Generated by Django 4.2.4 on 2026-10-18 02:21
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_tickets_sold(apps, schema_editor) -> None:
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+
+    tickets_count = (
+        Ticket.objects.filter(flight=OuterRef("pk"))
+        .order_by()
+        .values("flight")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Flight.objects.update(tickets_sold=Coalesce(Subquery(tickets_count), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0004_alter_flight_options"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_tickets_sold, migrations.RunPython.noop),
+    ]
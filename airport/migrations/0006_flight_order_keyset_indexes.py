@@ -0,0 +1,25 @@
+# Generated by Django 4.2.4 on 2026-10-18 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0005_flight_tickets_sold"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["-departure_time", "route"],
+                name="airport_fli_departu_45ebe1_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "-created_at"], name="airport_ord_user_id_5a658c_idx"
+            ),
+        ),
+    ]
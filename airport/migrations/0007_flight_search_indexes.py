@@ -0,0 +1,31 @@
+# Generated by Django 4.2.4 on 2026-10-18 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0006_flight_order_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="airport",
+            index=models.Index(
+                fields=["closest_big_city"], name="airport_air_closest_c15c62_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["route", "departure_time"],
+                name="airport_fli_route_i_baa295_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="route",
+            index=models.Index(
+                fields=["source", "destination"], name="airport_rou_source__5c8f4c_idx"
+            ),
+        ),
+    ]
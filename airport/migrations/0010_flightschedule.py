@@ -0,0 +1,93 @@
+# Generated by Django 4.2.4 on 2026-10-18 03:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0009_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlightSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "departure_time",
+                    models.TimeField(help_text="Local time of departure"),
+                ),
+                ("duration", models.DurationField()),
+                (
+                    "weekdays",
+                    models.CharField(
+                        default="1234567",
+                        help_text="ISO weekdays of the departures, 1 is Monday",
+                        max_length=7,
+                    ),
+                ),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField()),
+                (
+                    "materialized_until",
+                    models.DateField(blank=True, editable=False, null=True),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["valid_from", "departure_time"],
+            },
+        ),
+        migrations.AddField(
+            model_name="flightschedule",
+            name="airplane",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="flight_schedules",
+                to="airport.airplane",
+            ),
+        ),
+        migrations.AddField(
+            model_name="flightschedule",
+            name="crews",
+            field=models.ManyToManyField(
+                blank=True, related_name="flight_schedules", to="airport.crew"
+            ),
+        ),
+        migrations.AddField(
+            model_name="flightschedule",
+            name="route",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="flight_schedules",
+                to="airport.route",
+            ),
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="flights",
+                to="airport.flightschedule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="flight",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "departure_time"), name="unique_schedule_departure"
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:09
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def build_daily_route_loads(apps, schema_editor) -> None:
+    Flight = apps.get_model("airport", "Flight")
+    DailyRouteLoad = apps.get_model("airport", "DailyRouteLoad")
+
+    rows = (
+        Flight.objects.order_by()
+        .annotate(date=TruncDate("departure_time"))
+        .values("route_id", "date")
+        .annotate(
+            flights=Count("id"),
+            seats_sold=Sum("tickets_sold"),
+            capacity=Sum(F("airplane__rows") * F("airplane__seats_in_row")),
+        )
+    )
+    DailyRouteLoad.objects.bulk_create(
+        (DailyRouteLoad(**row) for row in rows.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("airport", "0010_flightschedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRouteLoad",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("flights", models.PositiveIntegerField()),
+                ("seats_sold", models.PositiveIntegerField()),
+                ("capacity", models.PositiveIntegerField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_loads",
+                        to="airport.route",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date", "route"],
+                "indexes": [
+                    models.Index(
+                        fields=["date", "route", "flights", "seats_sold", "capacity"],
+                        name="airport_dai_date_fa34e7_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailyrouteload",
+            constraint=models.UniqueConstraint(
+                fields=("route", "date"), name="unique_route_day_load"
+            ),
+        ),
+        migrations.RunPython(build_daily_route_loads, migrations.RunPython.noop),
+    ]
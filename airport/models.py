@@ -1,10 +1,17 @@
+from collections import defaultdict
+from typing import Optional
+
 from django.db import models
 from django.conf import settings
 from django.forms import ValidationError
+from django.utils import timezone
+
+from airport.signals import seats_changed
 
 
 class Role(models.Model):
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -17,6 +24,7 @@ class Crew(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     role = models.ForeignKey(Role, on_delete=models.PROTECT, related_name="crews")
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def full_name(self) -> str:
@@ -31,6 +39,7 @@ class Crew(models.Model):
 
 class Country(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "countries"
@@ -45,9 +54,11 @@ class Airport(models.Model):
     country = models.ForeignKey(
         Country, on_delete=models.CASCADE, related_name="airports"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-country", "name"]
+        indexes = [models.Index(fields=["closest_big_city"])]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.country})"
@@ -61,6 +72,7 @@ class Route(models.Model):
         Airport, on_delete=models.CASCADE, related_name="destination_routes"
     )
     distance = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def route_name(self) -> str:
@@ -68,6 +80,7 @@ class Route(models.Model):
 
     class Meta:
         ordering = ["source", "destination"]
+        indexes = [models.Index(fields=["source", "destination"])]
 
     def __str__(self) -> str:
         return self.route_name
@@ -75,6 +88,7 @@ class Route(models.Model):
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -90,6 +104,7 @@ class Airplane(models.Model):
     airplane_type = models.ForeignKey(
         AirplaneType, on_delete=models.CASCADE, related_name="airplanes"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def capacity(self) -> int:
@@ -102,6 +117,36 @@ class Airplane(models.Model):
         return self.name
 
 
+class FlightSchedule(models.Model):
+    route = models.ForeignKey(
+        Route, on_delete=models.CASCADE, related_name="flight_schedules"
+    )
+    airplane = models.ForeignKey(
+        Airplane, on_delete=models.CASCADE, related_name="flight_schedules"
+    )
+    departure_time = models.TimeField(help_text="Local time of departure")
+    duration = models.DurationField()
+    weekdays = models.CharField(
+        max_length=7,
+        default="1234567",
+        help_text="ISO weekdays of the departures, 1 is Monday",
+    )
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    crews = models.ManyToManyField(Crew, related_name="flight_schedules", blank=True)
+    materialized_until = models.DateField(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["valid_from", "departure_time"]
+
+    def __str__(self) -> str:
+        return (
+            f"{self.route.route_name} at {self.departure_time} "
+            f"from {self.valid_from} to {self.valid_until}"
+        )
+
+
 class Flight(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="flights")
     airplane = models.ForeignKey(
@@ -110,13 +155,88 @@ class Flight(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crews = models.ManyToManyField(Crew, related_name="flights", blank=True)
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name="flights",
+    )
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-departure_time", "route"]
+        indexes = [
+            models.Index(fields=["-departure_time", "route"]),
+            models.Index(fields=["route", "departure_time"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "departure_time"],
+                name="unique_schedule_departure",
+            )
+        ]
 
     def __str__(self) -> str:
         return f"{self.route.route_name} at {self.departure_time}"
 
+    @property
+    def capacity(self) -> int:
+        return self.airplane.capacity
+
+    def save(
+        self, force_insert=False, force_update=False, using=None, update_fields=None
+    ) -> None:
+        if not self._state.adding and update_fields is None:
+            # tickets_sold is maintained by atomic F() updates, so saving a
+            # stale instance must never overwrite it
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "tickets_sold"
+            ]
+        return super(Flight, self).save(
+            force_insert, force_update, using, update_fields
+        )
+
+
+class DailyRouteLoad(models.Model):
+    """
+    Flights, seats sold and capacity of a route on a local departure date,
+    kept up to date from ticket and flight changes, see
+    airport/load_factors.py
+    """
+
+    route = models.ForeignKey(
+        Route, on_delete=models.CASCADE, related_name="daily_loads"
+    )
+    date = models.DateField()
+    flights = models.PositiveIntegerField()
+    seats_sold = models.PositiveIntegerField()
+    capacity = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["date", "route"]
+        indexes = [
+            # covers the load factor report of a date range
+            models.Index(fields=["date", "route", "flights", "seats_sold", "capacity"])
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["route", "date"], name="unique_route_day_load"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.route.route_name} on {self.date}"
+
+    @property
+    def load_factor(self) -> Optional[float]:
+        return self.seats_sold / self.capacity if self.capacity else None
+
 
 class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -126,17 +246,35 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "-created_at"])]
 
     def __str__(self) -> str:
         return str(self.created_at)
 
 
+class TicketQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs) -> list:
+        tickets = super().bulk_create(objs, *args, **kwargs)
+
+        flight_seats = defaultdict(list)
+        for ticket in tickets:
+            flight_seats[ticket.flight_id].append((ticket.row, ticket.seat))
+        if flight_seats:
+            seats_changed.send(
+                sender=self.model, flight_seats=dict(flight_seats), taken=True
+            )
+
+        return tickets
+
+
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
     flight = models.ForeignKey(Flight, on_delete=models.CASCADE, related_name="tickets")
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="tickets")
 
+    objects = TicketQuerySet.as_manager()
+
     class Meta:
         unique_together = ("flight", "row", "seat")
         ordering = ["row", "seat"]
@@ -171,3 +309,32 @@ class Ticket(models.Model):
         return super(Ticket, self).save(
             force_insert, force_update, using, update_fields
         )
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def active(self) -> models.QuerySet:
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self) -> models.QuerySet:
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    flight = models.ForeignKey(
+        Flight, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ("flight", "row", "seat")
+        ordering = ["row", "seat"]
+
+    def __str__(self) -> str:
+        return f"{str(self.flight)} (row: {self.row}, seat: {self.seat})"
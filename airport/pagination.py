@@ -0,0 +1,169 @@
+from collections import OrderedDict
+from typing import Optional
+
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    page_size_query_param = "limit"
+
+
+def total_ordering(ordering: tuple) -> tuple:
+    """
+    DRF's cursor keeps only the position of the first ordering field and
+    steps over rows tied on it with an offset, which repeats or skips rows
+    unless the ordering is total. End it with the id.
+    """
+    if {"id", "-id", "pk", "-pk"} & set(ordering):
+        return ordering
+    return (*ordering, "-id" if ordering[0].startswith("-") else "id")
+
+
+class OptionalKeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with two opt-ins for cheap deep pages:
+    `?pagination=keyset` (or any `?cursor=`) switches to cursor pagination
+    over `ordering`, ended with the id, and `?count=false` skips the
+    COUNT(*) query.
+    """
+
+    ordering = None
+    mode_query_param = "pagination"
+    mode_query_description = "Set to `keyset` to paginate with cursors."
+    count_query_param = "count"
+    count_query_description = "Set to `false` to skip counting all results."
+
+    keyset = None
+
+    def use_keyset(self, request) -> bool:
+        return (
+            request.query_params.get(self.mode_query_param) == "keyset"
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def count_requested(self, request) -> bool:
+        return request.query_params.get(self.count_query_param) not in (
+            "false",
+            "0",
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset = KeysetPagination()
+            # an explicit order_by() of the view takes precedence
+            self.keyset.ordering = total_ordering(
+                tuple(queryset.query.order_by) or self.ordering
+            )
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        if self.count_requested(request):
+            return super().paginate_queryset(queryset, request, view)
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = None
+        self.offset = self.get_offset(request)
+        self.request = request
+        results = list(queryset[self.offset : self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+
+        return results[: self.limit]
+
+    def get_paginated_response(self, data) -> Response:
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+
+        if self.count is None:
+            return Response(
+                OrderedDict(
+                    [
+                        ("next", self.get_next_link()),
+                        ("previous", self.get_previous_link()),
+                        ("results", data),
+                    ]
+                )
+            )
+
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.count is not None:
+            return super().get_next_link()
+
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_schema_operation_parameters(self, view) -> list:
+        parameters = super().get_schema_operation_parameters(view)
+        keyset = KeysetPagination()
+        keyset.ordering = self.ordering
+        cursor_parameter = next(
+            parameter
+            for parameter in keyset.get_schema_operation_parameters(view)
+            if parameter["name"] == keyset.cursor_query_param
+        )
+        return parameters + [
+            cursor_parameter,
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.mode_query_description,
+                "schema": {"type": "string", "enum": ["keyset"]},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.count_query_description,
+                "schema": {"type": "boolean"},
+            },
+        ]
+
+
+class FlightPagination(OptionalKeysetPagination):
+    ordering = ("-departure_time", "route_id", "-id")
+
+
+class OrderPagination(OptionalKeysetPagination):
+    ordering = ("-created_at", "-id")
+
+
+class AsyncLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination for the async views, which read the page with
+    the async ORM and respond with plain data instead of a Response.
+    """
+
+    async def apaginate_queryset(self, queryset, request) -> Optional[list]:
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count == 0 or self.offset > self.count:
+            return []
+
+        return [row async for row in queryset[self.offset : self.offset + self.limit]]
+
+    def get_paginated_data(self, data: list) -> OrderedDict:
+        return OrderedDict(
+            [
+                ("count", self.count),
+                ("next", self.get_next_link()),
+                ("previous", self.get_previous_link()),
+                ("results", data),
+            ]
+        )
@@ -0,0 +1,308 @@
+import asyncio
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, urlencode
+from rest_framework.response import Response
+
+from config.db_router import primary_reads
+
+from airport.caching import (
+    bump_key_version,
+    get_key_versions,
+    get_versions,
+    model_changed,
+    record_cache_access,
+)
+from airport.models import Crew, Flight
+from airport.signals import seats_changed
+
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 60)
+# expired entries are kept this long to be served while one request rebuilds them
+RESPONSE_CACHE_STALE_TIMEOUT = getattr(settings, "RESPONSE_CACHE_STALE_TIMEOUT", 60)
+RESPONSE_CACHE_LOCK_TIMEOUT = getattr(settings, "RESPONSE_CACHE_LOCK_TIMEOUT", 10)
+RESPONSE_CACHE_POLL_INTERVAL = 0.05
+CACHED_HEADERS = ("ETag", "Last-Modified")
+
+ALL_FLIGHTS_TAG = "flights"
+# ticket counters change without saving flights, flight list ETags follow it
+TICKETS_SOLD_TAG = "tickets_sold"
+
+
+def tag_cache_key(tag: str) -> str:
+    return f"airport:tag:{tag}"
+
+
+def get_tag_versions(tags: Iterable[str]) -> dict[str, int]:
+    tags = list(tags)
+    versions = get_key_versions([tag_cache_key(tag) for tag in tags])
+    return {tag: versions[tag_cache_key(tag)] for tag in tags}
+
+
+def invalidate_tags(tags: Iterable[str]) -> None:
+    # like model_changed, bump now and once more after commit
+    keys = [tag_cache_key(tag) for tag in set(tags)]
+
+    def bump() -> None:
+        for key in keys:
+            bump_key_version(key)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def flight_tag(flight_id: int) -> str:
+    return f"flight:{flight_id}"
+
+
+def route_tag(route_id: int) -> str:
+    return f"route:{route_id}"
+
+
+class TaggedResponseCacheMixin(ABC):
+    """
+    Response cache for anonymous safe requests of response_cache_actions,
+    keyed by the normalized query string. Entries are tagged by what they
+    show (see get_response_tags()) and hold the versions of their tags,
+    so invalidate_tags() makes exactly the affected entries stale. Like
+    CachedReadMixin, keys also include the versions of cache_models.
+
+    Only one request rebuilds a missing, stale or expired entry. Others
+    serve the expired entry meanwhile, or wait for the rebuilt one when
+    there is none they could serve.
+    """
+
+    cache_models = ()
+    response_cache_actions = ("list",)
+
+    @abstractmethod
+    def get_response_tags(self, request, data) -> set[str]:
+        """Tags of the rows shown in the response data"""
+
+    def get_membership_tags(self, request) -> set[str]:
+        """Tags of the changes that add or remove rows of the response"""
+        return set()
+
+    def is_response_cached(self, request) -> bool:
+        return (
+            self.action in self.response_cache_actions
+            and request.method in ("GET", "HEAD")
+            and not request.user.is_authenticated
+        )
+
+    def get_response_cache_key(self, request) -> str:
+        # changes of the viewset model itself are covered by the tags
+        versions = ".".join(str(version) for version in get_versions(self.cache_models))
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        # pagination links are absolute urls
+        request_hash = hashlib.md5(
+            f"{request.get_host()}{request.path}?{query}".encode()
+        ).hexdigest()
+        return (
+            f"airport:response:{self.basename}:{self.action}:{versions}:{request_hash}"
+        )
+
+    @staticmethod
+    def is_valid(entry: Optional[dict]) -> bool:
+        if entry is None:
+            return False
+        return get_tag_versions(entry["tags"]) == entry["tags"]
+
+    def entry_response(self, request, entry: dict, cache_status: str) -> Response:
+        headers = {**entry["headers"], "X-Cache": cache_status}
+        response = get_conditional_response(
+            request,
+            etag=headers.get("ETag"),
+            last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+        )
+        if response is None:
+            return Response(entry["data"], headers=headers)
+
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    def store_entry(self, key: str, request, response, tags: dict) -> Response:
+        if response.status_code == 200:
+            response_tags = self.get_response_tags(request, response.data)
+            tags.update(get_tag_versions(response_tags - tags.keys()))
+            entry = {
+                "data": response.data,
+                "headers": {
+                    name: response[name] for name in CACHED_HEADERS if name in response
+                },
+                "tags": tags,
+                "expires": time.time() + RESPONSE_CACHE_TIMEOUT,
+            }
+            cache.set(key, entry, RESPONSE_CACHE_TIMEOUT + RESPONSE_CACHE_STALE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+
+        return response
+
+    def build_entry(self, key: str, handler, request, *args, **kwargs) -> Response:
+        try:
+            # tags known upfront are read before the response is built, so
+            # a change that lands meanwhile leaves the entry stale
+            tags = get_tag_versions(self.get_membership_tags(request))
+            with primary_reads():
+                response = handler(request, *args, **kwargs)
+            return self.store_entry(key, request, response, tags)
+        finally:
+            cache.delete(f"{key}:lock")
+
+    def get_entry_response(self, request) -> tuple[str, Optional[Response], bool]:
+        """
+        The cache key of the request, the response to serve from the cache,
+        if any, and whether this request took the lock to rebuild the entry
+        """
+        key = self.get_response_cache_key(request)
+        entry = cache.get(key)
+        valid = self.is_valid(entry)
+        if valid and entry["expires"] > time.time():
+            record_cache_access(self.basename, hit=True)
+            return key, self.entry_response(request, entry, "HIT"), False
+
+        record_cache_access(self.basename, hit=False)
+        if cache.add(f"{key}:lock", True, RESPONSE_CACHE_LOCK_TIMEOUT):
+            return key, None, True
+        if valid:
+            return key, self.entry_response(request, entry, "STALE"), False
+        return key, None, False
+
+    def poll_entry(self, key: str) -> tuple[Optional[dict], bool]:
+        """The rebuilt entry, if ready, and whether to keep waiting for it"""
+        entry = cache.get(key)
+        if self.is_valid(entry) and entry["expires"] > time.time():
+            return entry, False
+        # the rebuild failed or was not cacheable without the lock
+        return None, f"{key}:lock" in cache
+
+    def wait_for_entry(self, key: str) -> Optional[dict]:
+        deadline = time.monotonic() + RESPONSE_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+            entry, waiting = self.poll_entry(key)
+            if not waiting:
+                return entry
+        return None
+
+    async def await_entry(self, key: str) -> Optional[dict]:
+        deadline = time.monotonic() + RESPONSE_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+            entry, waiting = await sync_to_async(self.poll_entry)(key)
+            if not waiting:
+                return entry
+        return None
+
+    def tagged_cached_response(self, handler, request, *args, **kwargs) -> Response:
+        if not self.is_response_cached(request):
+            return handler(request, *args, **kwargs)
+
+        key, response, rebuild = self.get_entry_response(request)
+        if response is not None:
+            return response
+        if rebuild:
+            return self.build_entry(key, handler, request, *args, **kwargs)
+
+        entry = self.wait_for_entry(key)
+        if entry is not None:
+            return self.entry_response(request, entry, "HIT")
+
+        response = handler(request, *args, **kwargs)
+        response["X-Cache"] = "MISS"
+        return response
+
+    async def atagged_cached_response(self, handler, request, *args, **kwargs):
+        """tagged_cached_response() around an async handler"""
+        if not self.is_response_cached(request):
+            return await handler(request, *args, **kwargs)
+
+        key, response, rebuild = await sync_to_async(self.get_entry_response)(request)
+        if response is not None:
+            return response
+        if rebuild:
+            try:
+                tags = await sync_to_async(get_tag_versions)(
+                    self.get_membership_tags(request)
+                )
+                with primary_reads():
+                    response = await handler(request, *args, **kwargs)
+                return await sync_to_async(self.store_entry)(
+                    key, request, response, tags
+                )
+            finally:
+                await sync_to_async(cache.delete)(f"{key}:lock")
+
+        entry = await self.await_entry(key)
+        if entry is not None:
+            return self.entry_response(request, entry, "HIT")
+
+        response = await handler(request, *args, **kwargs)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs) -> Response:
+        return self.tagged_cached_response(super().list, request, *args, **kwargs)
+
+
+class FlightResponseCacheMixin(TaggedResponseCacheMixin):
+    """
+    Caches flight lists and searches, tagged by their flights and by the
+    route they are filtered by, or all flights. Details are not cached,
+    their seat holds expire without any change to invalidate them. The
+    search action wraps itself in tagged_cached_response().
+    """
+
+    response_cache_actions = ("list", "search")
+
+    def get_membership_tags(self, request) -> set[str]:
+        route = request.query_params.get("route")
+        if self.action == "list" and route:
+            return {route_tag(int(route))}
+        return {ALL_FLIGHTS_TAG}
+
+    def get_response_tags(self, request, data) -> set[str]:
+        flights = data["results"] if isinstance(data, dict) else data
+        return {
+            *self.get_membership_tags(request),
+            *(flight_tag(flight["id"]) for flight in flights),
+        }
+
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+def flight_saved_or_deleted(sender, instance, **kwargs) -> None:
+    # an edit can move the flight into any list, by route or time
+    invalidate_tags(
+        [flight_tag(instance.pk), route_tag(instance.route_id), ALL_FLIGHTS_TAG]
+    )
+
+
+@receiver(seats_changed)
+def flight_seats_changed(sender, flight_seats, **kwargs) -> None:
+    invalidate_tags(flight_tag(flight_id) for flight_id in flight_seats)
+
+
+@receiver(m2m_changed, sender=Flight.crews.through)
+def flight_crews_changed(sender, instance, action, reverse, pk_set, **kwargs) -> None:
+    if not action.startswith("post_"):
+        return
+
+    if reverse and action == "post_clear":
+        # the flights of crew.flights.clear() are unknown by now
+        model_changed(Crew)
+        return
+
+    flight_ids = pk_set if reverse else {instance.pk}
+    invalidate_tags(flight_tag(flight_id) for flight_id in flight_ids or ())
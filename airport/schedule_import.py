@@ -0,0 +1,241 @@
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from airport.caching import model_changed
+from airport.itinerary import timetable
+from airport.load_factors import refresh_flight_days
+from airport.models import Airplane, Airport, Crew, Flight, Route
+from airport.response_cache import ALL_FLIGHTS_TAG, invalidate_tags, route_tag
+
+
+SCHEDULE_FIELDS = (
+    "source",
+    "destination",
+    "airplane",
+    "departure_time",
+    "arrival_time",
+)
+
+
+class ScheduleError(ValueError):
+    pass
+
+
+def read_schedule(path: Path) -> Iterator[dict]:
+    """
+    Rows of a CSV file with the SCHEDULE_FIELDS columns and `crews` as
+    full names separated by semicolons, of a JSON array, or of a JSON
+    lines file (.jsonl or .ndjson) of objects with the same keys and
+    `crews` as a list. CSV and JSON lines files are read as they go.
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        with open(path, newline="") as file:
+            for row in csv.DictReader(file):
+                crews = row.get("crews") or ""
+                names = (name.strip() for name in crews.split(";"))
+                row["crews"] = [name for name in names if name]
+                yield row
+    elif suffix in (".jsonl", ".ndjson"):
+        with open(path) as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    elif suffix == ".json":
+        with open(path) as file:
+            yield from json.load(file)
+    else:
+        raise ScheduleError(f"Unsupported schedule file {path.name}")
+
+
+def unique_keys(pairs: Iterable[tuple]) -> dict:
+    """Map of natural keys to ids, with None for ambiguous keys"""
+    ids = {}
+    for key, id_ in pairs:
+        ids[key] = None if key in ids else id_
+    return ids
+
+
+class NaturalKeys:
+    """
+    Ids of airports and airplanes by name, of crews by full name and of
+    routes by their airport names, loaded once for the whole import.
+    """
+
+    def __init__(self) -> None:
+        self.airports = unique_keys(Airport.objects.values_list("name", "id"))
+        self.routes = unique_keys(
+            ((source, destination), id_)
+            for id_, source, destination in Route.objects.values_list(
+                "id", "source_id", "destination_id"
+            )
+        )
+        self.airplanes = unique_keys(Airplane.objects.values_list("name", "id"))
+        self.crews = unique_keys(
+            (f"{first_name} {last_name}", id_)
+            for id_, first_name, last_name in Crew.objects.values_list(
+                "id", "first_name", "last_name"
+            )
+        )
+
+    @staticmethod
+    def resolve(ids: dict, key, kind: str) -> int:
+        if key not in ids:
+            raise ScheduleError(f"Unknown {kind} {key!r}")
+        if ids[key] is None:
+            raise ScheduleError(f"Ambiguous {kind} {key!r}")
+        return ids[key]
+
+    def route(self, source: str, destination: str) -> int:
+        key = (
+            self.resolve(self.airports, source, "airport"),
+            self.resolve(self.airports, destination, "airport"),
+        )
+        if key not in self.routes:
+            raise ScheduleError(f"Unknown route {source!r}-{destination!r}")
+        return self.routes[key]
+
+    def airplane(self, name: str) -> int:
+        return self.resolve(self.airplanes, name, "airplane")
+
+    def crew(self, full_name: str) -> int:
+        return self.resolve(self.crews, full_name, "crew member")
+
+
+def parse_time(value) -> datetime:
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ScheduleError(f"Invalid date and time {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    flights: int = 0
+    crew_assignments: int = 0
+    skipped: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+class ScheduleImporter:
+    """
+    Imports flights and their crews in chunks. Every chunk is one
+    transaction with a bulk_create of its flights and of their rows in
+    the Flight.crews through table. Flights that already exist, by
+    route, airplane and departure time, are skipped, so an interrupted
+    import resumes after its last committed chunk when run again.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 5000,
+        batch_size: int = 1000,
+        log: Callable[[str], None] = lambda message: None,
+    ) -> None:
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.log = log
+        self.keys = NaturalKeys()
+        self.result = ImportResult()
+
+    def build_flight(self, row: dict) -> tuple[Flight, list[int]]:
+        missing = [name for name in SCHEDULE_FIELDS if not row.get(name)]
+        if missing:
+            raise ScheduleError(f"Missing {', '.join(missing)}")
+
+        flight = Flight(
+            route_id=self.keys.route(row["source"], row["destination"]),
+            airplane_id=self.keys.airplane(row["airplane"]),
+            departure_time=parse_time(row["departure_time"]),
+            arrival_time=parse_time(row["arrival_time"]),
+        )
+        if flight.arrival_time <= flight.departure_time:
+            raise ScheduleError("arrival_time must be after departure_time")
+
+        return flight, [self.keys.crew(name) for name in row.get("crews") or []]
+
+    @staticmethod
+    def existing_flights(flights: list[Flight]) -> set[tuple]:
+        if not flights:
+            return set()
+        # a departure range keeps the query parameters few for any chunk size
+        departures = [flight.departure_time for flight in flights]
+        existing = Flight.objects.filter(
+            route_id__in={flight.route_id for flight in flights},
+            departure_time__range=(min(departures), max(departures)),
+        ).values_list("route_id", "airplane_id", "departure_time")
+        return set(existing)
+
+    def import_chunk(self, rows: list[tuple[int, dict]]) -> None:
+        flights = {}
+        valid = 0
+        for number, row in rows:
+            try:
+                flight, crew_ids = self.build_flight(row)
+            except ScheduleError as error:
+                self.result.errors.append(f"Row {number}: {error}")
+                continue
+            valid += 1
+            key = (flight.route_id, flight.airplane_id, flight.departure_time)
+            flights.setdefault(key, (flight, crew_ids))
+
+        with transaction.atomic():
+            existing = self.existing_flights([flight for flight, _ in flights.values()])
+            new = [value for key, value in flights.items() if key not in existing]
+            self.result.skipped += valid - len(new)
+
+            Flight.objects.bulk_create(
+                [flight for flight, _ in new], batch_size=self.batch_size
+            )
+            assignments = Flight.crews.through.objects.bulk_create(
+                [
+                    Flight.crews.through(flight_id=flight.id, crew_id=crew_id)
+                    for flight, crew_ids in new
+                    for crew_id in dict.fromkeys(crew_ids)
+                ],
+                batch_size=self.batch_size,
+            )
+
+            if new:
+                # bulk_create sends no signals, invalidate caches of flights
+                model_changed(Flight)
+                refresh_flight_days(flight for flight, _ in new)
+                invalidate_tags(
+                    [
+                        ALL_FLIGHTS_TAG,
+                        *{route_tag(flight.route_id) for flight, _ in new},
+                    ]
+                )
+                transaction.on_commit(timetable.invalidate)
+
+        self.result.flights += len(new)
+        self.result.crew_assignments += len(assignments)
+
+    def run(self, rows: Iterable[dict]) -> ImportResult:
+        start = time.perf_counter()
+        numbered = enumerate(rows, start=1)
+        while chunk := list(islice(numbered, self.chunk_size)):
+            self.import_chunk(chunk)
+            self.result.rows += len(chunk)
+
+            elapsed = time.perf_counter() - start
+            self.log(
+                f"Rows {chunk[0][0]}-{chunk[-1][0]}: {self.result.flights} flights "
+                f"and {self.result.crew_assignments} crew assignments imported, "
+                f"{self.result.rows / elapsed:.0f} rows/s"
+            )
+
+        return self.result
@@ -0,0 +1,249 @@
+import hashlib
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, QuerySet
+from django.db.models.signals import m2m_changed, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from config.db_router import primary_reads
+
+from airport.caching import get_versions, model_changed
+from airport.itinerary import timetable
+from airport.load_factors import refresh_flight_days
+from airport.models import Flight, FlightSchedule, SeatHold
+from airport.response_cache import (
+    ALL_FLIGHTS_TAG,
+    flight_tag,
+    invalidate_tags,
+    route_tag,
+)
+
+
+SCHEDULE_HORIZON_DAYS = getattr(settings, "SCHEDULE_HORIZON_DAYS", 60)
+SCHEDULE_CHECK_TIMEOUT = getattr(settings, "SCHEDULE_CHECK_TIMEOUT", 60 * 60)
+# changes of these fields move the departures of a schedule
+DEPARTURE_FIELDS = ("route_id", "airplane_id", "departure_time", "duration", "weekdays")
+
+
+def schedule_horizon() -> date:
+    return timezone.localdate() + timedelta(days=SCHEDULE_HORIZON_DAYS)
+
+
+def schedule_departures(
+    schedule: FlightSchedule, first: date, last: date
+) -> Iterator[tuple[datetime, datetime]]:
+    """Departure and arrival times of the schedule between two dates"""
+    day = first
+    while day <= last:
+        if str(day.isoweekday()) in schedule.weekdays:
+            departure = timezone.make_aware(
+                datetime.combine(day, schedule.departure_time)
+            )
+            yield departure, departure + schedule.duration
+        day += timedelta(days=1)
+
+
+def materialize_schedule(schedule: FlightSchedule, until: date) -> list[Flight]:
+    """
+    Create the flights of the schedule from the day after its
+    materialized_until (today at the earliest) to `until`. The days are
+    claimed by a conditional update of materialized_until, so processes
+    materializing the same schedule at once never create a flight twice.
+    """
+    first = max(schedule.valid_from, timezone.localdate())
+    if schedule.materialized_until is not None:
+        first = max(first, schedule.materialized_until + timedelta(days=1))
+    last = min(schedule.valid_until, until)
+    if first > last:
+        return []
+
+    with transaction.atomic():
+        claimed = FlightSchedule.objects.filter(
+            pk=schedule.pk, materialized_until=schedule.materialized_until
+        ).update(materialized_until=last)
+        if not claimed:
+            return []
+        schedule.materialized_until = last
+
+        departures = list(schedule_departures(schedule, first, last))
+        if not departures:
+            return []
+
+        # flights kept when the schedule changed, see reschedule()
+        existing = set(
+            schedule.flights.filter(
+                departure_time__range=(departures[0][0], departures[-1][0])
+            ).values_list("departure_time", flat=True)
+        )
+        flights = Flight.objects.bulk_create(
+            [
+                Flight(
+                    route_id=schedule.route_id,
+                    airplane_id=schedule.airplane_id,
+                    departure_time=departure,
+                    arrival_time=arrival,
+                    schedule=schedule,
+                )
+                for departure, arrival in departures
+                if departure not in existing
+            ]
+        )
+        Flight.crews.through.objects.bulk_create(
+            [
+                Flight.crews.through(flight_id=flight.id, crew_id=crew.id)
+                for flight in flights
+                for crew in schedule.crews.all()
+            ]
+        )
+
+        if flights:
+            # bulk_create sends no signals, invalidate caches of flights
+            model_changed(Flight)
+            refresh_flight_days(flights)
+            invalidate_tags([ALL_FLIGHTS_TAG, route_tag(schedule.route_id)])
+            transaction.on_commit(timetable.invalidate)
+
+    return flights
+
+
+def materialize(until: date, schedules: Optional[QuerySet] = None) -> int:
+    """Materialize the schedules up to a date, returns the flights created"""
+    if schedules is None:
+        schedules = FlightSchedule.objects.all()
+
+    pending = (
+        schedules.filter(valid_from__lte=until, valid_until__gte=timezone.localdate())
+        .filter(
+            Q(materialized_until__isnull=True)
+            | Q(materialized_until__lt=F("valid_until"))
+            & Q(materialized_until__lt=until)
+        )
+        .prefetch_related("crews")
+    )
+    return sum(len(materialize_schedule(schedule, until)) for schedule in pending)
+
+
+def ensure_materialized(until: Optional[date] = None, **filters) -> None:
+    """
+    Materialize the schedules before flights are read, at least up to the
+    rolling horizon. Later dates, from a search, are materialized for the
+    schedules matching the filters only. A cache entry per schedule
+    version and date skips the check for the next requests.
+    """
+    horizon = schedule_horizon()
+    if until is None or until <= horizon:
+        until, filters = horizon, {}
+
+    [version] = get_versions([FlightSchedule])
+    scope = repr((version, until, sorted(filters.items())))
+    key = "airport:schedules:materialized:" + hashlib.md5(scope.encode()).hexdigest()
+    if cache.get(key):
+        return
+
+    with primary_reads():
+        materialize(until, FlightSchedule.objects.filter(**filters))
+    cache.set(key, True, SCHEDULE_CHECK_TIMEOUT)
+
+
+def replaceable_flights(schedule: FlightSchedule) -> QuerySet:
+    """Upcoming flights of the schedule without tickets sold or seats held"""
+    return schedule.flights.filter(
+        departure_time__gte=timezone.now(), tickets_sold=0
+    ).exclude(Exists(SeatHold.objects.active().filter(flight=OuterRef("pk"))))
+
+
+def reschedule(schedule: FlightSchedule) -> None:
+    """
+    Remove the replaceable flights of a schedule whose departures changed,
+    or that is deleted, they are materialized again from the new schedule.
+    Flights with tickets sold or seats held keep their departures.
+    """
+    replaceable_flights(schedule).delete()
+    FlightSchedule.objects.filter(pk=schedule.pk).update(materialized_until=None)
+    schedule.materialized_until = None
+
+
+def revalidate(schedule: FlightSchedule, previous: FlightSchedule) -> None:
+    """
+    Follow a changed validity range: replaceable flights outside it are
+    removed, and days before the previous valid_from are materialized.
+    """
+    first = timezone.make_aware(datetime.combine(schedule.valid_from, time.min))
+    last = timezone.make_aware(
+        datetime.combine(schedule.valid_until + timedelta(days=1), time.min)
+    )
+    replaceable_flights(schedule).filter(
+        Q(departure_time__lt=first) | Q(departure_time__gte=last)
+    ).delete()
+
+    if schedule.valid_from < previous.valid_from:
+        # materialize_schedule() skips flights that exist already
+        FlightSchedule.objects.filter(pk=schedule.pk).update(materialized_until=None)
+        schedule.materialized_until = None
+
+
+def restaff(schedule: FlightSchedule) -> None:
+    """Give the upcoming flights of the schedule its current crews"""
+    flight_ids = list(
+        schedule.flights.filter(departure_time__gte=timezone.now()).values_list(
+            "pk", flat=True
+        )
+    )
+    if not flight_ids:
+        return
+
+    with transaction.atomic():
+        Flight.crews.through.objects.filter(flight_id__in=flight_ids).delete()
+        Flight.crews.through.objects.bulk_create(
+            [
+                Flight.crews.through(flight_id=flight_id, crew_id=crew.id)
+                for flight_id in flight_ids
+                for crew in schedule.crews.all()
+            ]
+        )
+        # bulk changes send no m2m_changed, invalidate caches of the flights
+        Flight.objects.filter(pk__in=flight_ids).update(updated_at=timezone.now())
+        model_changed(Flight)
+        invalidate_tags(flight_tag(flight_id) for flight_id in flight_ids)
+
+
+@receiver(pre_save, sender=FlightSchedule)
+def schedule_saving(sender, instance, **kwargs) -> None:
+    # the stored schedule, to tell which changes move its flights
+    if not instance._state.adding:
+        instance._previous = FlightSchedule.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=FlightSchedule)
+def schedule_saved(sender, instance, created, **kwargs) -> None:
+    previous = getattr(instance, "_previous", None)
+    if created or previous is None:
+        return
+
+    if any(
+        getattr(instance, field) != getattr(previous, field)
+        for field in DEPARTURE_FIELDS
+    ):
+        reschedule(instance)
+    elif (instance.valid_from, instance.valid_until) != (
+        previous.valid_from,
+        previous.valid_until,
+    ):
+        revalidate(instance, previous)
+
+
+@receiver(pre_delete, sender=FlightSchedule)
+def schedule_deleted(sender, instance, **kwargs) -> None:
+    reschedule(instance)
+
+
+@receiver(m2m_changed, sender=FlightSchedule.crews.through)
+def schedule_crews_changed(sender, instance, action, reverse, **kwargs) -> None:
+    if action.startswith("post_") and not reverse:
+        restaff(instance)
+        model_changed(FlightSchedule)
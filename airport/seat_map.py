@@ -0,0 +1,196 @@
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from config.db_router import primary_reads
+
+from airport.caching import get_key_versions, initial_version
+from airport.models import Flight, Ticket
+from airport.signals import seats_changed
+
+
+SEAT_MAP_CACHE_TIMEOUT = getattr(settings, "SEAT_MAP_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+class SeatMap:
+    """
+    Occupancy bitset of a flight. Seat (row, seat) is stored in bit
+    (row - 1) * seats_in_row + (seat - 1).
+    """
+
+    __slots__ = ("rows", "seats_in_row", "bits")
+
+    def __init__(self, rows: int, seats_in_row: int, bits: bytes = None) -> None:
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        if bits is None:
+            bits = bytes((rows * seats_in_row + 7) // 8)
+        self.bits = bytearray(bits)
+
+    def _index(self, row: int, seat: int) -> int:
+        if not (1 <= row <= self.rows and 1 <= seat <= self.seats_in_row):
+            raise IndexError(f"seat ({row}, {seat}) is outside of the airplane")
+        return (row - 1) * self.seats_in_row + seat - 1
+
+    def is_taken(self, row: int, seat: int) -> bool:
+        try:
+            index = self._index(row, seat)
+        except IndexError:
+            return False
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def take(self, row: int, seat: int) -> None:
+        index = self._index(row, seat)
+        self.bits[index >> 3] |= 1 << (index & 7)
+
+    def release(self, row: int, seat: int) -> None:
+        index = self._index(row, seat)
+        self.bits[index >> 3] &= ~(1 << (index & 7))
+
+    @property
+    def taken_count(self) -> int:
+        return bin(int.from_bytes(self.bits, "little")).count("1")
+
+    def taken_seats(self) -> Iterator[tuple[int, int]]:
+        for byte_index, byte in enumerate(self.bits):
+            while byte:
+                low_bit = byte & -byte
+                index = (byte_index << 3) + low_bit.bit_length() - 1
+                row, seat = divmod(index, self.seats_in_row)
+                yield row + 1, seat + 1
+                byte ^= low_bit
+
+    def to_cache(self) -> tuple[int, int, bytes]:
+        return self.rows, self.seats_in_row, bytes(self.bits)
+
+
+def seat_map_version_key(flight_id: int) -> str:
+    return f"airport:seat_map_version:{flight_id}"
+
+
+def seat_map_cache_key(flight_id: int, version: int) -> str:
+    return f"airport:seat_map:{flight_id}:{version}"
+
+
+def get_seat_maps(flights: Iterable[Flight]) -> dict[int, SeatMap]:
+    """
+    Return seat maps of the given flights (with airplanes loaded) by flight
+    id. Cached maps are read in two round trips, their versions and then
+    the maps, missing ones are built with a single query over Ticket.
+
+    A map is stored under the version read before the query, so a change
+    committed meanwhile, which bumps the version, orphans it instead of
+    being overwritten by it.
+    """
+    flights = list(flights)
+    versions = get_key_versions([seat_map_version_key(flight.id) for flight in flights])
+    keys = {
+        flight.id: seat_map_cache_key(
+            flight.id, versions[seat_map_version_key(flight.id)]
+        )
+        for flight in flights
+    }
+    cached = cache.get_many(keys.values())
+
+    seat_maps = {}
+    missing = {}
+    for flight in flights:
+        dimensions = (flight.airplane.rows, flight.airplane.seats_in_row)
+        value = cached.get(keys[flight.id])
+        if value is not None and value[:2] == dimensions:
+            seat_maps[flight.id] = SeatMap(*value)
+        else:
+            missing[flight.id] = SeatMap(*dimensions)
+
+    if missing:
+        with primary_reads():
+            tickets = list(
+                Ticket.objects.filter(flight_id__in=missing).values_list(
+                    "flight_id", "row", "seat"
+                )
+            )
+        for flight_id, row, seat in tickets:
+            missing[flight_id].take(row, seat)
+        cache.set_many(
+            {
+                keys[flight_id]: seat_map.to_cache()
+                for flight_id, seat_map in missing.items()
+            },
+            SEAT_MAP_CACHE_TIMEOUT,
+        )
+        seat_maps.update(missing)
+
+    return seat_maps
+
+
+def get_seat_map(flight: Flight) -> SeatMap:
+    return get_seat_maps([flight])[flight.id]
+
+
+def bump_seat_map_version(flight_id: int) -> Optional[int]:
+    """Atomically move the map of a flight to a new version, if it has one"""
+    key = seat_map_version_key(flight_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, initial_version(), None)
+        return None
+
+
+def update_seat_map(flight_id: int, seats: list, taken: bool) -> None:
+    """
+    Apply committed seat changes to the cached map. The version is bumped
+    whatever happens; the changed map is stored under the new version only
+    if no other change bumped it since the map was read, otherwise the map
+    is rebuilt on the next read. So concurrent changes are never lost.
+    """
+    version_key = seat_map_version_key(flight_id)
+    version = get_key_versions([version_key])[version_key]
+    value = cache.get(seat_map_cache_key(flight_id, version))
+    new_version = bump_seat_map_version(flight_id)
+    if value is None or new_version != version + 1:
+        return
+
+    seat_map = SeatMap(*value)
+    try:
+        for row, seat in seats:
+            if taken:
+                seat_map.take(row, seat)
+            else:
+                seat_map.release(row, seat)
+    except IndexError:
+        return
+    cache.add(
+        seat_map_cache_key(flight_id, new_version),
+        seat_map.to_cache(),
+        SEAT_MAP_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_seat_map(flight_id: int) -> None:
+    bump_seat_map_version(flight_id)
+
+
+@receiver(seats_changed)
+def seats_changed_handler(sender, flight_seats, taken, **kwargs) -> None:
+    def update() -> None:
+        for flight_id, seats in flight_seats.items():
+            update_seat_map(flight_id, seats, taken)
+
+    transaction.on_commit(update)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_updated(sender, instance, created, **kwargs) -> None:
+    if not created:
+        # the previous seat is unknown here, so rebuild the map from scratch
+        transaction.on_commit(lambda: invalidate_seat_map(instance.flight_id))
+
+
+@receiver(post_save, sender=Flight)
+def flight_saved(sender, instance, **kwargs) -> None:
+    invalidate_seat_map(instance.id)
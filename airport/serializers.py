@@ -1,7 +1,22 @@
+import operator
+from datetime import timedelta
+from functools import reduce
+from typing import Optional
+
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueTogetherValidator
-from django.db import transaction
-
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
+
+from airport.autocomplete import AUTOCOMPLETE_LIMIT
+from airport.exceptions import SeatsTaken
+from airport.load_factors import last_quarter
+from airport.manifest import MANIFEST_OUTPUTS
 from airport.models import (
     Airplane,
     AirplaneType,
@@ -9,11 +24,20 @@ from airport.models import (
     Country,
     Crew,
     Flight,
+    FlightSchedule,
     Order,
     Role,
     Route,
+    SeatHold,
     Ticket,
 )
+from airport.seat_map import get_seat_map, get_seat_maps, invalidate_seat_map
+
+
+SEAT_HOLD_DURATION = getattr(settings, "SEAT_HOLD_DURATION", timedelta(minutes=10))
+# active holds of a user, so nobody can block every seat of a flight
+SEAT_HOLD_MAX_PER_USER = getattr(settings, "SEAT_HOLD_MAX_PER_USER", 10)
+ORDER_CREATE_RETRIES = getattr(settings, "ORDER_CREATE_RETRIES", 3)
 
 
 class RoleSerializer(serializers.ModelSerializer):
@@ -89,9 +113,142 @@ class AirplaneListSerializer(AirplaneSerializer):
     )
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class FlightField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves a flight from the batch preloaded by FlightSeatsListSerializer,
+    falling back to a single lookup when used outside of a list.
+    """
+
+    def to_internal_value(self, data) -> Flight:
+        flights = getattr(self.parent.parent, "flights", None)
+        if flights is not None:
+            try:
+                return flights[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+class FlightSeatsListSerializer(serializers.ListSerializer):
+    """
+    Validates a batch of seats with a constant number of queries: one
+    query for all referenced flights (with their airplanes) and one for
+    active seat holds, while sold seats are read from the cached seat maps
+    of those flights.
+    """
+
+    flights = None
+    # whether seats held by the requesting user may be taken
+    own_holds_available = True
+
+    def to_internal_value(self, data) -> list:
+        if isinstance(data, list):
+            flight_ids = set()
+            for item in data:
+                try:
+                    flight_ids.add(int(item["flight"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            self.flights = Flight.objects.select_related("airplane").in_bulk(flight_ids)
+
+        seats = super().to_internal_value(data)
+        self.validate_seats_available(seats)
+
+        return seats
+
+    def get_user_id(self) -> Optional[int]:
+        request = self.context.get("request")
+        if request and request.user.is_authenticated:
+            return request.user.id
+        return None
+
+    def get_held_seats(self) -> dict[tuple[int, int, int], int]:
+        """Users holding the seats of the flights, by (flight id, row, seat)"""
+        holds = SeatHold.objects.active().filter(flight_id__in=self.flights)
+        user_id = self.get_user_id()
+        if self.own_holds_available and user_id is not None:
+            holds = holds.exclude(user_id=user_id)
+
+        return {
+            (flight_id, row, seat): user_id
+            for flight_id, row, seat, user_id in holds.values_list(
+                "flight_id", "row", "seat", "user_id"
+            )
+        }
+
+    def validate_seats_available(self, seats: list) -> None:
+        requested = [(item["flight"].id, item["row"], item["seat"]) for item in seats]
+        seat_maps = get_seat_maps(self.flights.values())
+        held = self.get_held_seats()
+        user_id = self.get_user_id()
+
+        errors = []
+        seen = set()
+        for key in requested:
+            flight_id, row, seat = key
+            if key in seen or seat_maps[flight_id].is_taken(row, seat):
+                message = UniqueTogetherValidator.message.format(
+                    field_names="row, seat, flight"
+                )
+            elif key in held and held[key] == user_id:
+                message = "You already hold this seat."
+            elif key in held:
+                message = "This seat is held by another customer."
+            else:
+                message = None
+            errors.append(
+                {api_settings.NON_FIELD_ERRORS_KEY: [message]} if message else {}
+            )
+            seen.add(key)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+
+class TicketListSerializer(FlightSeatsListSerializer):
+    pass
+
+
+class SeatHoldListSerializer(FlightSeatsListSerializer):
+    own_holds_available = False
+
+    def validate(self, attrs: list) -> list:
+        held = SeatHold.objects.active().filter(user_id=self.get_user_id()).count()
+        if held + len(attrs) > SEAT_HOLD_MAX_PER_USER:
+            raise serializers.ValidationError(
+                f"You can hold at most {SEAT_HOLD_MAX_PER_USER} seats at a time, "
+                f"you already hold {held}."
+            )
+        return attrs
+
+    def create(self, validated_data) -> list[SeatHold]:
+        expires_at = timezone.now() + SEAT_HOLD_DURATION
+        try:
+            with transaction.atomic():
+                # expired holds stay in the table until purged, free their seats
+                SeatHold.objects.expired().filter(
+                    reduce(
+                        operator.or_,
+                        (
+                            Q(flight=hold["flight"], row=hold["row"], seat=hold["seat"])
+                            for hold in validated_data
+                        ),
+                    )
+                ).delete()
+                return SeatHold.objects.bulk_create(
+                    [SeatHold(expires_at=expires_at, **hold) for hold in validated_data]
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                "Some of the seats have just been held by another customer."
+            )
+
+
+class FlightSeatSerializer(serializers.ModelSerializer):
+    flight = FlightField(queryset=Flight.objects.select_related("airplane"))
+
     def validate(self, attrs):
-        data = super(TicketSerializer, self).validate(attrs)
+        data = super(FlightSeatSerializer, self).validate(attrs)
         Ticket.validate_row(
             attrs["row"], attrs["flight"].airplane.rows, serializers.ValidationError
         )
@@ -103,9 +260,36 @@ class TicketSerializer(serializers.ModelSerializer):
 
         return data
 
+
+class SeatHoldSerializer(FlightSeatSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ["id", "row", "seat", "flight", "expires_at"]
+        read_only_fields = ["expires_at"]
+        list_serializer_class = SeatHoldListSerializer
+        # availability is checked for the whole batch by SeatHoldListSerializer
+        validators = []
+
+
+class SeatHoldConfirmSerializer(serializers.Serializer):
+    holds = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        help_text="Ids of the holds to confirm, all active holds by default",
+    )
+
+
+class TicketSerializer(FlightSeatSerializer):
+    def get_validators(self) -> list:
+        if isinstance(self.parent, TicketListSerializer):
+            # uniqueness is checked for the whole batch by TicketListSerializer
+            return []
+        return super(TicketSerializer, self).get_validators()
+
     class Meta:
         model = Ticket
         fields = ["id", "row", "seat", "flight"]
+        list_serializer_class = TicketListSerializer
         validators = [
             UniqueTogetherValidator(
                 queryset=Ticket.objects.all(), fields=["row", "seat", "flight"]
@@ -125,6 +309,45 @@ class FlightSerializer(serializers.ModelSerializer):
         fields = ["id", "route", "airplane", "departure_time", "arrival_time", "crews"]
 
 
+class FlightScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FlightSchedule
+        fields = [
+            "id",
+            "route",
+            "airplane",
+            "departure_time",
+            "duration",
+            "weekdays",
+            "valid_from",
+            "valid_until",
+            "crews",
+            "materialized_until",
+        ]
+        read_only_fields = ["materialized_until"]
+
+    def validate_weekdays(self, value: str) -> str:
+        if not value or set(value) - set("1234567"):
+            raise serializers.ValidationError(
+                "Use the digits 1 (Monday) to 7 (Sunday), e.g. 135 for Mon/Wed/Fri"
+            )
+        return "".join(sorted(set(value)))
+
+    def validate(self, attrs):
+        valid_from = attrs.get("valid_from", getattr(self.instance, "valid_from", None))
+        valid_until = attrs.get(
+            "valid_until", getattr(self.instance, "valid_until", None)
+        )
+        if valid_from and valid_until and valid_from > valid_until:
+            raise serializers.ValidationError(
+                {"valid_until": "valid_until must not be before valid_from"}
+            )
+        duration = attrs.get("duration")
+        if duration is not None and duration <= timedelta(0):
+            raise serializers.ValidationError({"duration": "duration must be positive"})
+        return attrs
+
+
 class FlightInfoSerializer(serializers.ModelSerializer):
     route = serializers.SlugRelatedField(
         many=False, read_only=True, slug_field="route_name"
@@ -141,8 +364,8 @@ class FlightInfoSerializer(serializers.ModelSerializer):
 class FlightRetrieveSerializer(serializers.ModelSerializer):
     route = RouteListSerializer(many=False, read_only=True)
     airplane = AirplaneSerializer(many=False, read_only=True)
-    crews = CrewListSerializer(many=True, read_only=True)
-    taken_seats = TicketSeatsSerializer(source="tickets", many=True, read_only=True)
+    crews = serializers.SerializerMethodField()
+    taken_seats = serializers.SerializerMethodField()
 
     class Meta:
         model = Flight
@@ -156,6 +379,29 @@ class FlightRetrieveSerializer(serializers.ModelSerializer):
             "taken_seats",
         ]
 
+    @extend_schema_field(CrewListSerializer(many=True))
+    def get_crews(self, flight: Flight) -> list[dict]:
+        if not hasattr(flight, "crew_members"):
+            return CrewListSerializer(flight.crews.all(), many=True).data
+
+        # the database may reorder keys of JSON objects
+        return [
+            {
+                "id": member["id"],
+                "full_name": member["full_name"],
+                "role": member["role"],
+            }
+            for member in flight.crew_members or []
+        ]
+
+    @extend_schema_field(TicketSeatsSerializer(many=True))
+    def get_taken_seats(self, flight: Flight) -> list[dict]:
+        # seats held by customers can not be bought either
+        seats = set(get_seat_map(flight).taken_seats())
+        seats.update(flight.seat_holds.active().values_list("row", "seat"))
+
+        return [{"row": row, "seat": seat} for row, seat in sorted(seats)]
+
 
 class FlightListSerializer(serializers.ModelSerializer):
     route = serializers.SlugRelatedField(
@@ -164,8 +410,8 @@ class FlightListSerializer(serializers.ModelSerializer):
     airplane = serializers.SlugRelatedField(
         many=False, read_only=True, slug_field="name"
     )
-    crews = serializers.StringRelatedField(many=True, read_only=True)
-    tickets_available = serializers.IntegerField(read_only=True)
+    crews = serializers.SerializerMethodField()
+    tickets_available = serializers.SerializerMethodField()
 
     class Meta:
         model = Flight
@@ -179,6 +425,173 @@ class FlightListSerializer(serializers.ModelSerializer):
             "tickets_available",
         ]
 
+    @extend_schema_field(serializers.ListField(child=serializers.CharField()))
+    def get_crews(self, flight: Flight) -> list[str]:
+        if not hasattr(flight, "crew_names"):
+            return [str(crew) for crew in flight.crews.all()]
+
+        return flight.crew_names or []
+
+    @extend_schema_field(OpenApiTypes.INT)
+    def get_tickets_available(self, flight: Flight) -> int:
+        return flight.capacity - flight.tickets_sold
+
+
+class FlightSearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField(required=False, help_text="Source airport id")
+    destination = serializers.IntegerField(
+        required=False, help_text="Destination airport id"
+    )
+    source_country = serializers.IntegerField(
+        required=False, help_text="Source country id"
+    )
+    destination_country = serializers.IntegerField(
+        required=False, help_text="Destination country id"
+    )
+    source_city = serializers.CharField(
+        required=False, help_text="Closest big city of the source airport"
+    )
+    destination_city = serializers.CharField(
+        required=False, help_text="Closest big city of the destination airport"
+    )
+    departure_from = serializers.DateField(
+        required=False, help_text="First departure date, today by default"
+    )
+    departure_to = serializers.DateField(
+        required=False, help_text="Last departure date (inclusive)"
+    )
+
+    def validate(self, attrs):
+        departure_from = attrs.get("departure_from")
+        departure_to = attrs.get("departure_to")
+        if departure_from and departure_to and departure_from > departure_to:
+            raise serializers.ValidationError(
+                {"departure_to": "departure_to must not be before departure_from"}
+            )
+
+        return attrs
+
+
+class ManifestSerializer(serializers.Serializer):
+    flight = serializers.IntegerField(required=False, help_text="Flight id")
+    departure_from = serializers.DateField(
+        required=False, help_text="First departure date"
+    )
+    departure_to = serializers.DateField(
+        required=False, help_text="Last departure date (inclusive)"
+    )
+    output = serializers.ChoiceField(
+        choices=list(MANIFEST_OUTPUTS), default="csv", help_text="Export format"
+    )
+
+    def validate(self, attrs):
+        departure_from = attrs.get("departure_from")
+        departure_to = attrs.get("departure_to")
+        if "flight" not in attrs and not (departure_from and departure_to):
+            raise serializers.ValidationError(
+                "Set a flight or both departure_from and departure_to"
+            )
+        if departure_from and departure_to and departure_from > departure_to:
+            raise serializers.ValidationError(
+                {"departure_to": "departure_to must not be before departure_from"}
+            )
+
+        return attrs
+
+
+class LoadFactorSearchSerializer(serializers.Serializer):
+    departure_from = serializers.DateField(
+        required=False, help_text="First departure date, last quarter by default"
+    )
+    departure_to = serializers.DateField(
+        required=False, help_text="Last departure date (inclusive)"
+    )
+    route = serializers.IntegerField(required=False, help_text="Route id")
+
+    def validate(self, attrs):
+        default_from, default_to = last_quarter(timezone.localdate())
+        attrs.setdefault("departure_from", default_from)
+        attrs.setdefault("departure_to", default_to)
+        if attrs["departure_from"] > attrs["departure_to"]:
+            raise serializers.ValidationError(
+                {"departure_to": "departure_to must not be before departure_from"}
+            )
+
+        return attrs
+
+
+class LoadFactorSerializer(serializers.Serializer):
+    route = serializers.IntegerField()
+    route_name = serializers.CharField()
+    flights = serializers.IntegerField()
+    seats_sold = serializers.IntegerField()
+    capacity = serializers.IntegerField()
+    load_factor = serializers.FloatField(
+        allow_null=True, help_text="Seats sold per seat flown"
+    )
+
+
+class CacheStatsSerializer(serializers.Serializer):
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    hit_ratio = serializers.FloatField(
+        allow_null=True, help_text="Hits per lookup, null before the first one"
+    )
+
+
+class ItinerarySearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField(help_text="Source airport id")
+    destination = serializers.IntegerField(help_text="Destination airport id")
+    departure_from = serializers.DateTimeField(
+        required=False, help_text="Earliest departure, now by default"
+    )
+    max_legs = serializers.IntegerField(
+        min_value=1, max_value=4, default=3, help_text="Maximum number of flights"
+    )
+    min_connection = serializers.IntegerField(
+        min_value=0,
+        default=60,
+        help_text="Minimum connection time between flights in minutes",
+    )
+    seats = serializers.IntegerField(
+        min_value=1, default=1, help_text="Number of seats needed on every flight"
+    )
+
+
+class ItineraryLegSerializer(serializers.Serializer):
+    flight = serializers.IntegerField(source="flight_id")
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    tickets_available = serializers.IntegerField()
+
+
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    legs = ItineraryLegSerializer(many=True)
+
+
+class AutocompleteSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(
+        help_text="Start of a word of an airport name, its city or a country name"
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=50,
+        default=AUTOCOMPLETE_LIMIT,
+        help_text="Maximum number of results",
+    )
+
+
+class AutocompleteResultSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=["airport", "country"])
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    closest_big_city = serializers.CharField(required=False, help_text="Airports only")
+    country = serializers.CharField(required=False, help_text="Airports only")
+
 
 class TicketInfoSerializer(TicketSerializer):
     flight = FlightInfoSerializer(many=False, read_only=True)
@@ -192,14 +605,77 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ["id", "created_at", "tickets"]
 
     def create(self, validated_data) -> Order:
+        """
+        Seats are checked against the seat maps during validation, but a
+        concurrent order can still sell them before the insert. The unique
+        constraint on tickets catches that: seats that really were sold
+        make a 409 listing them, other integrity errors would fail again
+        and are raised. Lock timeouts and deadlocks are retried at once.
+        Inside an outer transaction, such as confirming seat holds, a
+        failed attempt may have broken it, so nothing is retried there.
+        """
+        tickets_data = validated_data.pop("tickets")
+        retries = (
+            0 if transaction.get_connection().in_atomic_block else ORDER_CREATE_RETRIES
+        )
+
+        for attempt in range(retries + 1):
+            try:
+                return self.create_order(validated_data, tickets_data)
+            except IntegrityError:
+                taken = self.get_taken_seats(tickets_data)
+                if taken:
+                    # the seat maps missed them, rebuild on the next read
+                    for flight_id in {seat["flight"] for seat in taken}:
+                        invalidate_seat_map(flight_id)
+                    raise SeatsTaken(taken)
+                raise
+            except OperationalError:
+                # a lock timeout, deadlock or serialization failure
+                if attempt == retries:
+                    raise
+
+    @staticmethod
+    def create_order(validated_data: dict, tickets_data: list) -> Order:
         with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
             order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+            # rows and seats were validated by TicketSerializer, so the
+            # per-instance full_clean() of Ticket.save() can be skipped
+            Ticket.objects.bulk_create(
+                [Ticket(order=order, **ticket_data) for ticket_data in tickets_data]
+            )
 
             return order
 
+    @staticmethod
+    def get_taken_seats(tickets_data: list) -> list[dict]:
+        return list(
+            Ticket.objects.filter(
+                reduce(
+                    operator.or_,
+                    (
+                        Q(
+                            flight=ticket["flight"],
+                            row=ticket["row"],
+                            seat=ticket["seat"],
+                        )
+                        for ticket in tickets_data
+                    ),
+                )
+            )
+            .order_by("flight_id", "row", "seat")
+            .values("flight", "row", "seat")
+        )
+
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketInfoSerializer(many=True, read_only=True)
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    ticket_count = serializers.IntegerField(read_only=True)
+    flight_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ["id", "created_at", "ticket_count", "flight_count"]
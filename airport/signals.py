@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+
+# Sent whenever seats are sold or released, once for a bulk ticket insert
+# that bypasses post_save. Arguments: flight_seats (the changed seats as
+# lists of (row, seat) tuples by flight id) and taken (True for sold, False
+# for released).
+seats_changed = Signal()
+
+
+@receiver(post_save, sender="airport.Ticket")
+def ticket_saved(sender, instance, created, **kwargs) -> None:
+    if created:
+        seats_changed.send(
+            sender=sender,
+            flight_seats={instance.flight_id: [(instance.row, instance.seat)]},
+            taken=True,
+        )
+
+
+@receiver(post_delete, sender="airport.Ticket")
+def ticket_deleted(sender, instance, **kwargs) -> None:
+    seats_changed.send(
+        sender=sender,
+        flight_seats={instance.flight_id: [(instance.row, instance.seat)]},
+        taken=False,
+    )
@@ -0,0 +1,189 @@
+from datetime import datetime, timezone
+from inspect import iscoroutinefunction
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.async_views import (
+    AsyncAirportView,
+    AsyncFlightView,
+    AsyncOrderView,
+    AsyncRouteView,
+)
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Crew,
+    Flight,
+    Order,
+    Role,
+    Route,
+    SeatHold,
+    Ticket,
+)
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com", "Testpassword123@"
+        )
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        ukraine = Country.objects.create(name="Ukraine")
+        poland = Country.objects.create(name="Poland")
+        kyiv = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=ukraine
+        )
+        warsaw = Airport.objects.create(
+            name="Chopin", closest_big_city="Warsaw", country=poland
+        )
+        self.route = Route.objects.create(source=kyiv, destination=warsaw, distance=800)
+        Route.objects.create(source=warsaw, destination=kyiv, distance=800)
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=airplane,
+            departure_time=datetime(2023, 8, 30, 12, 30, tzinfo=timezone.utc),
+            arrival_time=datetime(2023, 8, 30, 13, 30, tzinfo=timezone.utc),
+        )
+        self.flight.crews.add(
+            Crew.objects.create(
+                first_name="Anna",
+                last_name="Koval",
+                role=Role.objects.create(name="pilot"),
+            )
+        )
+        self.order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=2, flight=self.flight, order=self.order)
+        SeatHold.objects.create(
+            row=3,
+            seat=4,
+            flight=self.flight,
+            user=self.user,
+            expires_at=datetime(2100, 1, 1, tzinfo=timezone.utc),
+        )
+
+    def assertSameAsViewSet(self, name: str, *args, params: dict = None) -> None:
+        sync_res = self.client.get(reverse(f"airport:{name}", args=args), params)
+        async_res = self.client.get(reverse(f"async-airport:{name}", args=args), params)
+
+        self.assertEqual(async_res.status_code, sync_res.status_code)
+        # pagination links point at the async routes
+        self.assertEqual(
+            async_res.content.replace(b"/api/async/airport/", b"/api/airport/"),
+            sync_res.content,
+        )
+
+    def test_airports(self) -> None:
+        self.assertSameAsViewSet("airport-list")
+        self.assertSameAsViewSet("airport-list", params={"limit": 1, "offset": 1})
+        self.assertSameAsViewSet("airport-detail", self.route.source_id)
+
+    def test_routes(self) -> None:
+        self.assertSameAsViewSet("route-list")
+        self.assertSameAsViewSet("route-detail", self.route.id)
+
+    def test_flights(self) -> None:
+        self.assertSameAsViewSet("flight-list")
+        self.assertSameAsViewSet("flight-list", params={"route": self.route.id})
+        self.assertSameAsViewSet("flight-detail", self.flight.id)
+        with override_settings(AIRPORT_FAST_LIST=False):
+            self.assertSameAsViewSet("flight-list", params={"limit": 1})
+
+    def test_orders(self) -> None:
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+        self.assertSameAsViewSet("order-list")
+        self.assertSameAsViewSet("order-detail", self.order.id)
+
+    def test_orders_of_other_users_are_not_found(self) -> None:
+        other_user = get_user_model().objects.create_user(
+            "other@user.com", "Testpassword123@"
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(other_user)}"
+        )
+
+        self.assertSameAsViewSet("order-detail", self.order.id)
+        res = self.client.get(reverse("async-airport:order-list"))
+        self.assertEqual(res.json()["results"], [])
+
+    def test_orders_require_authentication(self) -> None:
+        res = self.client.get(reverse("async-airport:order-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(res["WWW-Authenticate"], 'Bearer realm="api"')
+
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+        self.assertSameAsViewSet("order-list")
+
+    def test_missing_flight(self) -> None:
+        self.assertSameAsViewSet("flight-detail", self.flight.id + 1)
+
+    def test_only_reads_are_allowed(self) -> None:
+        res = self.client.post(reverse("async-airport:flight-list"), {})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=True)
+    async def test_served_by_asgi_handler(self) -> None:
+        res = await self.async_client.get(
+            reverse("async-airport:flight-detail", args=[self.flight.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json()["taken_seats"], [{"row": 1, "seat": 2}, {"row": 3, "seat": 4}]
+        )
+        # ETag, flight with crews, seat map tickets and seat holds
+        self.assertIn('desc="4 queries"', res["Server-Timing"])
+
+    def test_cache_layers_of_the_viewsets(self) -> None:
+        airports_url = reverse("async-airport:airport-list")
+        flight_url = reverse("async-airport:flight-detail", args=[self.flight.id])
+
+        first = self.client.get(airports_url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(airports_url)
+        flight = self.client.get(flight_url)
+        not_modified = self.client.get(flight_url, HTTP_IF_NONE_MATCH=flight["ETag"])
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(cached.content, first.content)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cache_layers_await_the_rows(self) -> None:
+        # a layer in a thread would hold it while the rows are read
+        for view in (AsyncAirportView, AsyncRouteView, AsyncFlightView, AsyncOrderView):
+            for layer in view.cache_layers:
+                self.assertTrue(
+                    iscoroutinefunction(getattr(view.viewset_class, layer)), layer
+                )
+
+    def test_anonymous_flight_lists_are_cached_by_tags(self) -> None:
+        url = reverse("async-airport:flight-list")
+        self.client.get(url)
+
+        cached = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(row=5, seat=5, flight=self.flight, order=self.order)
+        changed = self.client.get(url)
+
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(changed["X-Cache"], "MISS")
+        self.assertEqual(changed.json()["results"][0]["tickets_available"], 58)
@@ -0,0 +1,128 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.caching import bump_version
+from airport.models import Airport, Country
+
+
+AUTOCOMPLETE_URL = reverse("airport:airport-autocomplete")
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+        self.ukraine = Country.objects.create(name="Ukraine")
+        self.poland = Country.objects.create(name="Poland")
+        self.boryspil = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=self.ukraine
+        )
+        self.zhuliany = Airport.objects.create(
+            name="Kyiv Zhuliany", closest_big_city="Kyiv", country=self.ukraine
+        )
+        self.lviv = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=self.ukraine
+        )
+        self.krakow = Airport.objects.create(
+            name="John Paul II", closest_big_city="Kraków", country=self.poland
+        )
+
+    def search(self, q: str, **params) -> list[tuple[str, int]]:
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": q, **params})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [(result["type"], result["id"]) for result in res.data]
+
+    def test_ranks_names_before_cities_and_countries(self) -> None:
+        self.assertEqual(
+            self.search("ky"),
+            [
+                ("airport", self.zhuliany.id),
+                ("airport", self.boryspil.id),
+            ],
+        )
+        self.assertEqual(self.search("u"), [("country", self.ukraine.id)])
+
+    def test_matches_later_words_case_and_accent_insensitive(self) -> None:
+        self.assertEqual(self.search("HALYT"), [("airport", self.lviv.id)])
+        self.assertEqual(self.search("krako"), [("airport", self.krakow.id)])
+        self.assertEqual(self.search("zhul"), [("airport", self.zhuliany.id)])
+
+    def test_result_fields_and_limit(self) -> None:
+        # exact city matches rank above the longer name, then by name
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "kyiv", "limit": 1})
+
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "type": "airport",
+                    "id": self.boryspil.id,
+                    "name": "Boryspil",
+                    "closest_big_city": "Kyiv",
+                    "country": "Ukraine",
+                }
+            ],
+        )
+
+    def test_keystrokes_do_not_query_database(self) -> None:
+        self.search("b")
+
+        with self.assertNumQueries(0):
+            for prefix in ("bo", "bor", "bory"):
+                self.assertEqual(self.search(prefix), [("airport", self.boryspil.id)])
+
+    def test_index_follows_changes(self) -> None:
+        self.search("b")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            odesa = Airport.objects.create(
+                name="Odesa International",
+                closest_big_city="Odesa",
+                country=self.ukraine,
+            )
+            self.boryspil.delete()
+
+        # updated in place, not reloaded
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search("odes"), [("airport", odesa.id)])
+            self.assertEqual(self.search("bor"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.poland.name = "Polska"
+            self.poland.save()
+
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "john"})
+        self.assertEqual(res.data[0]["country"], "Polska")
+
+    def test_changes_of_other_processes_reload_index(self) -> None:
+        self.search("b")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.create(
+                name="Odesa International",
+                closest_big_city="Odesa",
+                country=self.ukraine,
+            )
+            # an airport created by another process meanwhile
+            Airport.objects.bulk_create(
+                [
+                    Airport(
+                        name="Bukovel",
+                        closest_big_city="Ivano-Frankivsk",
+                        country=self.ukraine,
+                    )
+                ]
+            )
+            bump_version(Airport)
+
+        self.assertEqual(len(self.search("bu")), 1)
+
+    def test_query_is_required(self) -> None:
+        res = self.client.get(AUTOCOMPLETE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from airport.benchmarks import (
+    Benchmark,
+    find_regressions,
+    get_endpoints,
+    load_baseline,
+    seed,
+)
+from airport.urls import router
+
+
+class EndpointQueryBudgetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        seed(scale=0.0005, random_seed=1)
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_every_router_endpoint_is_benchmarked(self) -> None:
+        names = {endpoint.name for endpoint in get_endpoints()}
+
+        for prefix, viewset, basename in router.registry:
+            self.assertIn(f"{basename}-list", names)
+
+    def test_endpoints_stay_within_query_budget(self) -> None:
+        results = Benchmark(iterations=2).run(get_endpoints())
+
+        self.assertEqual(find_regressions(results, load_baseline()), [])
+
+    def test_query_budget_regression_is_reported(self) -> None:
+        results = {"flight-list": {"queries": 6, "p95_ms": 10.0}}
+        baseline = {"flight-list": {"queries": 5, "p95_ms": 5.0}}
+
+        self.assertEqual(
+            find_regressions(results, baseline),
+            ["flight-list: 6 queries, budget is 5"],
+        )
+        self.assertEqual(
+            find_regressions(results, baseline, tolerance=0.5),
+            [
+                "flight-list: 6 queries, budget is 5",
+                "flight-list: p95 10.0 ms, baseline is 5.0 ms",
+            ],
+        )
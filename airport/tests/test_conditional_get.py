@@ -0,0 +1,201 @@
+from datetime import datetime, timezone
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Crew,
+    Flight,
+    Order,
+    Role,
+    Route,
+    Ticket,
+)
+
+
+AIRPORTS_URL = reverse("airport:airport-list")
+FLIGHTS_URL = reverse("airport:flight-list")
+SEARCH_URL = reverse("airport:flight-search")
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com", "Testpassword123@"
+        )
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        self.country = Country.objects.create(name="Ukraine")
+        self.airport = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=self.country
+        )
+        destination = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=self.country
+        )
+        route = Route.objects.create(
+            source=self.airport, destination=destination, distance=500
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=datetime(2023, 8, 30, 12, 30, tzinfo=timezone.utc),
+            arrival_time=datetime(2023, 8, 30, 13, 30, tzinfo=timezone.utc),
+        )
+        self.crew = Crew.objects.create(
+            first_name="Anna",
+            last_name="Kovalenko",
+            role=Role.objects.create(name="pilot"),
+        )
+        self.flight.crews.add(self.crew)
+        self.flight_url = reverse("airport:flight-detail", args=[self.flight.id])
+
+    def test_unchanged_reference_data_is_not_modified(self) -> None:
+        res = self.client.get(AIRPORTS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(AIRPORTS_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["ETag"], res["ETag"])
+        self.assertEqual(not_modified.content, b"")
+
+    def test_change_of_dependency_changes_etag(self) -> None:
+        res = self.client.get(AIRPORTS_URL)
+
+        self.country.name = "Ukraina"
+        self.country.save()
+        changed = self.client.get(AIRPORTS_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed["ETag"], res["ETag"])
+
+    def test_reference_data_if_modified_since(self) -> None:
+        res = self.client.get(AIRPORTS_URL)
+
+        not_modified = self.client.get(
+            AIRPORTS_URL, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+        )
+        modified = self.client.get(
+            AIRPORTS_URL, HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2001 00:00:00 GMT"
+        )
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+
+    def test_unchanged_flight_is_not_modified(self) -> None:
+        res = self.client.get(self.flight_url)
+
+        # only the ETag query runs, nothing is serialized
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(
+                self.flight_url, HTTP_IF_NONE_MATCH=res["ETag"]
+            )
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["Last-Modified"], res["Last-Modified"])
+
+    def test_sold_ticket_changes_flight_etag(self) -> None:
+        detail = self.client.get(self.flight_url)
+        listed = self.client.get(FLIGHTS_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                row=1,
+                seat=1,
+                flight=self.flight,
+                order=Order.objects.create(user=self.user),
+            )
+
+        detail_changed = self.client.get(
+            self.flight_url, HTTP_IF_NONE_MATCH=detail["ETag"]
+        )
+        listed_changed = self.client.get(FLIGHTS_URL, HTTP_IF_NONE_MATCH=listed["ETag"])
+        self.assertEqual(detail_changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(detail_changed.data["taken_seats"], [{"row": 1, "seat": 1}])
+        self.assertEqual(listed_changed.status_code, status.HTTP_200_OK)
+
+    def test_renamed_crew_changes_flight_last_modified(self) -> None:
+        res = self.client.get(self.flight_url)
+        for model in (Airplane, Airport, Country, Crew, Flight, Role, Route):
+            model.objects.update(updated_at=datetime(2023, 1, 1, tzinfo=timezone.utc))
+        old = self.client.get(self.flight_url)
+
+        self.crew.first_name = "Hanna"
+        self.crew.save()
+        renamed = self.client.get(
+            self.flight_url, HTTP_IF_MODIFIED_SINCE=old["Last-Modified"]
+        )
+
+        self.assertEqual(old["Last-Modified"], "Sun, 01 Jan 2023 00:00:00 GMT")
+        self.assertNotEqual(old["ETag"], res["ETag"])
+        self.assertEqual(renamed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(renamed["Last-Modified"], old["Last-Modified"])
+
+    def test_flight_list_has_no_last_modified(self) -> None:
+        res = self.client.get(FLIGHTS_URL)
+
+        not_modified = self.client.get(FLIGHTS_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertNotIn("Last-Modified", res)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_flight_is_not_found(self) -> None:
+        url = reverse("airport:flight-detail", args=[self.flight.id + 1])
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", res)
+
+    def test_unchanged_flight_list_is_not_modified_without_query(self) -> None:
+        # authenticated requests skip the response cache
+        self.client.force_authenticate(self.user)
+        res = self.client.get(FLIGHTS_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.client.get(FLIGHTS_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(any('"airport_flight"' in query["sql"] for query in queries))
+
+    def test_search_is_conditional(self) -> None:
+        self.client.force_authenticate(self.user)
+        params = {
+            "source": self.airport.id,
+            "departure_from": "2023-08-30",
+            "departure_to": "2023-08-30",
+        }
+        res = self.client.get(SEARCH_URL, params)
+
+        not_modified = self.client.get(
+            SEARCH_URL, params, HTTP_IF_NONE_MATCH=res["ETag"]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                row=1,
+                seat=1,
+                flight=self.flight,
+                order=Order.objects.create(user=self.user),
+            )
+        changed = self.client.get(SEARCH_URL, params, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data["results"][0]["tickets_available"], 59)
@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Route,
+)
+from airport.schedules import ensure_materialized
+
+
+REPLICA = "replica"
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    The replica is a second connection to the test database file, like
+    the DATABASE_REPLICAS aliases mirror it, so it sees committed data.
+    """
+
+    # the replica alias is only added in setUpClass
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        connections.settings[REPLICA] = {
+            **connections["default"].settings_dict,
+            "TEST": {"MIRROR": "default"},
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com", "Testpassword123@"
+        )
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Boryspil", closest_big_city="Kyiv", country=country
+            ),
+            destination=Airport.objects.create(
+                name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+            ),
+            distance=500,
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=datetime(2100, 8, 30, 12, 30, tzinfo=timezone.utc),
+            arrival_time=datetime(2100, 8, 30, 13, 30, tzinfo=timezone.utc),
+        )
+        # schedules are materialized from the primary, once per version
+        ensure_materialized()
+
+    def get(self, url: str):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                self.response = self.client.get(url)
+
+        self.assertEqual(self.response.status_code, status.HTTP_200_OK)
+        return len(primary), len(replica)
+
+    def authenticate(self, user) -> None:
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+
+    def test_safe_requests_read_from_replica(self) -> None:
+        # anonymous flight lists are cached for everyone
+        self.authenticate(self.user)
+        primary, replica = self.get(reverse("airport:flight-list"))
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        primary, replica = self.get(
+            reverse("async-airport:flight-detail", args=[self.flight.id])
+        )
+        # only the seat map, which is cached for everyone
+        self.assertEqual(primary, 1)
+        self.assertGreater(replica, 0)
+
+    def test_other_apps_read_from_primary(self) -> None:
+        self.authenticate(self.user)
+
+        primary, replica = self.get(reverse("user:manage"))
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_user_reads_own_writes_from_primary(self) -> None:
+        other_user = get_user_model().objects.create_user(
+            "other@user.com", "Testpassword123@"
+        )
+        self.authenticate(self.user)
+
+        res = self.client.post(
+            reverse("airport:order-list"),
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        primary, replica = self.get(
+            reverse("airport:order-detail", args=[res.data["id"]])
+        )
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        self.authenticate(other_user)
+        primary, replica = self.get(reverse("airport:order-list"))
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_shared_caches_are_filled_from_primary(self) -> None:
+        # cached for everyone under the current versions
+        primary, replica = self.get(reverse("airport:airport-list"))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        self.assertIn("ETag", self.response)
+
+        primary, replica = self.get(reverse("airport:airport-list"))
+        self.assertEqual((primary, replica), (0, 0))
+
+        # not cached, but its ETag would be kept by clients
+        self.authenticate(self.user)
+        primary, replica = self.get(reverse("airport:flight-list"))
+        self.assertGreater(replica, 0)
+        self.assertNotIn("ETag", self.response)
+
+    def test_failed_writes_do_not_pin(self) -> None:
+        self.authenticate(self.user)
+
+        res = self.client.post(
+            reverse("airport:order-list"), {"tickets": []}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        primary, replica = self.get(reverse("airport:order-list"))
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.aggregates import JSONArraySubquery, annotate_flight_crews
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Crew,
+    Flight,
+    Role,
+    Route,
+)
+
+
+class FastListTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+        airplane_type = AirplaneType.objects.create(name="Jet")
+        airplanes = [
+            Airplane.objects.create(
+                name=f"Boeing {number}",
+                rows=10 + number,
+                seats_in_row=6,
+                airplane_type=airplane_type,
+            )
+            for number in range(3)
+        ]
+        ukraine = Country.objects.create(name="Ukraine")
+        poland = Country.objects.create(name="Poland")
+        airports = [
+            Airport.objects.create(
+                name="Boryspil", closest_big_city="Kyiv", country=ukraine
+            ),
+            Airport.objects.create(
+                name="Chopin", closest_big_city="Warsaw", country=poland
+            ),
+            Airport.objects.create(
+                name="Balice", closest_big_city="Krakow", country=poland
+            ),
+        ]
+        routes = [
+            Route.objects.create(source=source, destination=destination, distance=500)
+            for source in airports
+            for destination in airports
+            if source != destination
+        ]
+        pilot = Role.objects.create(name="pilot")
+        attendant = Role.objects.create(name="attendant")
+        crews = [
+            Crew.objects.create(first_name="Anna", last_name="Koval", role=pilot),
+            Crew.objects.create(first_name="Ivan", last_name="Koval", role=pilot),
+            Crew.objects.create(first_name="Olha", last_name="Bondar", role=attendant),
+        ]
+
+        departure = datetime.now(timezone.utc).replace(microsecond=0)
+        for number in range(12):
+            flight = Flight.objects.create(
+                route=routes[number % len(routes)],
+                airplane=airplanes[number % len(airplanes)],
+                departure_time=departure + timedelta(hours=number // 2),
+                arrival_time=departure + timedelta(hours=number // 2 + 2),
+            )
+            flight.crews.set(crews[: number % 4])
+        self.route = routes[0]
+
+    def get_both(self, url: str, params: dict = None) -> tuple[bytes, bytes]:
+        responses = []
+        for fast_list in (False, True):
+            cache.clear()
+            with override_settings(AIRPORT_FAST_LIST=fast_list):
+                res = self.client.get(url, params)
+            self.assertEqual(res.status_code, 200)
+            responses.append(res.content)
+
+        return responses[0], responses[1]
+
+    def assertIdenticalOutput(self, url: str, params: dict = None) -> None:
+        serialized, fast = self.get_both(url, params)
+        self.assertEqual(fast, serialized)
+
+    def test_airport_list(self) -> None:
+        self.assertIdenticalOutput(reverse("airport:airport-list"))
+
+    def test_route_list(self) -> None:
+        self.assertIdenticalOutput(reverse("airport:route-list"), {"limit": 4})
+
+    def test_airplane_list(self) -> None:
+        self.assertIdenticalOutput(reverse("airport:airplane-list"))
+
+    def test_flight_list(self) -> None:
+        url = reverse("airport:flight-list")
+        self.assertIdenticalOutput(url)
+        self.assertIdenticalOutput(url, {"limit": 5, "offset": 5})
+        self.assertIdenticalOutput(url, {"route": self.route.id})
+        self.assertIdenticalOutput(url, {"count": "false", "limit": 3})
+
+    def test_flight_list_keyset_pagination(self) -> None:
+        url = reverse("airport:flight-list")
+        serialized, fast = self.get_both(url, {"pagination": "keyset", "limit": 5})
+        self.assertEqual(fast, serialized)
+
+        next_url = self.client.get(url, {"pagination": "keyset", "limit": 5}).data[
+            "next"
+        ]
+        self.assertIdenticalOutput(next_url)
+
+    def test_flight_search(self) -> None:
+        self.assertIdenticalOutput(
+            reverse("airport:flight-search"),
+            {
+                "source": self.route.source_id,
+                "destination": self.route.destination_id,
+            },
+        )
+
+    def test_flight_list_queries(self) -> None:
+        # pending flight schedules, count and flight rows with aggregated
+        # crew names, the ETag comes from the versions
+        for fast_list in (False, True):
+            cache.clear()
+            with override_settings(AIRPORT_FAST_LIST=fast_list):
+                with self.assertNumQueries(3):
+                    self.client.get(reverse("airport:flight-list"))
+
+    def test_flight_retrieve(self) -> None:
+        flight = Flight.objects.filter(crews__isnull=False).last()
+        url = reverse("airport:flight-detail", args=[flight.id])
+
+        # ETag, flight with crews, seat map tickets and seat holds
+        with self.assertNumQueries(4):
+            res = self.client.get(url)
+
+        self.assertEqual(
+            res.json()["crews"],
+            [
+                {"id": crew.id, "full_name": crew.full_name, "role": crew.role.name}
+                for crew in flight.crews.order_by("role__name", "last_name", "id")
+            ],
+        )
+
+    def test_crews_are_ordered_inside_the_aggregate(self) -> None:
+        with patch.object(
+            JSONArraySubquery, "has_ordered_aggregates", return_value=True
+        ):
+            sql = str(annotate_flight_crews(Flight.objects.all()).query)
+
+        self.assertIn("JSON_GROUP_ARRAY(items.item ORDER BY items.position)", sql)
+        self.assertIn(
+            'ROW_NUMBER() OVER (ORDER BY U0."role_id", U0."last_name", U0."id")', sql
+        )
@@ -0,0 +1,278 @@
+from datetime import time, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Crew,
+    Flight,
+    FlightSchedule,
+    Order,
+    Role,
+    Route,
+    SeatHold,
+    Ticket,
+)
+from airport.schedules import SCHEDULE_HORIZON_DAYS, materialize_schedule
+
+
+FLIGHTS_URL = reverse("airport:flight-list")
+SEARCH_URL = reverse("airport:flight-search")
+SCHEDULES_URL = reverse("airport:flightschedule-list")
+
+
+class FlightScheduleTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.today = timezone.localdate()
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        self.airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        kyiv = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=country
+        )
+        lviv = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+        )
+        self.route = Route.objects.create(source=kyiv, destination=lviv, distance=500)
+        self.return_route = Route.objects.create(
+            source=lviv, destination=kyiv, distance=500
+        )
+        self.crew = Crew.objects.create(
+            first_name="Anna", last_name="Koval", role=Role.objects.create(name="pilot")
+        )
+
+        self.schedule = self.create_schedule(self.route)
+        self.return_schedule = self.create_schedule(self.return_route)
+
+    def create_schedule(self, route: Route, **kwargs) -> FlightSchedule:
+        schedule = FlightSchedule.objects.create(
+            **{
+                "route": route,
+                "airplane": self.airplane,
+                "departure_time": time(7, 40),
+                "duration": timedelta(hours=1, minutes=10),
+                "valid_from": self.today,
+                "valid_until": self.today + timedelta(days=200),
+                **kwargs,
+            }
+        )
+        schedule.crews.add(self.crew)
+        return schedule
+
+    def test_flights_are_materialized_on_first_list(self) -> None:
+        res = self.client.get(FLIGHTS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 2 * (SCHEDULE_HORIZON_DAYS + 1))
+        flights = self.schedule.flights.order_by("departure_time")
+        self.assertEqual(len(flights), SCHEDULE_HORIZON_DAYS + 1)
+        first = timezone.localtime(flights[0].departure_time)
+        self.assertEqual((first.date(), first.time()), (self.today, time(7, 40)))
+        self.assertEqual(
+            flights[0].arrival_time - flights[0].departure_time,
+            timedelta(hours=1, minutes=10),
+        )
+        self.assertEqual(list(flights[0].crews.all()), [self.crew])
+        self.schedule.refresh_from_db()
+        self.assertEqual(
+            self.schedule.materialized_until,
+            self.today + timedelta(days=SCHEDULE_HORIZON_DAYS),
+        )
+
+        # the next requests only check the cache
+        with self.assertNumQueries(0):
+            self.client.get(FLIGHTS_URL)
+
+    def test_search_materializes_matching_schedules_to_departure_to(self) -> None:
+        departure_to = self.today + timedelta(days=100)
+
+        res = self.client.get(
+            SEARCH_URL,
+            {
+                "source": self.route.source_id,
+                "departure_from": departure_to,
+                "departure_to": departure_to,
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(self.schedule.flights.count(), 101)
+        self.assertFalse(self.return_schedule.flights.exists())
+
+    def test_weekdays_and_validity(self) -> None:
+        FlightSchedule.objects.all().delete()
+        schedule = self.create_schedule(
+            self.route, weekdays="6", valid_until=self.today + timedelta(days=13)
+        )
+
+        call_command("materialize_flights", "--days=30", stdout=StringIO())
+
+        self.assertEqual(
+            [
+                timezone.localtime(flight.departure_time).isoweekday()
+                for flight in schedule.flights.all()
+            ],
+            [6, 6],
+        )
+
+    def test_materialization_is_claimed_once(self) -> None:
+        until = self.today + timedelta(days=5)
+        stale = FlightSchedule.objects.get(pk=self.schedule.pk)
+
+        self.assertEqual(len(materialize_schedule(self.schedule, until)), 6)
+        self.assertEqual(materialize_schedule(stale, until), [])
+        self.assertEqual(self.schedule.flights.count(), 6)
+
+    def materialize_from_tomorrow(self, days: int = 5) -> list[Flight]:
+        # departures of today may have passed already
+        self.schedule.valid_from = self.today + timedelta(days=1)
+        self.schedule.save()
+        return materialize_schedule(self.schedule, self.today + timedelta(days=days))
+
+    def departure_times(self) -> list[time]:
+        return sorted(
+            timezone.localtime(flight.departure_time).time()
+            for flight in self.schedule.flights.all()
+        )
+
+    def test_changed_schedule_replaces_unsold_flights(self) -> None:
+        flights = self.materialize_from_tomorrow()
+        user = get_user_model().objects.create_user("user@user.com", "Testpassword123@")
+        sold, held = flights[-1], flights[-2]
+        Ticket.objects.create(
+            row=1, seat=1, flight=sold, order=Order.objects.create(user=user)
+        )
+        SeatHold.objects.create(
+            row=1,
+            seat=1,
+            flight=held,
+            user=user,
+            expires_at=timezone.now() + timedelta(minutes=10),
+        )
+
+        self.schedule.departure_time = time(9, 0)
+        self.schedule.save()
+        materialize_schedule(self.schedule, self.today + timedelta(days=5))
+
+        self.assertEqual(self.departure_times(), [time(7, 40)] * 2 + [time(9, 0)] * 5)
+        self.assertEqual(Flight.objects.filter(pk__in=[sold.pk, held.pk]).count(), 2)
+        self.assertTrue(SeatHold.objects.filter(flight=held).exists())
+
+    def test_other_changes_keep_flights(self) -> None:
+        flights = self.materialize_from_tomorrow()
+        crew = Crew.objects.create(
+            first_name="Ivan", last_name="Bondar", role=self.crew.role
+        )
+
+        self.schedule.valid_until += timedelta(days=10)
+        self.schedule.save()
+        self.schedule.crews.add(crew)
+
+        kept = self.schedule.flights.order_by("departure_time")
+        self.assertEqual(list(kept), flights)
+        self.assertEqual(list(kept[0].crews.order_by("id")), [self.crew, crew])
+
+    def test_shortened_validity_removes_flights_after_it(self) -> None:
+        flights = self.materialize_from_tomorrow()
+
+        self.schedule.valid_until = self.today + timedelta(days=3)
+        self.schedule.save()
+
+        self.assertEqual(
+            list(self.schedule.flights.order_by("departure_time")), flights[:3]
+        )
+
+    def test_create_schedule(self) -> None:
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "admin@admin.com", "Testpassword123@", is_staff=True
+            )
+        )
+        payload = {
+            "route": self.route.id,
+            "airplane": self.airplane.id,
+            "departure_time": "07:40",
+            "duration": "01:10:00",
+            "weekdays": "531",
+            "valid_from": "2024-03-01",
+            "valid_until": "2024-10-31",
+            "crews": [self.crew.id],
+        }
+
+        res = self.client.post(SCHEDULES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["weekdays"], "135")
+        self.assertIsNone(res.data["materialized_until"])
+
+        res = self.client.post(SCHEDULES_URL, {**payload, "weekdays": "8"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(SCHEDULES_URL, {**payload, "valid_until": "2024-02-01"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_new_schedule_is_materialized_on_next_list(self) -> None:
+        self.client.get(FLIGHTS_URL)
+        flights = Flight.objects.count()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "admin@admin.com", "Testpassword123@", is_staff=True
+            )
+        )
+
+        res = self.client.post(
+            SCHEDULES_URL,
+            {
+                "route": self.route.id,
+                "airplane": self.airplane.id,
+                "departure_time": "18:00",
+                "duration": "01:10:00",
+                "valid_from": self.today + timedelta(days=1),
+                "valid_until": self.today + timedelta(days=200),
+            },
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        schedule = FlightSchedule.objects.get(pk=res.data["id"])
+
+        res = self.client.get(FLIGHTS_URL)
+        self.assertEqual(res.data["count"], flights + SCHEDULE_HORIZON_DAYS)
+        self.assertEqual(schedule.flights.count(), SCHEDULE_HORIZON_DAYS)
+
+        res = self.client.get(
+            SEARCH_URL,
+            {
+                "source": self.route.source_id,
+                "departure_from": self.today + timedelta(days=1),
+                "departure_to": self.today + timedelta(days=1),
+            },
+        )
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_schedules_are_read_only_for_users(self) -> None:
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("user@user.com", "Testpassword123@")
+        )
+
+        self.assertEqual(self.client.get(SCHEDULES_URL).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.post(SCHEDULES_URL, {}).status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Route,
+)
+
+
+FLIGHT_SEARCH_URL = reverse("airport:flight-search")
+
+
+class FlightSearchApiTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        self.airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        self.ukraine = Country.objects.create(name="Ukraine")
+        self.poland = Country.objects.create(name="Poland")
+        self.kyiv = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=self.ukraine
+        )
+        self.lviv = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=self.ukraine
+        )
+        self.krakow = Airport.objects.create(
+            name="Balice", closest_big_city="Krakow", country=self.poland
+        )
+        self.kyiv_krakow = Route.objects.create(
+            source=self.kyiv, destination=self.krakow, distance=800
+        )
+        self.lviv_krakow = Route.objects.create(
+            source=self.lviv, destination=self.krakow, distance=300
+        )
+        self.krakow_kyiv = Route.objects.create(
+            source=self.krakow, destination=self.kyiv, distance=800
+        )
+
+        now = timezone.now()
+        self.past = self.create_flight(self.kyiv_krakow, now - timedelta(days=3))
+        self.tomorrow = self.create_flight(self.kyiv_krakow, now + timedelta(days=1))
+        self.next_week = self.create_flight(self.lviv_krakow, now + timedelta(days=7))
+        self.back = self.create_flight(self.krakow_kyiv, now + timedelta(days=2))
+
+    def create_flight(self, route: Route, departure_time) -> Flight:
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=2),
+        )
+
+    def search(self, **params) -> list[int]:
+        res = self.client.get(FLIGHT_SEARCH_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [flight["id"] for flight in res.data["results"]]
+
+    def test_search_by_airport_pair_returns_upcoming_flights(self) -> None:
+        ids = self.search(source=self.kyiv.id, destination=self.krakow.id)
+
+        self.assertEqual(ids, [self.tomorrow.id])
+
+    def test_search_by_country_and_city(self) -> None:
+        ids = self.search(
+            source_country=self.ukraine.id,
+            destination_city=self.krakow.closest_big_city,
+        )
+
+        self.assertEqual(ids, [self.tomorrow.id, self.next_week.id])
+
+    def test_search_by_departure_window(self) -> None:
+        today = timezone.localdate()
+        ids = self.search(
+            destination=self.krakow.id,
+            departure_from=(today - timedelta(days=5)).isoformat(),
+            departure_to=(today + timedelta(days=3)).isoformat(),
+        )
+
+        self.assertEqual(ids, [self.past.id, self.tomorrow.id])
+
+    def test_search_query_count(self) -> None:
+        with self.assertNumQueries(1):
+            self.client.get(
+                FLIGHT_SEARCH_URL,
+                {
+                    "source": self.kyiv.id,
+                    "destination": self.krakow.id,
+                    "count": "false",
+                },
+            )
+
+    def test_search_with_invalid_window(self) -> None:
+        res = self.client.get(
+            FLIGHT_SEARCH_URL,
+            {"departure_from": "2023-09-02", "departure_to": "2023-09-01"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("departure_to", res.data)
@@ -0,0 +1,156 @@
+import json
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from airport.caching import get_versions
+from airport.itinerary import timetable
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Crew,
+    Flight,
+    Role,
+    Route,
+)
+from airport.response_cache import ALL_FLIGHTS_TAG, get_tag_versions, route_tag
+
+
+class ImportScheduleTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        self.airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        kyiv = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=country
+        )
+        lviv = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+        )
+        self.route = Route.objects.create(source=kyiv, destination=lviv, distance=500)
+        pilot = Role.objects.create(name="pilot")
+        self.crews = [
+            Crew.objects.create(first_name="Anna", last_name="Koval", role=pilot),
+            Crew.objects.create(first_name="Ivan", last_name="Bondar", role=pilot),
+        ]
+
+    def write(self, name: str, content: str) -> str:
+        path = Path(self.directory.name) / name
+        path.write_text(content)
+        return str(path)
+
+    def import_schedule(self, path: str, *args) -> str:
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("import_schedule", path, *args, stdout=out, stderr=out)
+        return out.getvalue()
+
+    def test_import_csv(self) -> None:
+        path = self.write(
+            "schedule.csv",
+            "source,destination,airplane,departure_time,arrival_time,crews\n"
+            "Boryspil,Danylo Halytskyi,Test Boeing,"
+            "2023-08-30T12:30:00+00:00,2023-08-30T13:30:00+00:00,"
+            "Anna Koval; ;Ivan Bondar\n"
+            "Boryspil,Danylo Halytskyi,Test Boeing,"
+            "2023-08-31T12:30:00+00:00,2023-08-31T13:30:00+00:00,\n",
+        )
+        versions = get_versions([Flight])
+        tags = [ALL_FLIGHTS_TAG, route_tag(self.route.id)]
+        tag_versions = get_tag_versions(tags)
+        timetable.load()
+
+        out = self.import_schedule(path, "--chunk-size=1")
+
+        flights = Flight.objects.order_by("departure_time")
+        self.assertEqual(
+            [
+                (flight.route, flight.airplane, flight.departure_time)
+                for flight in flights
+            ],
+            [
+                (
+                    self.route,
+                    self.airplane,
+                    datetime(2023, 8, day, 12, 30, tzinfo=timezone.utc),
+                )
+                for day in (30, 31)
+            ],
+        )
+        self.assertEqual(list(flights[0].crews.order_by("id")), self.crews)
+        self.assertEqual(list(flights[1].crews.all()), [])
+        self.assertIn("Rows 2-2: 2 flights and 2 crew assignments imported", out)
+        self.assertNotEqual(get_versions([Flight]), versions)
+        self.assertNotEqual(get_tag_versions(tags), tag_versions)
+        self.assertFalse(timetable.is_loaded)
+
+    def test_import_json_is_resumable(self) -> None:
+        rows = [
+            {
+                "source": "Boryspil",
+                "destination": "Danylo Halytskyi",
+                "airplane": "Test Boeing",
+                "departure_time": f"2023-09-{day:02}T10:00:00",
+                "arrival_time": f"2023-09-{day:02}T11:00:00",
+                "crews": ["Ivan Bondar"],
+            }
+            for day in range(1, 11)
+        ]
+        self.import_schedule(self.write("first.json", json.dumps(rows[:4])))
+
+        out = self.import_schedule(
+            self.write("schedule.jsonl", "\n".join(json.dumps(row) for row in rows)),
+            "--chunk-size=3",
+        )
+
+        self.assertEqual(Flight.objects.count(), 10)
+        self.assertEqual(Flight.crews.through.objects.count(), 10)
+        self.assertIn("6 flights and 6 crew assignments imported from 10 rows", out)
+        self.assertIn("4 existing flights skipped", out)
+
+    def test_invalid_rows_are_reported(self) -> None:
+        Crew.objects.create(
+            first_name="Anna", last_name="Koval", role=self.crews[0].role
+        )
+        row = {
+            "source": "Boryspil",
+            "destination": "Danylo Halytskyi",
+            "airplane": "Test Boeing",
+            "departure_time": "2023-09-01T10:00:00",
+            "arrival_time": "2023-09-01T11:00:00",
+        }
+        rows = [
+            {**row, "destination": "Boryspil"},
+            {**row, "airplane": "Airbus"},
+            {**row, "crews": ["Anna Koval"]},
+            {**row, "arrival_time": "2023-09-01T09:00:00"},
+            {**row, "departure_time": "tomorrow"},
+            row,
+        ]
+
+        out = self.import_schedule(self.write("schedule.json", json.dumps(rows)))
+
+        self.assertEqual(Flight.objects.count(), 1)
+        self.assertIn("Row 1: Unknown route 'Boryspil'-'Boryspil'", out)
+        self.assertIn("Row 2: Unknown airplane 'Airbus'", out)
+        self.assertIn("Row 3: Ambiguous crew member 'Anna Koval'", out)
+        self.assertIn("Row 4: arrival_time must be after departure_time", out)
+        self.assertIn("Row 5: Invalid date and time 'tomorrow'", out)
+        self.assertIn("5 invalid rows", out)
+
+    def test_unsupported_file(self) -> None:
+        with self.assertRaises(CommandError):
+            call_command("import_schedule", self.write("schedule.xml", ""))
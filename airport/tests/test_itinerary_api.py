@@ -0,0 +1,111 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.itinerary import timetable
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Route,
+)
+
+
+ITINERARIES_URL = reverse("airport:itinerary-list")
+
+
+class ItineraryApiTest(TestCase):
+    def setUp(self) -> None:
+        timetable.invalidate()
+        self.client = APIClient()
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        self.airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        self.kyiv, self.lviv, self.odesa, self.kharkiv = (
+            Airport.objects.create(name=name, closest_big_city=name, country=country)
+            for name in ("Kyiv", "Lviv", "Odesa", "Kharkiv")
+        )
+        self.start = timezone.now() + timedelta(days=1)
+
+        self.direct = self.create_flight(self.kyiv, self.odesa, 10, 18)
+        self.to_lviv = self.create_flight(self.kyiv, self.lviv, 0, 2)
+        self.lviv_to_odesa = self.create_flight(self.lviv, self.odesa, 3, 5)
+        self.tight_connection = self.create_flight(self.lviv, self.odesa, 2.5, 4)
+
+    def create_flight(self, source, destination, departure, arrival) -> Flight:
+        route, _ = Route.objects.get_or_create(
+            source=source, destination=destination, defaults={"distance": 500}
+        )
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=self.start + timedelta(hours=departure),
+            arrival_time=self.start + timedelta(hours=arrival),
+        )
+
+    def search(self, **params) -> list[list[int]]:
+        params = {
+            "source": self.kyiv.id,
+            "destination": self.odesa.id,
+            "departure_from": self.start.isoformat(),
+            **params,
+        }
+        res = self.client.get(ITINERARIES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [[leg["flight"] for leg in itinerary["legs"]] for itinerary in res.data]
+
+    def test_direct_and_faster_connecting_itineraries(self) -> None:
+        itineraries = self.search()
+
+        self.assertEqual(
+            itineraries,
+            [[self.direct.id], [self.to_lviv.id, self.lviv_to_odesa.id]],
+        )
+
+    def test_min_connection_time(self) -> None:
+        itineraries = self.search(min_connection=0)
+
+        self.assertEqual(itineraries[1], [self.to_lviv.id, self.tight_connection.id])
+
+        itineraries = self.search(min_connection=90)
+
+        self.assertEqual(itineraries, [[self.direct.id]])
+
+    def test_max_legs(self) -> None:
+        itineraries = self.search(max_legs=1)
+
+        self.assertEqual(itineraries, [[self.direct.id]])
+
+    def test_flights_without_enough_seats_are_skipped(self) -> None:
+        Flight.objects.filter(pk=self.direct.pk).update(tickets_sold=58)
+
+        itineraries = self.search(seats=3)
+
+        self.assertEqual(itineraries, [[self.to_lviv.id, self.lviv_to_odesa.id]])
+
+    def test_search_does_not_query_loaded_timetable(self) -> None:
+        self.search()
+
+        with self.assertNumQueries(0):
+            self.search()
+
+    def test_timetable_is_updated_incrementally(self) -> None:
+        self.search()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            faster = self.create_flight(self.kharkiv, self.odesa, 3, 4)
+            self.create_flight(self.kyiv, self.kharkiv, 0, 1)
+            self.lviv_to_odesa.delete()
+
+        with self.assertNumQueries(0):
+            itineraries = self.search()
+
+        self.assertEqual(itineraries[1][1], faster.id)
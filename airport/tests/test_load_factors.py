@@ -0,0 +1,254 @@
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.load_factors import last_quarter
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    DailyRouteLoad,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+
+LOAD_FACTORS_URL = reverse("airport:load-factor-list")
+DAY = date(2100, 8, 30)
+
+
+def departure(day: date, hour: int = 12) -> datetime:
+    return datetime(day.year, day.month, day.day, hour, tzinfo=timezone.utc)
+
+
+class LoadFactorTestCase(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com", "Testpassword123@"
+        )
+        self.client.force_authenticate(self.user)
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        self.airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        kyiv = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=country
+        )
+        lviv = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+        )
+        self.route = Route.objects.create(source=kyiv, destination=lviv, distance=500)
+        self.return_route = Route.objects.create(
+            source=lviv, destination=kyiv, distance=500
+        )
+        self.morning = self.create_flight(self.route, DAY, hour=6)
+        self.evening = self.create_flight(self.route, DAY, hour=18)
+        self.return_flight = self.create_flight(self.return_route, DAY)
+
+    def create_flight(self, route: Route, day: date, hour: int = 12) -> Flight:
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=departure(day, hour),
+            arrival_time=departure(day, hour) + timedelta(hours=1),
+        )
+
+    def get_load(self, route: Route, day: date = DAY) -> tuple[int, int, int]:
+        load = DailyRouteLoad.objects.get(route=route, date=day)
+        return load.flights, load.seats_sold, load.capacity
+
+    def order(self, flight: Flight, seats: int) -> None:
+        res = self.client.post(
+            reverse("airport:order-list"),
+            {
+                "tickets": [
+                    {"row": index // 6 + 1, "seat": index % 6 + 1, "flight": flight.id}
+                    for index in range(seats)
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+
+class LoadFactorRollupTest(LoadFactorTestCase):
+    def test_rollups_follow_flights(self) -> None:
+        self.assertEqual(self.get_load(self.route), (2, 0, 120))
+        self.assertEqual(self.get_load(self.return_route), (1, 0, 60))
+
+        self.evening.departure_time = departure(DAY + timedelta(days=1))
+        self.evening.arrival_time = departure(DAY + timedelta(days=1), 13)
+        self.evening.save()
+        self.assertEqual(self.get_load(self.route), (1, 0, 60))
+        self.assertEqual(self.get_load(self.route, DAY + timedelta(days=1)), (1, 0, 60))
+
+        self.return_flight.delete()
+        self.assertFalse(
+            DailyRouteLoad.objects.filter(route=self.return_route).exists()
+        )
+
+        self.airplane.rows = 20
+        self.airplane.save()
+        self.assertEqual(self.get_load(self.route), (1, 0, 120))
+
+    def test_only_seat_changes_refresh_airplane_days(self) -> None:
+        DailyRouteLoad.objects.filter(route=self.route).update(capacity=0)
+
+        self.airplane.name = "Renamed Boeing"
+        self.airplane.save()
+        self.assertEqual(self.get_load(self.route), (2, 0, 0))
+
+        self.airplane.seats_in_row = 4
+        self.airplane.save()
+        self.assertEqual(self.get_load(self.route), (2, 0, 80))
+
+    def test_tickets_update_rollups(self) -> None:
+        self.order(self.morning, 3)
+        self.order(self.evening, 2)
+        self.assertEqual(self.get_load(self.route), (2, 5, 120))
+
+        Ticket.objects.filter(flight=self.evening).delete()
+        self.assertEqual(self.get_load(self.route), (2, 3, 120))
+
+        Order.objects.all().delete()
+        self.assertEqual(self.get_load(self.route), (2, 0, 120))
+
+    def test_missing_rollup_is_recomputed(self) -> None:
+        DailyRouteLoad.objects.all().delete()
+
+        self.order(self.morning, 2)
+
+        self.assertEqual(self.get_load(self.route), (2, 2, 120))
+
+    def test_missing_rollups_are_recomputed_with_existing_ones(self) -> None:
+        next_day = self.create_flight(self.route, DAY + timedelta(days=1))
+        DailyRouteLoad.objects.filter(date=next_day.departure_time.date()).delete()
+
+        res = self.client.post(
+            reverse("airport:order-list"),
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "flight": self.morning.id},
+                    {"row": 1, "seat": 1, "flight": next_day.id},
+                    {"row": 1, "seat": 2, "flight": next_day.id},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.get_load(self.route), (2, 1, 120))
+        self.assertEqual(self.get_load(self.route, DAY + timedelta(days=1)), (1, 2, 60))
+
+    def test_rebuild_command(self) -> None:
+        self.order(self.morning, 2)
+        DailyRouteLoad.objects.filter(route=self.route).update(seats_sold=40)
+        DailyRouteLoad.objects.create(
+            route=self.return_route,
+            date=DAY + timedelta(days=3),
+            flights=1,
+            seats_sold=1,
+            capacity=60,
+        )
+        out = StringIO()
+
+        call_command("rebuild_load_factors", stdout=out)
+
+        self.assertIn(
+            "2 route day rollups rewritten, 1 empty days deleted", out.getvalue()
+        )
+        self.assertEqual(self.get_load(self.route), (2, 2, 120))
+        self.assertEqual(DailyRouteLoad.objects.count(), 2)
+
+
+class LoadFactorReportTest(LoadFactorTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.order(self.morning, 30)
+        self.order(self.return_flight, 45)
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "admin@admin.com", "Testpassword123@", is_staff=True
+            )
+        )
+
+    def test_load_factor_by_route(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                LOAD_FACTORS_URL,
+                {"departure_from": DAY - timedelta(days=90), "departure_to": DAY},
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["results"],
+            [
+                {
+                    "route": self.return_route.id,
+                    "route_name": self.return_route.route_name,
+                    "flights": 1,
+                    "seats_sold": 45,
+                    "capacity": 60,
+                    "load_factor": 0.75,
+                },
+                {
+                    "route": self.route.id,
+                    "route_name": self.route.route_name,
+                    "flights": 2,
+                    "seats_sold": 30,
+                    "capacity": 120,
+                    "load_factor": 0.25,
+                },
+            ],
+        )
+        self.assertFalse(any('"airport_ticket"' in query["sql"] for query in queries))
+
+    def test_filters(self) -> None:
+        res = self.client.get(
+            LOAD_FACTORS_URL,
+            {
+                "departure_from": DAY,
+                "departure_to": DAY,
+                "route": self.route.id,
+            },
+        )
+        self.assertEqual([row["route"] for row in res.data["results"]], [self.route.id])
+
+        # last quarter by default
+        res = self.client.get(LOAD_FACTORS_URL)
+        self.assertEqual(res.data["results"], [])
+
+        res = self.client.get(
+            LOAD_FACTORS_URL,
+            {"departure_from": DAY, "departure_to": DAY - timedelta(days=1)},
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_last_quarter(self) -> None:
+        self.assertEqual(
+            last_quarter(date(2024, 5, 10)), (date(2024, 1, 1), date(2024, 3, 31))
+        )
+        self.assertEqual(
+            last_quarter(date(2024, 2, 1)), (date(2023, 10, 1), date(2023, 12, 31))
+        )
+
+    def test_admin_only(self) -> None:
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(LOAD_FACTORS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,152 @@
+import json
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import localtime
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+
+MANIFESTS_URL = reverse("airport:manifest-list")
+
+
+class ManifestTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_user(
+            "admin@admin.com", "Testpassword123@", is_staff=True
+        )
+        self.client.force_authenticate(self.admin)
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        route = Route.objects.create(
+            source=Airport.objects.create(
+                name="Boryspil", closest_big_city="Kyiv", country=country
+            ),
+            destination=Airport.objects.create(
+                name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+            ),
+            distance=500,
+        )
+        self.flights = [
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=datetime(2023, 8, day, 12, 30, tzinfo=timezone.utc),
+                arrival_time=datetime(2023, 8, day, 13, 30, tzinfo=timezone.utc),
+            )
+            for day in (30, 31)
+        ]
+        passenger = get_user_model().objects.create_user(
+            "passenger@user.com", "Testpassword123@"
+        )
+        order = Order.objects.create(user=passenger)
+        self.tickets = [
+            Ticket.objects.create(row=2, seat=1, flight=self.flights[0], order=order),
+            Ticket.objects.create(row=1, seat=5, flight=self.flights[0], order=order),
+            Ticket.objects.create(row=1, seat=1, flight=self.flights[1], order=order),
+        ]
+
+    def record(self, ticket: Ticket) -> dict:
+        return {
+            "flight": ticket.flight_id,
+            "route": "Boryspil (Ukraine)-Danylo Halytskyi (Ukraine)",
+            "departure_time": localtime(ticket.flight.departure_time).isoformat(),
+            "row": ticket.row,
+            "seat": ticket.seat,
+            "ticket": ticket.id,
+            "order": ticket.order_id,
+            "email": "passenger@user.com",
+        }
+
+    def test_flight_manifest_as_csv(self) -> None:
+        res = self.client.get(MANIFESTS_URL, {"flight": self.flights[0].id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertEqual(
+            res["Content-Disposition"],
+            f'attachment; filename="manifest-{self.flights[0].id}.csv"',
+        )
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines,
+            [
+                "flight,route,departure_time,row,seat,ticket,order,email",
+                ",".join(str(value) for value in self.record(self.tickets[1]).values()),
+                ",".join(str(value) for value in self.record(self.tickets[0]).values()),
+            ],
+        )
+
+    def test_date_range_manifest_as_ndjson(self) -> None:
+        res = self.client.get(
+            MANIFESTS_URL,
+            {
+                "departure_from": "2023-08-30",
+                "departure_to": "2023-08-31",
+                "output": "ndjson",
+            },
+        )
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        records = [
+            json.loads(line)
+            for line in b"".join(res.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(
+            records,
+            [self.record(self.tickets[index]) for index in (1, 0, 2)],
+        )
+
+    def test_manifest_needs_flight_or_date_range(self) -> None:
+        res = self.client.get(MANIFESTS_URL, {"departure_from": "2023-08-30"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_manifest_is_for_staff_only(self) -> None:
+        self.client.force_authenticate(
+            get_user_model().objects.get(email="passenger@user.com")
+        )
+
+        res = self.client.get(MANIFESTS_URL, {"flight": self.flights[0].id})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_manifest_command(self) -> None:
+        out = StringIO()
+        call_command(
+            "export_manifest",
+            "--from=2023-08-31",
+            "--to=2023-08-31",
+            "--output=ndjson",
+            "--chunk-size=1",
+            stdout=out,
+        )
+
+        self.assertEqual(
+            [json.loads(line) for line in out.getvalue().splitlines()],
+            [self.record(self.tickets[2])],
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("export_manifest", "--from=2023-08-31")
@@ -3,7 +3,7 @@ from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
-from rest_framework import status
+from rest_framework import serializers, status
 
 from airport.models import (
     Airplane,
@@ -93,12 +93,62 @@ class PrivateOrderApiTest(TestCase):
         )
 
     def test_list_orders(self) -> None:
+        Ticket.objects.create(row=9, seat=4, flight=self.flight1, order=self.order1)
+        Ticket.objects.create(row=8, seat=1, flight=self.flight2, order=self.order1)
+
         res = self.client.get(ORDERS_URL)
-        orders = Order.objects.all()
-        serializer = OrderListSerializer(orders, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data["results"], serializer.data)
+        self.assertEqual(
+            res.data["results"],
+            [
+                {
+                    "id": order.id,
+                    "created_at": serializers.DateTimeField().to_representation(
+                        order.created_at
+                    ),
+                    "ticket_count": ticket_count,
+                    "flight_count": flight_count,
+                }
+                for order, ticket_count, flight_count in (
+                    (self.order2, 1, 1),
+                    (self.order1, 3, 2),
+                )
+            ],
+        )
+
+    def test_list_orders_queries_do_not_depend_on_tickets(self) -> None:
+        for row in range(1, 6):
+            order = Order.objects.create(user=self.user)
+            for seat in range(1, 7):
+                Ticket.objects.create(
+                    row=row, seat=seat, flight=self.flight1, order=order
+                )
+                Ticket.objects.create(
+                    row=row, seat=seat, flight=self.flight2, order=order
+                )
+
+        # count and a page of orders with their ticket and flight counts
+        with self.assertNumQueries(2):
+            self.client.get(ORDERS_URL)
+
+    def test_order_tickets(self) -> None:
+        url = reverse("airport:order-tickets", args=[self.order1.id])
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, OrderListSerializer(self.order1).data["tickets"])
+
+    def test_tickets_of_other_users_orders_are_not_found(self) -> None:
+        order = Order.objects.create(
+            user=get_user_model().objects.create_user(
+                "other@user.com", "Testpassword123@"
+            )
+        )
+        url = reverse("airport:order-tickets", args=[order.id])
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_retrieve_order_detail(self) -> None:
         url = reverse("airport:order-detail", args=[self.order1.id])
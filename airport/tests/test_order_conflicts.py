@@ -0,0 +1,212 @@
+import threading
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.seat_map import get_seat_map
+from airport.serializers import OrderSerializer
+
+
+ORDERS_URL = reverse("airport:order-list")
+
+
+def create_flight(rows: int = 10, seats_in_row: int = 6) -> Flight:
+    airplane_type = AirplaneType.objects.create(name="test-type")
+    airplane = Airplane.objects.create(
+        name="Test Boeing",
+        rows=rows,
+        seats_in_row=seats_in_row,
+        airplane_type=airplane_type,
+    )
+    country = Country.objects.create(name="Ukraine")
+    airport1 = Airport.objects.create(
+        name="Boryspil", closest_big_city="Kyiv", country=country
+    )
+    airport2 = Airport.objects.create(
+        name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+    )
+    route = Route.objects.create(source=airport1, destination=airport2, distance=500)
+
+    return Flight.objects.create(
+        route=route,
+        airplane=airplane,
+        departure_time=datetime(2023, 8, 30, 12, 30, tzinfo=timezone.utc),
+        arrival_time=datetime(2023, 8, 30, 13, 30, tzinfo=timezone.utc),
+    )
+
+
+class OrderConflictTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com", "Testpassword123@"
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = create_flight()
+
+    def test_seat_sold_after_validation_returns_conflict(self) -> None:
+        # the cached seat map does not know about the ticket yet, as if
+        # another order committed between validation and insert
+        get_seat_map(self.flight)
+        Ticket.objects.create(
+            row=1,
+            seat=2,
+            flight=self.flight,
+            order=Order.objects.create(user=self.user),
+        )
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "flight": self.flight.id},
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+            ]
+        }
+
+        res = self.client.post(ORDERS_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"], [{"flight": self.flight.id, "row": 1, "seat": 2}]
+        )
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse(Ticket.objects.filter(row=1, seat=1).exists())
+        self.assertTrue(get_seat_map(self.flight).is_taken(1, 2))
+
+
+class ParallelOrderStressTest(TransactionTestCase):
+    threads = 8
+    orders_per_thread = 6
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.flight = create_flight(rows=3, seats_in_row=4)
+        self.users = [
+            get_user_model().objects.create_user(
+                f"user{number}@user.com", "Testpassword123@"
+            )
+            for number in range(self.threads)
+        ]
+
+    def book(self, user, results: list) -> None:
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            for number in range(self.orders_per_thread):
+                # overlapping pairs of seats, so most orders collide
+                row = number % 3 + 1
+                seat = (user.id + number) % 3 + 1
+                payload = {
+                    "tickets": [
+                        {"row": row, "seat": seat, "flight": self.flight.id},
+                        {"row": row, "seat": seat + 1, "flight": self.flight.id},
+                    ]
+                }
+                results.append(
+                    client.post(ORDERS_URL, payload, format="json").status_code
+                )
+        finally:
+            connection.close()
+
+    def test_parallel_orders_never_double_sell_seats(self) -> None:
+        results = []
+        workers = [
+            threading.Thread(target=self.book, args=(user, results))
+            for user in self.users
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(len(results), self.threads * self.orders_per_thread)
+        self.assertTrue(
+            set(results)
+            <= {
+                status.HTTP_201_CREATED,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_409_CONFLICT,
+            },
+            results,
+        )
+        self.assertIn(status.HTTP_201_CREATED, results)
+
+        seats = list(Ticket.objects.values_list("flight", "row", "seat"))
+        self.assertEqual(len(seats), len(set(seats)))
+        self.assertEqual(
+            results.count(status.HTTP_201_CREATED) * 2, Ticket.objects.count()
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, len(seats))
+
+
+class OrderRetryTest(TransactionTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com", "Testpassword123@"
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = create_flight()
+        self.payload = {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]}
+
+    def test_lock_failure_is_retried(self) -> None:
+        create_order = OrderSerializer.create_order
+        attempts = []
+
+        def locked_once(*args) -> Order:
+            attempts.append(args)
+            if len(attempts) == 1:
+                raise OperationalError("database is locked")
+            return create_order(*args)
+
+        with patch.object(OrderSerializer, "create_order", side_effect=locked_once):
+            res = self.client.post(ORDERS_URL, self.payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(attempts), 2)
+
+    def test_integrity_error_without_taken_seats_is_not_retried(self) -> None:
+        serializer = OrderSerializer(data=self.payload)
+        serializer.is_valid(raise_exception=True)
+
+        with patch.object(
+            OrderSerializer,
+            "create_order",
+            side_effect=IntegrityError("FOREIGN KEY constraint failed"),
+        ) as create_order:
+            with self.assertRaises(IntegrityError):
+                serializer.save(user=self.user)
+
+        self.assertEqual(create_order.call_count, 1)
+
+    def test_no_retry_inside_outer_transaction(self) -> None:
+        serializer = OrderSerializer(data=self.payload)
+        serializer.is_valid(raise_exception=True)
+
+        with patch.object(
+            OrderSerializer,
+            "create_order",
+            side_effect=OperationalError("database is locked"),
+        ) as create_order:
+            with self.assertRaises(OperationalError), transaction.atomic():
+                serializer.save(user=self.user)
+
+        self.assertEqual(create_order.call_count, 1)
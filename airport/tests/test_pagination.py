@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Order,
+    Route,
+)
+
+
+FLIGHTS_URL = reverse("airport:flight-list")
+ORDERS_URL = reverse("airport:order-list")
+
+
+class FlightPaginationTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        airport1 = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=country
+        )
+        airport2 = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+        )
+        self.route = route = Route.objects.create(
+            source=airport1, destination=airport2, distance=500
+        )
+        self.airplane = airplane
+        departure = datetime(2023, 8, 1, 12, 30, tzinfo=timezone.utc)
+        for day in range(25):
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=departure + timedelta(days=day),
+                arrival_time=departure + timedelta(days=day, hours=1),
+            )
+
+    def test_keyset_pagination_walks_all_flights(self) -> None:
+        res = self.client.get(FLIGHTS_URL, {"pagination": "keyset", "limit": 10})
+        ids = [flight["id"] for flight in res.data["results"]]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", res.data)
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(flight["id"] for flight in res.data["results"])
+
+        expected_ids = list(
+            Flight.objects.order_by("-departure_time").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, expected_ids)
+
+    def test_keyset_pagination_of_tied_departures(self) -> None:
+        departure = datetime(2023, 9, 1, 12, 30, tzinfo=timezone.utc)
+        for _ in range(7):
+            Flight.objects.create(
+                route=self.route,
+                airplane=self.airplane,
+                departure_time=departure,
+                arrival_time=departure + timedelta(hours=1),
+            )
+
+        res = self.client.get(FLIGHTS_URL, {"pagination": "keyset", "limit": 3})
+        ids = [flight["id"] for flight in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids.extend(flight["id"] for flight in res.data["results"])
+
+        self.assertEqual(
+            ids,
+            list(
+                Flight.objects.order_by("-departure_time", "-id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+
+    def test_keyset_page_does_not_count_flights(self) -> None:
+        res = self.client.get(FLIGHTS_URL, {"pagination": "keyset", "limit": 10})
+
+        with self.assertNumQueries(1) as queries:
+            self.client.get(res.data["next"])
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_limit_offset_without_count(self) -> None:
+        res = self.client.get(
+            FLIGHTS_URL, {"limit": 10, "offset": 20, "count": "false"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", res.data)
+        self.assertEqual(len(res.data["results"]), 5)
+        self.assertIsNone(res.data["next"])
+        self.assertIn("offset=10", res.data["previous"])
+
+    def test_limit_offset_with_count_by_default(self) -> None:
+        res = self.client.get(FLIGHTS_URL, {"limit": 10})
+
+        self.assertEqual(res.data["count"], 25)
+        self.assertIn("offset=10", res.data["next"])
+
+
+class OrderPaginationTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "Testpassword123@"
+        )
+        self.client.force_authenticate(self.user)
+        for _ in range(3):
+            Order.objects.create(user=self.user)
+
+    def test_keyset_pagination_of_orders(self) -> None:
+        res = self.client.get(ORDERS_URL, {"pagination": "keyset", "limit": 2})
+        ids = [order["id"] for order in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        ids.extend(order["id"] for order in res.data["results"])
+
+        self.assertIsNone(res.data["next"])
+        self.assertEqual(ids, list(Order.objects.values_list("id", flat=True)))
+
+    def test_keyset_pagination_of_orders_created_together(self) -> None:
+        Order.objects.update(created_at=datetime(2023, 8, 1, tzinfo=timezone.utc))
+
+        res = self.client.get(ORDERS_URL, {"pagination": "keyset", "limit": 2})
+        ids = [order["id"] for order in res.data["results"]]
+        res = self.client.get(res.data["next"])
+        ids.extend(order["id"] for order in res.data["results"])
+
+        self.assertEqual(
+            ids, list(Order.objects.order_by("-id").values_list("id", flat=True))
+        )
@@ -0,0 +1,75 @@
+import json
+import re
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient
+
+from config.middleware import TimedSerializerData
+
+from airport.models import Country
+from airport.serializers import CountrySerializer
+
+
+COUNTRIES_URL = reverse("airport:country-list")
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        Country.objects.create(name="Ukraine")
+
+    @override_settings(
+        REQUEST_METRICS_SERVER_TIMING=True, REQUEST_METRICS_SAMPLE_RATE=0.0
+    )
+    def test_server_timing_header(self) -> None:
+        with self.assertNumQueries(2):
+            res = self.client.get(COUNTRIES_URL, {"limit": 5})
+
+        self.assertRegex(
+            res["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="2 queries", '
+            r"serializer;dur=[\d.]+, total;dur=[\d.]+$",
+        )
+        serializer_time = re.search(r"serializer;dur=([\d.]+)", res["Server-Timing"])
+        self.assertGreater(float(serializer_time.group(1)), 0)
+
+    @override_settings(
+        REQUEST_METRICS_SERVER_TIMING=True, REQUEST_METRICS_SAMPLE_RATE=0.0
+    )
+    def test_serializers_outside_views_are_not_timed(self) -> None:
+        self.client.get(COUNTRIES_URL, {"limit": 5})
+
+        self.assertEqual(
+            BaseSerializer.data.fget.__module__, "rest_framework.serializers"
+        )
+        self.assertNotIsInstance(CountrySerializer(many=True), TimedSerializerData)
+
+    @override_settings(
+        REQUEST_METRICS_SERVER_TIMING=False, REQUEST_METRICS_SAMPLE_RATE=0.0
+    )
+    def test_no_metrics_when_sampling_is_off(self) -> None:
+        with self.assertNoLogs("request_metrics"):
+            res = self.client.get(COUNTRIES_URL, {"limit": 5})
+
+        self.assertNotIn("Server-Timing", res)
+
+    @override_settings(
+        REQUEST_METRICS_SERVER_TIMING=False, REQUEST_METRICS_SAMPLE_RATE=1.0
+    )
+    def test_sampled_request_is_logged(self) -> None:
+        with self.assertLogs("request_metrics", level="INFO") as logs:
+            res = self.client.get(COUNTRIES_URL, {"limit": 5})
+
+        self.assertNotIn("Server-Timing", res)
+        metrics = json.loads(logs.records[0].getMessage())
+        self.assertEqual(metrics["view"], "airport:country-list:list")
+        self.assertEqual(metrics["method"], "GET")
+        self.assertEqual(metrics["status"], 200)
+        self.assertEqual(metrics["queries"], 2)
+        self.assertEqual(metrics["response_bytes"], len(res.content))
+        for timing in ("db_ms", "serializer_ms", "total_ms"):
+            self.assertGreaterEqual(metrics[timing], 0)
@@ -0,0 +1,208 @@
+import threading
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.fast_list import FastListMixin
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+
+FLIGHTS_URL = reverse("airport:flight-list")
+SEARCH_URL = reverse("airport:flight-search")
+
+
+def create_flights() -> list[Flight]:
+    airplane_type = AirplaneType.objects.create(name="test-type")
+    airplane = Airplane.objects.create(
+        name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+    )
+    country = Country.objects.create(name="Ukraine")
+    kyiv = Airport.objects.create(
+        name="Boryspil", closest_big_city="Kyiv", country=country
+    )
+    lviv = Airport.objects.create(
+        name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+    )
+    routes = [
+        Route.objects.create(source=kyiv, destination=lviv, distance=500),
+        Route.objects.create(source=lviv, destination=kyiv, distance=500),
+    ]
+
+    return [
+        Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=datetime(2023, 8, 30, 12, 30, tzinfo=timezone.utc),
+            arrival_time=datetime(2023, 8, 30, 13, 30, tzinfo=timezone.utc),
+        )
+        for route in routes
+    ]
+
+
+class FlightResponseCacheTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com", "Testpassword123@"
+        )
+        self.flight, self.other_flight = create_flights()
+
+    def sell_ticket(self, flight: Flight) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                row=1, seat=1, flight=flight, order=Order.objects.create(user=self.user)
+            )
+
+    def test_anonymous_list_is_served_from_cache(self) -> None:
+        res = self.client.get(FLIGHTS_URL, {"limit": 5, "offset": 0})
+        self.assertEqual(res["X-Cache"], "MISS")
+
+        # query parameters are normalized
+        with self.assertNumQueries(0):
+            cached_res = self.client.get(f"{FLIGHTS_URL}?offset=0&limit=5")
+
+        self.assertEqual(cached_res["X-Cache"], "HIT")
+        self.assertEqual(cached_res.content, res.content)
+        self.assertEqual(cached_res["ETag"], res["ETag"])
+
+    def test_cached_list_answers_conditional_requests(self) -> None:
+        res = self.client.get(FLIGHTS_URL)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(FLIGHTS_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_authenticated_list_is_not_cached(self) -> None:
+        self.client.force_authenticate(self.user)
+        self.client.get(FLIGHTS_URL)
+
+        res = self.client.get(FLIGHTS_URL)
+
+        self.assertNotIn("X-Cache", res)
+
+    def test_sold_ticket_invalidates_only_lists_of_its_flight(self) -> None:
+        route_url = f"{FLIGHTS_URL}?route={self.flight.route_id}"
+        other_route_url = f"{FLIGHTS_URL}?route={self.other_flight.route_id}"
+        self.client.get(route_url)
+        self.client.get(other_route_url)
+        self.client.get(FLIGHTS_URL)
+
+        self.sell_ticket(self.flight)
+
+        res = self.client.get(route_url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["tickets_available"], 59)
+        self.assertEqual(self.client.get(FLIGHTS_URL)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(other_route_url)["X-Cache"], "HIT")
+
+    def test_new_flight_invalidates_lists_it_belongs_to(self) -> None:
+        other_route_url = f"{FLIGHTS_URL}?route={self.other_flight.route_id}"
+        self.client.get(FLIGHTS_URL)
+        self.client.get(other_route_url)
+
+        Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time=self.flight.departure_time,
+            arrival_time=self.flight.arrival_time,
+        )
+
+        res = self.client.get(FLIGHTS_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["count"], 3)
+        self.assertEqual(self.client.get(other_route_url)["X-Cache"], "HIT")
+
+    def test_moved_flight_invalidates_lists_of_both_routes(self) -> None:
+        route_url = f"{FLIGHTS_URL}?route={self.flight.route_id}"
+        other_route_url = f"{FLIGHTS_URL}?route={self.other_flight.route_id}"
+        self.client.get(route_url)
+        self.client.get(other_route_url)
+
+        self.flight.route = self.other_flight.route
+        self.flight.save()
+
+        self.assertEqual(self.client.get(route_url).data["count"], 0)
+        self.assertEqual(self.client.get(other_route_url).data["count"], 2)
+
+    def test_search_is_cached(self) -> None:
+        params = {"source_city": "Kyiv", "departure_from": "2023-08-30"}
+        self.client.get(SEARCH_URL, params)
+
+        self.assertEqual(self.client.get(SEARCH_URL, params)["X-Cache"], "HIT")
+        self.sell_ticket(self.flight)
+        self.assertEqual(self.client.get(SEARCH_URL, params)["X-Cache"], "MISS")
+
+    def test_expired_entry_is_served_while_another_request_rebuilds_it(self) -> None:
+        with mock.patch("airport.response_cache.RESPONSE_CACHE_TIMEOUT", 0):
+            res = self.client.get(FLIGHTS_URL)
+
+        # the rebuild lock is held by another request
+        with mock.patch.object(cache, "add", return_value=False):
+            with self.assertNumQueries(0):
+                stale_res = self.client.get(FLIGHTS_URL)
+
+        self.assertEqual(stale_res["X-Cache"], "STALE")
+        self.assertEqual(stale_res.content, res.content)
+
+
+class ResponseCacheStampedeTest(TransactionTestCase):
+    threads = 8
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_flights()
+
+    def get_flights(self, results: list) -> None:
+        try:
+            results.append(APIClient().get(FLIGHTS_URL))
+        finally:
+            connection.close()
+
+    def test_hot_key_is_built_once(self) -> None:
+        list_response = FastListMixin.list_response
+
+        def slow_list_response(viewset, queryset):
+            time.sleep(0.2)
+            return list_response(viewset, queryset)
+
+        results = []
+        workers = [
+            threading.Thread(target=self.get_flights, args=(results,))
+            for _ in range(self.threads)
+        ]
+        with mock.patch.object(
+            FastListMixin,
+            "list_response",
+            side_effect=slow_list_response,
+            autospec=True,
+        ) as built:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        self.assertEqual(built.call_count, 1)
+        self.assertEqual(
+            sorted(res["X-Cache"] for res in results),
+            ["HIT"] * (self.threads - 1) + ["MISS"],
+        )
+        self.assertEqual(len({res.content for res in results}), 1)
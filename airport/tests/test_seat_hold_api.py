@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone as django_timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Order,
+    Route,
+    SeatHold,
+    Ticket,
+)
+
+
+SEAT_HOLDS_URL = reverse("airport:seathold-list")
+CONFIRM_URL = reverse("airport:seathold-confirm")
+ORDERS_URL = reverse("airport:order-list")
+
+
+class SeatHoldApiTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@user.com", "Testpassword123@"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@user.com", "Testpassword123@"
+        )
+        self.client.force_authenticate(self.user)
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        airport1 = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=country
+        )
+        airport2 = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+        )
+        route = Route.objects.create(
+            source=airport1, destination=airport2, distance=500
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=datetime(2023, 8, 30, 12, 30, tzinfo=timezone.utc),
+            arrival_time=datetime(2023, 8, 30, 13, 30, tzinfo=timezone.utc),
+        )
+
+    def hold(self, row: int, seat: int, user=None, minutes: int = 10) -> SeatHold:
+        return SeatHold.objects.create(
+            row=row,
+            seat=seat,
+            flight=self.flight,
+            user=user or self.other_user,
+            expires_at=django_timezone.now() + timedelta(minutes=minutes),
+        )
+
+    def test_hold_seats(self) -> None:
+        payload = [
+            {"row": 1, "seat": 1, "flight": self.flight.id},
+            {"row": 1, "seat": 2, "flight": self.flight.id},
+        ]
+
+        res = self.client.post(SEAT_HOLDS_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(SeatHold.objects.active().filter(user=self.user).count(), 2)
+
+    def test_hold_seat_held_by_other_customer_not_allowed(self) -> None:
+        self.hold(1, 1)
+
+        res = self.client.post(
+            SEAT_HOLDS_URL,
+            {"row": 1, "seat": 1, "flight": self.flight.id},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data[0]["non_field_errors"], ["This seat is held by another customer."]
+        )
+
+    def test_hold_seat_already_held_by_user(self) -> None:
+        self.hold(1, 1, user=self.user)
+
+        res = self.client.post(
+            SEAT_HOLDS_URL,
+            {"row": 1, "seat": 1, "flight": self.flight.id},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data[0]["non_field_errors"], ["You already hold this seat."]
+        )
+
+    def test_holds_per_user_are_limited(self) -> None:
+        for seat in range(1, 7):
+            self.hold(1, seat, user=self.user)
+        self.hold(2, 1, user=self.user, minutes=-1)
+        payload = [
+            {"row": 3, "seat": seat, "flight": self.flight.id} for seat in range(1, 6)
+        ]
+
+        res = self.client.post(SEAT_HOLDS_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["non_field_errors"],
+            ["You can hold at most 10 seats at a time, you already hold 6."],
+        )
+
+        res = self.client.post(SEAT_HOLDS_URL, payload[:4], format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_expired_hold_does_not_block_seat(self) -> None:
+        self.hold(1, 1, minutes=-1)
+
+        res = self.client.post(
+            SEAT_HOLDS_URL,
+            {"row": 1, "seat": 1, "flight": self.flight.id},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_order_seat_held_by_other_customer_not_allowed(self) -> None:
+        self.hold(1, 1)
+
+        res = self.client.post(
+            ORDERS_URL,
+            {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_confirm_holds_into_order(self) -> None:
+        self.hold(1, 1, user=self.user)
+        self.hold(1, 2, user=self.user)
+        self.hold(1, 3)
+
+        res = self.client.post(CONFIRM_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(pk=res.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(
+            list(order.tickets.values_list("row", "seat")), [(1, 1), (1, 2)]
+        )
+        self.assertEqual(list(SeatHold.objects.values_list("seat", flat=True)), [3])
+
+    def test_confirm_without_holds(self) -> None:
+        res = self.client.post(CONFIRM_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_held_seats_are_shown_as_taken(self) -> None:
+        Ticket.objects.create(
+            row=2,
+            seat=1,
+            flight=self.flight,
+            order=Order.objects.create(user=self.user),
+        )
+        self.hold(1, 1)
+        self.hold(3, 1, minutes=-1)
+
+        res = self.client.get(reverse("airport:flight-detail", args=[self.flight.id]))
+
+        self.assertEqual(
+            res.data["taken_seats"], [{"row": 1, "seat": 1}, {"row": 2, "seat": 1}]
+        )
+
+    def test_purge_seat_holds_command(self) -> None:
+        self.hold(1, 1)
+        self.hold(1, 2, minutes=-1)
+
+        call_command("purge_seat_holds", stdout=StringIO())
+
+        self.assertEqual(list(SeatHold.objects.values_list("seat", flat=True)), [1])
@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.checks import check_shared_cache
+from airport.seat_map import SeatMap, get_seat_map, update_seat_map
+
+
+class SeatMapTest(TestCase):
+    def test_take_and_release_seats(self) -> None:
+        seat_map = SeatMap(rows=30, seats_in_row=9)
+        seat_map.take(1, 1)
+        seat_map.take(12, 5)
+        seat_map.take(30, 9)
+
+        self.assertEqual(len(seat_map.bits), 34)
+        self.assertTrue(seat_map.is_taken(12, 5))
+        self.assertFalse(seat_map.is_taken(12, 6))
+        self.assertEqual(seat_map.taken_count, 3)
+        self.assertEqual(list(seat_map.taken_seats()), [(1, 1), (12, 5), (30, 9)])
+
+        seat_map.release(12, 5)
+
+        self.assertFalse(seat_map.is_taken(12, 5))
+        self.assertEqual(list(seat_map.taken_seats()), [(1, 1), (30, 9)])
+
+    def test_seat_outside_of_airplane(self) -> None:
+        seat_map = SeatMap(rows=10, seats_in_row=6)
+
+        self.assertFalse(seat_map.is_taken(11, 1))
+        with self.assertRaises(IndexError):
+            seat_map.take(1, 7)
+
+
+class SharedCacheCheckTest(TestCase):
+    def test_process_local_cache_is_reported(self) -> None:
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)], ["airport.W001"]
+        )
+
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                    "LOCATION": "redis://localhost:6379/0",
+                }
+            }
+        ):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class FlightSeatMapTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "Testpassword123@"
+        )
+        self.client.force_authenticate(self.user)
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        airport1 = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=country
+        )
+        airport2 = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+        )
+        route = Route.objects.create(
+            source=airport1, destination=airport2, distance=500
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=datetime(2023, 8, 30, 12, 30, tzinfo=timezone.utc),
+            arrival_time=datetime(2023, 8, 30, 13, 30, tzinfo=timezone.utc),
+        )
+        self.order = Order.objects.create(user=self.user)
+        self.ticket = Ticket.objects.create(
+            row=9, seat=6, flight=self.flight, order=self.order
+        )
+
+    def test_created_tickets_are_added_to_cached_seat_map(self) -> None:
+        get_seat_map(self.flight)
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": 2, "flight": self.flight.id},
+                {"row": 1, "seat": 3, "flight": self.flight.id},
+            ]
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                reverse("airport:order-list"), payload, format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(0):
+            seat_map = get_seat_map(self.flight)
+        self.assertEqual(list(seat_map.taken_seats()), [(1, 2), (1, 3), (9, 6)])
+
+    def test_deleted_ticket_is_released_from_cached_seat_map(self) -> None:
+        get_seat_map(self.flight)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket.delete()
+
+        self.assertFalse(get_seat_map(self.flight).is_taken(9, 6))
+
+    def test_concurrent_seat_changes_are_not_lost(self) -> None:
+        get_seat_map(self.flight)
+        # two orders commit at once: one releases 9-6, another takes 1-1
+        self.ticket.delete()
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+        backend = caches["default"]
+        read_seat_map = backend.get
+
+        def read_then_release(key, *args, **kwargs):
+            value = read_seat_map(key, *args, **kwargs)
+            if key.startswith("airport:seat_map:"):
+                # the release is applied between the read and the write of
+                # the take
+                with patch.object(backend, "get", read_seat_map):
+                    update_seat_map(self.flight.id, [(9, 6)], taken=False)
+            return value
+
+        with patch.object(backend, "get", read_then_release):
+            update_seat_map(self.flight.id, [(1, 1)], taken=True)
+
+        self.assertEqual(list(get_seat_map(self.flight).taken_seats()), [(1, 1)])
+
+    def test_retrieve_flight_reads_taken_seats_from_seat_map(self) -> None:
+        url = reverse("airport:flight-detail", args=[self.flight.id])
+        self.client.get(url)
+
+        # ETag, flight with crews and seat holds
+        with self.assertNumQueries(3):
+            res = self.client.get(url)
+
+        self.assertEqual(res.data["taken_seats"], [{"row": 9, "seat": 6}])
@@ -0,0 +1,122 @@
+import os
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from config.throttling import AnonRateThrottle, UserRateThrottle
+
+
+class SlidingWindowThrottleTest(TestCase):
+    """Runs against Redis when THROTTLE_CACHE_URL is set, see README.md"""
+
+    def setUp(self) -> None:
+        self.cache = caches[settings.THROTTLE_CACHE]
+        self.cache.clear()
+        self.request = Request(APIRequestFactory().get("/"))
+        self.request.user = SimpleNamespace(pk=1, is_authenticated=True)
+        self.now = 600.0
+        rates = mock.patch.object(UserRateThrottle, "THROTTLE_RATES", {"user": "3/min"})
+        rates.start()
+        self.addCleanup(rates.stop)
+
+    def allow(self) -> UserRateThrottle:
+        throttle = UserRateThrottle()
+        throttle.timer = lambda: self.now
+        throttle.allowed = throttle.allow_request(self.request, None)
+        return throttle
+
+    def test_limits_requests_per_window(self) -> None:
+        self.assertEqual([self.allow().allowed for _ in range(3)], [True] * 3)
+
+        throttle = self.allow()
+        self.assertFalse(throttle.allowed)
+        # the window slides out in 60 seconds, a third of it in the next
+        self.assertEqual(throttle.wait(), 80)
+
+    def test_previous_window_is_weighted(self) -> None:
+        for _ in range(3):
+            self.allow()
+
+        self.now = 660.0
+        throttle = self.allow()
+        self.assertFalse(throttle.allowed)
+        self.assertEqual(throttle.wait(), 20)
+
+        self.now = 680.0
+        self.assertTrue(self.allow().allowed)
+        self.assertFalse(self.allow().allowed)
+
+    def test_state_is_two_counters(self) -> None:
+        for _ in range(5):
+            throttle = self.allow()
+        self.now = 660.0
+        for _ in range(5):
+            throttle = self.allow()
+
+        # denied requests are not counted
+        self.assertEqual(
+            self.cache.get_many([throttle.window_key(10), throttle.window_key(11)]),
+            {throttle.window_key(10): 3, throttle.window_key(11): 0},
+        )
+
+    @skipUnless(os.getenv("THROTTLE_CACHE_URL"), "THROTTLE_CACHE_URL is not set")
+    def test_counters_are_kept_in_redis(self) -> None:
+        self.assertIsInstance(self.allow().get_cache(), RedisCache)
+
+
+@mock.patch.object(AnonRateThrottle, "THROTTLE_RATES", {"anon": "2/min"})
+class ThrottledApiTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        caches[settings.THROTTLE_CACHE].clear()
+        self.client = APIClient()
+
+    def test_views_share_the_limit(self) -> None:
+        self.assertEqual(
+            self.client.get(reverse("airport:country-list")).status_code,
+            status.HTTP_200_OK,
+        )
+        self.assertEqual(
+            self.client.get(reverse("async-airport:airport-list")).status_code,
+            status.HTTP_200_OK,
+        )
+
+        for url in (
+            reverse("airport:country-list"),
+            reverse("async-airport:airport-list"),
+        ):
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn("Retry-After", res)
+
+    def test_benchmark_command(self) -> None:
+        out = StringIO()
+
+        call_command(
+            "benchmark_throttles",
+            "--requests=3",
+            "--clients=2",
+            "--rate=2/min",
+            stdout=out,
+        )
+
+        rows = [line.split() for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual(
+            [(row[0], row[-1]) for row in rows],
+            [
+                ("drf-anon", "2"),
+                ("sliding-anon", "2"),
+                ("drf-user", "2"),
+                ("sliding-user", "2"),
+            ],
+        )
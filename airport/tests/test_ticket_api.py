@@ -2,6 +2,9 @@ from datetime import datetime
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
 
@@ -168,3 +171,44 @@ class PrivateTicketApiTest(TestCase):
         res = self.client.post(reverse("airport:order-list"), payload, format="json")
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_add_duplicate_tickets_in_one_order_not_allowed(self) -> None:
+        payload = {
+            "tickets": [
+                {"row": 4, "seat": 1, "flight": self.flight1.id},
+                {"row": 4, "seat": 1, "flight": self.flight1.id},
+            ]
+        }
+        initial_order_count = Order.objects.count()
+        res = self.client.post(reverse("airport:order-list"), payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("non_field_errors", res.data["tickets"][1])
+        self.assertEqual(Order.objects.count(), initial_order_count)
+
+    def test_order_query_count_does_not_depend_on_tickets_number(self) -> None:
+        def post_order(seats) -> None:
+            payload = {
+                "tickets": [
+                    {"row": row, "seat": seat, "flight": flight.id}
+                    for row, seat, flight in seats
+                ]
+            }
+            res = self.client.post(
+                reverse("airport:order-list"), payload, format="json"
+            )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as single_ticket:
+            post_order([(1, 1, self.flight1)])
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as many_tickets:
+            post_order(
+                [(2, seat, self.flight1) for seat in range(1, 7)]
+                + [(3, seat, self.flight2) for seat in range(1, 4)]
+            )
+
+        self.assertEqual(len(single_ticket), len(many_tickets))
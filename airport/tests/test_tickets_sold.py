@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    Country,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+
+
+class TicketsSoldCounterTest(TestCase):
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "Testpassword123@"
+        )
+        self.client.force_authenticate(self.user)
+
+        airplane_type = AirplaneType.objects.create(name="test-type")
+        airplane = Airplane.objects.create(
+            name="Test Boeing", rows=10, seats_in_row=6, airplane_type=airplane_type
+        )
+        country = Country.objects.create(name="Ukraine")
+        airport1 = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=country
+        )
+        airport2 = Airport.objects.create(
+            name="Danylo Halytskyi", closest_big_city="Lviv", country=country
+        )
+        route = Route.objects.create(
+            source=airport1, destination=airport2, distance=500
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=datetime(2023, 8, 30, 12, 30, tzinfo=timezone.utc),
+            arrival_time=datetime(2023, 8, 30, 13, 30, tzinfo=timezone.utc),
+        )
+        self.order = Order.objects.create(user=self.user)
+
+    def test_counter_follows_ticket_inserts_and_deletes(self) -> None:
+        ticket = Ticket.objects.create(
+            row=1, seat=1, flight=self.flight, order=self.order
+        )
+        self.client.post(
+            reverse("airport:order-list"),
+            {
+                "tickets": [
+                    {"row": 2, "seat": 1, "flight": self.flight.id},
+                    {"row": 2, "seat": 2, "flight": self.flight.id},
+                ]
+            },
+            format="json",
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 3)
+
+        ticket.delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+
+    def test_saving_stale_flight_keeps_counter(self) -> None:
+        stale_flight = Flight.objects.get(pk=self.flight.pk)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+
+        stale_flight.save()
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
+
+    def test_list_flights_reads_stored_counter(self) -> None:
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+
+        res = self.client.get(reverse("airport:flight-list"))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 59)
+
+    def test_check_tickets_sold_command_repairs_drift(self) -> None:
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+        Flight.objects.filter(pk=self.flight.pk).update(tickets_sold=7)
+        out = StringIO()
+
+        call_command("check_tickets_sold", stdout=out)
+        self.flight.refresh_from_db()
+        self.assertIn("tickets_sold is 7, actual 1", out.getvalue())
+        self.assertEqual(self.flight.tickets_sold, 7)
+
+        call_command("check_tickets_sold", "--repair", stdout=out)
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
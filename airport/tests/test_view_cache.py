@@ -0,0 +1,100 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import Airport, Country
+
+
+AIRPORTS_URL = reverse("airport:airport-list")
+CACHE_STATS_URL = reverse("airport:cache-stats-list")
+SCHEMA_URL = reverse("schema")
+
+
+class ReferenceDataCacheTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+        self.country = Country.objects.create(name="Ukraine")
+        self.airport = Airport.objects.create(
+            name="Boryspil", closest_big_city="Kyiv", country=self.country
+        )
+
+    def test_second_read_is_served_from_cache(self) -> None:
+        res = self.client.get(AIRPORTS_URL)
+        self.assertEqual(res["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            cached_res = self.client.get(AIRPORTS_URL)
+
+        self.assertEqual(cached_res["X-Cache"], "HIT")
+        self.assertEqual(cached_res.data, res.data)
+
+    def test_query_string_is_part_of_cache_key(self) -> None:
+        self.client.get(AIRPORTS_URL)
+        res = self.client.get(AIRPORTS_URL, {"country": self.country.id + 1})
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"], [])
+
+    @override_settings(ALLOWED_HOSTS=["api.example.com", "testserver"])
+    def test_host_is_part_of_cache_key(self) -> None:
+        for _ in range(3):
+            Airport.objects.create(
+                name="Zhuliany", closest_big_city="Kyiv", country=self.country
+            )
+        self.client.get(AIRPORTS_URL, {"limit": 1}, HTTP_HOST="api.example.com")
+
+        res = self.client.get(AIRPORTS_URL, {"limit": 1})
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertTrue(res.data["next"].startswith("http://testserver/"))
+
+    def test_change_of_dependency_evicts_cached_response(self) -> None:
+        self.client.get(AIRPORTS_URL)
+
+        self.country.name = "Ukraina"
+        self.country.save()
+        res = self.client.get(AIRPORTS_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["country"], "Ukraina")
+
+    def test_cache_stats(self) -> None:
+        self.client.get(AIRPORTS_URL)
+        self.client.get(AIRPORTS_URL)
+        self.client.get(AIRPORTS_URL)
+        admin = get_user_model().objects.create_user(
+            "admin@admin.com", "Testpassword123@", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["airport"], {"hits": 2, "misses": 1, "hit_ratio": 2 / 3}
+        )
+
+    def test_cache_stats_schema(self) -> None:
+        schema = self.client.get(SCHEMA_URL, {"format": "json"}).json()
+
+        response = schema["paths"][CACHE_STATS_URL]["get"]["responses"]["200"]
+        self.assertEqual(
+            response["content"]["application/json"]["schema"],
+            {"$ref": "#/components/schemas/CacheStatsByModel"},
+        )
+        self.assertEqual(
+            schema["components"]["schemas"]["CacheStatsByModel"]["properties"][
+                "airport"
+            ],
+            {"$ref": "#/components/schemas/CacheStats"},
+        )
+
+    def test_cache_stats_for_not_admin_forbidden(self) -> None:
+        res = self.client.get(CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -2,14 +2,20 @@ from rest_framework import routers
 
 from airport.views import (
     AirplaneTypeViewSet,
+    CacheStatsViewSet,
     AirplaneViewSet,
     AirportViewSet,
     CountryViewSet,
     CrewViewSet,
+    FlightScheduleViewSet,
     FlightViewSet,
+    ItineraryViewSet,
+    LoadFactorViewSet,
+    ManifestViewSet,
     OrderViewSet,
     RoleViewSet,
     RouteViewSet,
+    SeatHoldViewSet,
 )
 
 
@@ -22,7 +28,13 @@ router.register("routes", RouteViewSet)
 router.register("airplane-types", AirplaneTypeViewSet)
 router.register("airplanes", AirplaneViewSet)
 router.register("flights", FlightViewSet)
+router.register("flight-schedules", FlightScheduleViewSet)
+router.register("itineraries", ItineraryViewSet, basename="itinerary")
 router.register("orders", OrderViewSet)
+router.register("seat-holds", SeatHoldViewSet)
+router.register("cache-stats", CacheStatsViewSet, basename="cache-stats")
+router.register("manifests", ManifestViewSet, basename="manifest")
+router.register("load-factors", LoadFactorViewSet, basename="load-factor")
 
 urlpatterns = router.urls
 
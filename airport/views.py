@@ -1,10 +1,21 @@
-from typing import Any
-from django.db.models import QuerySet
-from rest_framework.permissions import IsAuthenticated
-from rest_framework import viewsets, mixins
+from datetime import datetime, time, timedelta
+from functools import partial
+from typing import Any, Optional
+from django.db.models import Count, Max, Q, QuerySet
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import viewsets, mixins, status
 from rest_framework.serializers import Serializer
-from django.db.models import Count, F, Prefetch
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from drf_spectacular.openapi import AutoSchema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter
+
+from config.middleware import SerializerMetricsMixin
 
 from airport.models import (
     Airplane,
@@ -13,43 +24,83 @@ from airport.models import (
     Country,
     Crew,
     Flight,
+    FlightSchedule,
     Order,
     Role,
     Route,
+    SeatHold,
     Ticket,
 )
+from airport.aggregates import annotate_flight_crews, annotate_order_summaries
+from airport.autocomplete import autocomplete
+from airport.caching import CachedReadMixin, ConditionalGetMixin, get_cache_stats
+from airport.fast_list import (
+    AirplaneFastListMixin,
+    AirportFastListMixin,
+    FlightFastListMixin,
+    RouteFastListMixin,
+)
+from airport.itinerary import search_itineraries
+from airport.load_factors import route_loads, route_names
+from airport.manifest import MANIFEST_OUTPUTS, export_manifest
+from airport.pagination import FlightPagination, OrderPagination
 from airport.permissions import IsAdminOrReadOnly
+from airport.response_cache import (
+    TICKETS_SOLD_TAG,
+    FlightResponseCacheMixin,
+    get_tag_versions,
+)
+from airport.schedules import SCHEDULE_HORIZON_DAYS, ensure_materialized
 from airport.serializers import (
     AirplaneListSerializer,
     AirplaneSerializer,
     AirplaneTypeSerializer,
     AirportListSerializer,
     AirportSerializer,
+    AutocompleteResultSerializer,
+    AutocompleteSearchSerializer,
+    CacheStatsSerializer,
     CountrySerializer,
     CrewListSerializer,
     CrewSerializer,
     FlightListSerializer,
     FlightRetrieveSerializer,
+    FlightScheduleSerializer,
+    FlightSearchSerializer,
     FlightSerializer,
+    ItinerarySearchSerializer,
+    ItinerarySerializer,
+    LoadFactorSearchSerializer,
+    LoadFactorSerializer,
+    ManifestSerializer,
     OrderListSerializer,
     OrderSerializer,
+    OrderSummarySerializer,
     RoleSerializer,
     RouteListSerializer,
     RouteRetrieveSerializer,
     RouteSerializer,
+    SeatHoldConfirmSerializer,
+    SeatHoldSerializer,
+    TicketInfoSerializer,
 )
 
 
-class RoleViewSet(viewsets.ModelViewSet):
+class RoleViewSet(
+    SerializerMetricsMixin, ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet
+):
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    conditional_query = False
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(SerializerMetricsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Crew.objects.select_related("role")
     serializer_class = CrewSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    cache_models = (Role,)
+    conditional_related = ("role",)
 
     def get_serializer_class(self) -> Serializer:
         if self.action in ("list", "retrieve"):
@@ -57,16 +108,27 @@ class CrewViewSet(viewsets.ModelViewSet):
         return CrewSerializer
 
 
-class CountryViewSet(viewsets.ModelViewSet):
+class CountryViewSet(
+    SerializerMetricsMixin, ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet
+):
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
     permission_classes = (IsAdminOrReadOnly,)
+    conditional_query = False
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+class AirportViewSet(
+    SerializerMetricsMixin,
+    ConditionalGetMixin,
+    CachedReadMixin,
+    AirportFastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    cache_models = (Country,)
+    conditional_query = False
 
     def get_queryset(self) -> QuerySet:
         queryset = self.queryset.select_related("country")
@@ -96,11 +158,37 @@ class AirportViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs) -> Any:
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[AutocompleteSearchSerializer],
+        responses=AutocompleteResultSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request, *args, **kwargs) -> Response:
+        """
+        Type-ahead over airport names, cities and countries, answered
+        from an in-memory prefix index without database queries
+        """
+        search = AutocompleteSearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+
+        # the results are plain dicts already shaped like the serializer
+        return Response(
+            autocomplete(search.validated_data["q"], search.validated_data["limit"])
+        )
+
 
-class RouteViewSet(viewsets.ModelViewSet):
+class RouteViewSet(
+    SerializerMetricsMixin,
+    ConditionalGetMixin,
+    CachedReadMixin,
+    RouteFastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Route.objects.select_related("source__country", "destination__country")
     serializer_class = RouteSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    cache_models = (Airport, Country)
+    conditional_query = False
 
     def get_serializer_class(self) -> Serializer:
         if self.action == "list":
@@ -112,16 +200,27 @@ class RouteViewSet(viewsets.ModelViewSet):
         return RouteSerializer
 
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+class AirplaneTypeViewSet(
+    SerializerMetricsMixin, ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet
+):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    conditional_query = False
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+class AirplaneViewSet(
+    SerializerMetricsMixin,
+    ConditionalGetMixin,
+    CachedReadMixin,
+    AirplaneFastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    cache_models = (AirplaneType,)
+    conditional_query = False
 
     def get_queryset(self) -> QuerySet:
         queryset = self.queryset.select_related("airplane_type")
@@ -152,15 +251,37 @@ class AirplaneViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class FlightViewSet(viewsets.ModelViewSet):
+class FlightViewSet(
+    SerializerMetricsMixin,
+    FlightResponseCacheMixin,
+    ConditionalGetMixin,
+    FlightFastListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Flight.objects.all()
     serializer_class = FlightSerializer
+    pagination_class = FlightPagination
     permission_classes = (IsAdminOrReadOnly,)
+    cache_models = (Route, Airport, Country, Airplane, Crew, Role)
+    conditional_related = (
+        "route",
+        "route__source",
+        "route__source__country",
+        "route__destination",
+        "route__destination__country",
+        "airplane",
+        "crews",
+        "crews__role",
+    )
 
     def get_queryset(self) -> QuerySet:
-        queryset = self.queryset.prefetch_related("crews__role").select_related(
+        queryset = self.queryset.select_related(
             "route__source__country", "route__destination__country", "airplane"
         )
+        if self.action in ("list", "search"):
+            queryset = annotate_flight_crews(queryset)
+        elif self.action == "retrieve":
+            queryset = annotate_flight_crews(queryset, members=True)
 
         route = self.request.query_params.get("route")
 
@@ -168,14 +289,6 @@ class FlightViewSet(viewsets.ModelViewSet):
             route_id = int(route)
             queryset = queryset.filter(route__id=route_id)
 
-        if self.action == "list":
-            queryset = queryset.annotate(
-                tickets_available=(
-                    (F("airplane__rows") * F("airplane__seats_in_row"))
-                    - Count("tickets")
-                )
-            )
-
         return queryset
 
     @extend_schema(
@@ -190,16 +303,285 @@ class FlightViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs) -> Any:
         return super().list(request, *args, **kwargs)
 
+    def initial(self, request, *args, **kwargs) -> None:
+        super().initial(request, *args, **kwargs)
+        # before the cached and conditional responses read the versions
+        if self.action == "list":
+            ensure_materialized()
+        elif self.action == "search":
+            self.materialize_search(request.query_params)
+
+    def materialize_search(self, query_params) -> None:
+        search = FlightSearchSerializer(data=query_params)
+        if not search.is_valid():
+            # search_response responds with the errors
+            return
+
+        # searches past the rolling horizon need a departure_to
+        params = search.validated_data
+        ensure_materialized(params.get("departure_to"), **self.search_filters(params))
+
+    def uses_conditional_query(self) -> bool:
+        # the latest updated_at of all listed flights takes a scan of the
+        # flight table, lists and searches are covered by versions alone
+        return self.action == "retrieve"
+
+    def get_conditional_related(self) -> Optional[tuple[str, ...]]:
+        # without the query there is no Last-Modified, lists only get an ETag
+        if self.action == "retrieve":
+            return self.conditional_related
+        return None
+
+    def get_conditional_versions(self) -> list:
+        versions = super().get_conditional_versions()
+        if self.action == "retrieve":
+            return versions
+
+        versions.extend(get_tag_versions([TICKETS_SOLD_TAG]).values())
+        if (
+            self.action == "search"
+            and "departure_from" not in self.request.query_params
+        ):
+            # upcoming flights leave the results as they depart
+            versions.append(timezone.now().replace(second=0, microsecond=0))
+        return versions
+
+    def get_conditional_aggregates(self) -> dict:
+        aggregates = super().get_conditional_aggregates()
+        if self.action == "retrieve":
+            # held seats are shown as taken until their holds expire
+            active_holds = Q(seat_holds__expires_at__gt=timezone.now())
+            aggregates["holds"] = Count(
+                "seat_holds", filter=active_holds, distinct=True
+            )
+            aggregates["latest_hold"] = Max("seat_holds", filter=active_holds)
+        return aggregates
+
+    @staticmethod
+    def _start_of_day(day) -> datetime:
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def search_filters(self, params: dict) -> dict:
+        # flight schedules have the same route lookups
+        lookups = {
+            "source": "route__source_id",
+            "destination": "route__destination_id",
+            "source_country": "route__source__country_id",
+            "destination_country": "route__destination__country_id",
+            "source_city": "route__source__closest_big_city",
+            "destination_city": "route__destination__closest_big_city",
+        }
+        return {
+            lookups[name]: value for name, value in params.items() if name in lookups
+        }
+
+    def filter_search(self, queryset: QuerySet, params: dict) -> QuerySet:
+        queryset = queryset.filter(**self.search_filters(params))
+
+        # only upcoming flights by default, the flight table keeps all history
+        departure_from = params.get("departure_from")
+        if departure_from:
+            queryset = queryset.filter(
+                departure_time__gte=self._start_of_day(departure_from)
+            )
+        else:
+            queryset = queryset.filter(departure_time__gte=timezone.now())
+
+        departure_to = params.get("departure_to")
+        if departure_to:
+            queryset = queryset.filter(
+                departure_time__lt=self._start_of_day(departure_to + timedelta(days=1))
+            )
+
+        return queryset.order_by("departure_time", "route_id")
+
+    @extend_schema(
+        parameters=[FlightSearchSerializer],
+        responses=FlightListSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def search(self, request, *args, **kwargs) -> Any:
+        """Upcoming flights between airports, countries or cities"""
+        return self.tagged_cached_response(
+            partial(self.conditional_response, self.search_response),
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def search_response(self, request, *args, **kwargs) -> Response:
+        search = FlightSearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+
+        return self.list_response(
+            self.filter_search(self.get_queryset(), search.validated_data)
+        )
+
     def get_serializer_class(self) -> Serializer:
         if self.action == "retrieve":
             return FlightRetrieveSerializer
-        if self.action == "list":
+        if self.action in ("list", "search"):
             return FlightListSerializer
 
         return FlightSerializer
 
 
+class FlightScheduleViewSet(SerializerMetricsMixin, viewsets.ModelViewSet):
+    queryset = FlightSchedule.objects.prefetch_related("crews")
+    serializer_class = FlightScheduleSerializer
+    permission_classes = (IsAdminOrReadOnly,)
+
+
+class ItineraryViewSet(viewsets.ViewSet):
+    @extend_schema(
+        parameters=[ItinerarySearchSerializer],
+        responses=ItinerarySerializer(many=True),
+    )
+    def list(self, request) -> Response:
+        """Earliest arriving connections between two airports"""
+        search = ItinerarySearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        departure_from = params.get("departure_from") or timezone.now()
+        ensure_materialized(
+            timezone.localdate(departure_from) + timedelta(days=SCHEDULE_HORIZON_DAYS)
+        )
+
+        itineraries = search_itineraries(
+            source=params["source"],
+            destination=params["destination"],
+            departure_from=departure_from,
+            max_legs=params["max_legs"],
+            min_connection=timedelta(minutes=params["min_connection"]),
+            seats=params["seats"],
+        )
+        serializer = ItinerarySerializer(
+            [
+                {
+                    "departure_time": legs[0].departure_time,
+                    "arrival_time": legs[-1].arrival_time,
+                    "legs": legs,
+                }
+                for legs in itineraries
+            ],
+            many=True,
+        )
+
+        return Response(serializer.data)
+
+
+class ManifestViewSet(viewsets.ViewSet):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        parameters=[ManifestSerializer],
+        responses={
+            (200, content_type): OpenApiTypes.STR
+            for _, content_type in MANIFEST_OUTPUTS.values()
+        },
+    )
+    def list(self, request) -> StreamingHttpResponse:
+        """Passenger manifest of a flight or date range, as CSV or NDJSON"""
+        manifest = ManifestSerializer(data=request.query_params)
+        manifest.is_valid(raise_exception=True)
+        params = dict(manifest.validated_data)
+
+        output = params.pop("output")
+        _, content_type = MANIFEST_OUTPUTS[output]
+        filename = "-".join(["manifest", *(str(value) for value in params.values())])
+
+        return StreamingHttpResponse(
+            export_manifest(output, **params),
+            content_type=content_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}.{output}"'
+            },
+        )
+
+
+class LoadFactorViewSet(SerializerMetricsMixin, viewsets.GenericViewSet):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        parameters=[LoadFactorSearchSerializer],
+        responses=LoadFactorSerializer(many=True),
+    )
+    def list(self, request) -> Response:
+        """
+        Seats sold, capacity and load factor per route over a date range,
+        highest load factor first, read from the route day rollups
+        """
+        search = LoadFactorSearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        page = self.paginate_queryset(
+            route_loads(
+                params["departure_from"], params["departure_to"], params.get("route")
+            )
+        )
+        # names are joined for the page only, not for the whole aggregation
+        names = route_names(row["route_id"] for row in page)
+        serializer = LoadFactorSerializer(
+            [
+                {
+                    "route": row["route_id"],
+                    "route_name": names[row["route_id"]],
+                    "flights": row["flights"],
+                    "seats_sold": row["seats_sold"],
+                    "capacity": row["capacity"],
+                    "load_factor": row["load_factor"],
+                }
+                for row in page
+            ],
+            many=True,
+        )
+
+        return self.get_paginated_response(serializer.data)
+
+
+class ObjectResponseSchema(AutoSchema):
+    """Schema of list actions that respond with a single object"""
+
+    def _is_list_view(self, serializer=None) -> bool:
+        return False
+
+
+class CacheStatsViewSet(viewsets.ViewSet):
+    permission_classes = (IsAdminUser,)
+    schema = ObjectResponseSchema()
+    cached_viewsets = (
+        RoleViewSet,
+        CountryViewSet,
+        AirportViewSet,
+        RouteViewSet,
+        AirplaneTypeViewSet,
+        AirplaneViewSet,
+        FlightViewSet,
+    )
+
+    @extend_schema(
+        responses=inline_serializer(
+            "CacheStatsByModel",
+            {
+                viewset.queryset.model._meta.model_name: CacheStatsSerializer()
+                for viewset in cached_viewsets
+            },
+        )
+    )
+    def list(self, request) -> Response:
+        """Hits and misses of the reference data and flight response caches"""
+        return Response(
+            get_cache_stats(
+                viewset.queryset.model._meta.model_name
+                for viewset in self.cached_viewsets
+            )
+        )
+
+
 class OrderViewSet(
+    SerializerMetricsMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -207,6 +589,7 @@ class OrderViewSet(
 ):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = OrderPagination
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self) -> QuerySet:
@@ -218,23 +601,103 @@ class OrderViewSet(
                 queryset=prefetched_class.objects.select_related(*inner_prefetches),
             )
 
-        queryset = self.queryset.filter(user=self.request.user).prefetch_related(
-            get_prefetch_obj(
-                "tickets",
-                Ticket,
-                "flight__route__destination__country",
-                "flight__airplane",
-                "flight__route__source__country",
+        queryset = self.queryset.filter(user_id=self.request.user.id)
+
+        if self.action == "list":
+            # summaries only, the payload does not grow with the tickets
+            return annotate_order_summaries(queryset)
+
+        if self.action == "retrieve":
+            return queryset.prefetch_related(
+                get_prefetch_obj(
+                    "tickets",
+                    Ticket,
+                    "flight__route__destination__country",
+                    "flight__airplane",
+                    "flight__route__source__country",
+                )
             )
-        )
 
         return queryset
 
     def perform_create(self, serializer) -> None:
-        serializer.save(user=self.request.user)
+        serializer.save(user_id=self.request.user.id)
 
     def get_serializer_class(self) -> Serializer:
-        if self.action in ("list", "retrieve"):
+        if self.action == "list":
+            return OrderSummarySerializer
+
+        if self.action == "retrieve":
             return OrderListSerializer
 
+        if self.action == "tickets":
+            return TicketInfoSerializer
+
         return OrderSerializer
+
+    @action(detail=True, methods=["get"])
+    def tickets(self, request, *args, **kwargs) -> Response:
+        """Tickets of an order with their flights"""
+        order = self.get_object()
+        tickets = order.tickets.select_related(
+            "flight__route__destination__country",
+            "flight__airplane",
+            "flight__route__source__country",
+        )
+
+        return Response(self.get_serializer(tickets, many=True).data)
+
+
+class SeatHoldViewSet(
+    SerializerMetricsMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self) -> QuerySet:
+        return self.queryset.active().filter(user_id=self.request.user.id)
+
+    @extend_schema(request=SeatHoldSerializer(many=True))
+    def create(self, request, *args, **kwargs) -> Response:
+        """Hold one or a list of seats for a few minutes"""
+        data = request.data if isinstance(request.data, list) else [request.data]
+        serializer = self.get_serializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_create(self, serializer) -> None:
+        serializer.save(user_id=self.request.user.id)
+
+    @extend_schema(request=SeatHoldConfirmSerializer, responses=OrderSerializer)
+    @action(detail=False, methods=["post"])
+    def confirm(self, request) -> Response:
+        """Buy held seats, all active holds unless `holds` ids are given"""
+        confirm = SeatHoldConfirmSerializer(data=request.data)
+        confirm.is_valid(raise_exception=True)
+
+        holds = self.get_queryset()
+        if "holds" in confirm.validated_data:
+            holds = holds.filter(id__in=confirm.validated_data["holds"])
+        holds = list(holds.values("flight", "row", "seat", "id"))
+        if not holds:
+            return Response(
+                {"holds": ["There are no active seat holds to confirm."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        order = OrderSerializer(
+            data={"tickets": holds}, context=self.get_serializer_context()
+        )
+        order.is_valid(raise_exception=True)
+        with transaction.atomic():
+            order.save(user_id=self.request.user.id)
+            SeatHold.objects.filter(id__in=[hold["id"] for hold in holds]).delete()
+
+        return Response(order.data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,123 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+PRIMARY_DATABASE = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# url namespaces of the viewsets and async views that read from replicas
+REPLICA_NAMESPACES = ("airport", "async-airport")
+
+
+class DatabaseRoute:
+    """Database of the current request, chosen by ReplicaRoutingMiddleware"""
+
+    __slots__ = ("replica", "replica_reads")
+
+    def __init__(self) -> None:
+        self.replica: Optional[str] = None
+        self.replica_reads = 0
+
+
+current_route: ContextVar[Optional[DatabaseRoute]] = ContextVar(
+    "current_route", default=None
+)
+
+
+def get_replicas() -> list[str]:
+    return getattr(settings, "REPLICA_DATABASES", [])
+
+
+def pin_cache_key(identity: str) -> str:
+    return f"db_router:pinned:{identity}"
+
+
+def request_identity(request) -> Optional[str]:
+    """
+    The user of a request for read-your-writes pinning: the user id claim
+    of its JWT, or its session. The token is not verified here, it only
+    picks the database; the view still authenticates it.
+    """
+    scheme, _, raw_token = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    if scheme in jwt_settings.AUTH_HEADER_TYPES and raw_token:
+        try:
+            token = AccessToken(raw_token, verify=False)
+            return f"user:{token[jwt_settings.USER_ID_CLAIM]}"
+        except (TokenError, KeyError):
+            return None
+
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        return f"session:{session_key}"
+    return None
+
+
+def pin_seconds() -> int:
+    return getattr(settings, "REPLICA_PIN_SECONDS", 10)
+
+
+def is_pinned(identity: Optional[str]) -> bool:
+    return identity is not None and bool(cache.get(pin_cache_key(identity)))
+
+
+def pin_to_primary(identity: Optional[str]) -> None:
+    if identity is not None:
+        cache.set(pin_cache_key(identity), True, pin_seconds())
+
+
+@contextmanager
+def primary_reads():
+    """
+    Send the reads of the block to the primary. Used to build data that is
+    cached for all users under the current cache versions, which a lagging
+    replica could fill with data from before the change that bumped them.
+    """
+    route = current_route.get()
+    replica = route.replica if route is not None else None
+    if replica is None:
+        yield
+        return
+
+    route.replica = None
+    try:
+        yield
+    finally:
+        route.replica = replica
+
+
+def replica_reads() -> int:
+    """Number of reads the current request sent to a replica so far"""
+    route = current_route.get()
+    return route.replica_reads if route is not None else 0
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of requests routed to a replica there and everything
+    else, writes included, to the primary. Reads inside a transaction of
+    the primary stay on it to see the transaction's own writes.
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        route = current_route.get()
+        if route is None or route.replica is None:
+            return None
+        if connections[PRIMARY_DATABASE].in_atomic_block:
+            return PRIMARY_DATABASE
+        route.replica_reads += 1
+        return route.replica
+
+    def db_for_write(self, model, **hints) -> str:
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # replicas hold the same data as the primary
+        return True
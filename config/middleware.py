@@ -0,0 +1,301 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from config.db_router import (
+    REPLICA_NAMESPACES,
+    SAFE_METHODS,
+    DatabaseRoute,
+    current_route,
+    get_replicas,
+    is_pinned,
+    pin_to_primary,
+    request_identity,
+)
+
+
+logger = logging.getLogger("request_metrics")
+
+current_metrics: ContextVar[Optional["RequestMetrics"]] = ContextVar(
+    "current_metrics", default=None
+)
+
+
+class RequestMetrics:
+    __slots__ = ("queries", "db_time", "serializer_time", "serializing")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+class TimedSerializerData:
+    """Adds the time spent in the data of a serializer to the request metrics"""
+
+    @property
+    def data(self):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return super().data
+
+        # a serializer can build its data from other serializers' data
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializing = False
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        # many=True builds a list serializer around the timed child
+        list_serializer = super().many_init(*args, **kwargs)
+        list_serializer.__class__ = timed_serializer_class(type(list_serializer))
+        return list_serializer
+
+
+timed_serializer_classes: dict[type, type] = {}
+
+
+def timed_serializer_class(serializer_class: type) -> type:
+    timed_class = timed_serializer_classes.get(serializer_class)
+    if timed_class is None:
+        timed_class = type(
+            serializer_class.__name__,
+            (TimedSerializerData, serializer_class),
+            {"__module__": serializer_class.__module__},
+        )
+        timed_serializer_classes[serializer_class] = timed_class
+    return timed_class
+
+
+class SerializerMetricsMixin:
+    """
+    View mixin timing the serializers of get_serializer() in the metrics
+    of measured requests. Other requests get the serializer class as is.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        # the schema generator introspects views outside of their requests
+        if current_metrics.get() is None or getattr(self, "swagger_fake_view", False):
+            return super().get_serializer(*args, **kwargs)
+
+        serializer_class = timed_serializer_class(self.get_serializer_class())
+        kwargs.setdefault("context", self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures the SQL query count, database time, serializer time and
+    response size of a request. They are sent back as Server-Timing
+    headers when REQUEST_METRICS_SERVER_TIMING is on, and logged as JSON
+    for a REQUEST_METRICS_SAMPLE_RATE fraction of requests. Requests that
+    are neither measured for a header nor sampled are passed through.
+
+    Serializer time is the time spent in the data of the serializers of
+    views with SerializerMetricsMixin, including the queries run while
+    serializing, as related objects may be loaded lazily there.
+
+    Async views run their queries in the thread of sync_to_async, which
+    has its own connections, so the middleware wraps those under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        self.server_timing = getattr(settings, "REQUEST_METRICS_SERVER_TIMING", False)
+        self.sample_rate = getattr(settings, "REQUEST_METRICS_SAMPLE_RATE", 0.0)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def is_measured(self) -> tuple[bool, bool]:
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        return sampled, sampled or self.server_timing
+
+    @staticmethod
+    def wrap_connections(stack: ExitStack, metrics: RequestMetrics) -> None:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        sampled, measured = self.is_measured()
+        if not measured:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                self.wrap_connections(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        total_time = time.perf_counter() - start
+
+        return self.finish(request, response, metrics, total_time, sampled)
+
+    async def __acall__(self, request):
+        sampled, measured = self.is_measured()
+        if not measured:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        stack = ExitStack()
+        try:
+            await sync_to_async(self.wrap_connections)(stack, metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            current_metrics.reset(token)
+        total_time = time.perf_counter() - start
+
+        return self.finish(request, response, metrics, total_time, sampled)
+
+    def finish(
+        self,
+        request,
+        response,
+        metrics: RequestMetrics,
+        total_time: float,
+        sampled: bool,
+    ):
+        if self.server_timing:
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+                    f"serializer;dur={metrics.serializer_time * 1000:.2f}",
+                    f"total;dur={total_time * 1000:.2f}",
+                ]
+            )
+
+        if sampled:
+            logger.info(
+                json.dumps(
+                    {
+                        "method": request.method,
+                        "path": request.path,
+                        "view": self.get_view_name(request, response),
+                        "status": response.status_code,
+                        "queries": metrics.queries,
+                        "db_ms": round(metrics.db_time * 1000, 2),
+                        "serializer_ms": round(metrics.serializer_time * 1000, 2),
+                        "total_ms": round(total_time * 1000, 2),
+                        "response_bytes": (
+                            None if response.streaming else len(response.content)
+                        ),
+                    }
+                )
+            )
+
+        return response
+
+    @staticmethod
+    def get_view_name(request, response) -> Optional[str]:
+        if request.resolver_match is None:
+            return None
+
+        view_name = request.resolver_match.view_name
+        # viewset routes share a url name between actions, e.g. list and create
+        view = getattr(response, "renderer_context", {}).get("view")
+        action = getattr(view, "action", None)
+        if action:
+            view_name = f"{view_name}:{action}"
+
+        return view_name
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes the safe requests of the airport API to a random read replica
+    of REPLICA_DATABASES, see config/db_router.py. After a successful
+    write, the requests of the same user stay on the primary for
+    REPLICA_PIN_SECONDS, so they read their own writes while the replicas
+    catch up. The pins live in the cache, which has to be shared by all
+    processes for them to apply across processes. Data cached for all
+    users is built from the primary, see primary_reads().
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = current_route.set(DatabaseRoute())
+        try:
+            response = self.get_response(request)
+        finally:
+            current_route.reset(token)
+
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = current_route.set(DatabaseRoute())
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_route.reset(token)
+
+        return self.finish(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs) -> None:
+        # the view is known here, the route object is shared with __call__
+        route = current_route.get()
+        replicas = get_replicas()
+        if (
+            route is None
+            or not replicas
+            or request.method not in SAFE_METHODS
+            or request.resolver_match.namespace not in REPLICA_NAMESPACES
+            or is_pinned(request_identity(request))
+        ):
+            return None
+
+        route.replica = random.choice(replicas)
+        return None
+
+    @staticmethod
+    def finish(request, response):
+        if (
+            get_replicas()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            pin_to_primary(request_identity(request))
+        return response
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import tempfile
 
 from pathlib import Path
 from dotenv import load_dotenv
@@ -48,14 +49,14 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework_simplejwt",
     "drf_spectacular",
-    "debug_toolbar",
     "airport",
     "user",
 ]
 
 MIDDLEWARE = [
+    "config.middleware.RequestMetricsMiddleware",
+    "config.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -64,6 +65,15 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# the debug toolbar middleware is sync only, it is opt-in for development
+DEBUG_TOOLBAR = DEBUG and os.getenv("DEBUG_TOOLBAR") == "1"
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -88,13 +98,44 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+
+def conn_max_age(alias: str) -> int:
+    # seconds a connection is kept open, e.g. CONN_MAX_AGE_REPLICA1=600,
+    # 0 closes it at the end of each request
+    return int(os.getenv(f"CONN_MAX_AGE_{alias.upper()}", 0))
+
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "CONN_MAX_AGE": conn_max_age("default"),
+        "CONN_HEALTH_CHECKS": True,
+        # an in-memory test database fails concurrent requests on table
+        # locks instead of waiting for them like a database file does
+        "TEST": {"NAME": Path(tempfile.gettempdir()) / "airport_test_db.sqlite3"},
     }
 }
 
+# read replicas, aliases replica1, replica2, ... of comma separated database
+# files, e.g. DATABASE_REPLICAS=replica1.sqlite3,replica2.sqlite3
+for index, name in enumerate(
+    filter(None, os.getenv("DATABASE_REPLICAS", "").split(",")), start=1
+):
+    DATABASES[f"replica{index}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / name.strip(),
+        "CONN_MAX_AGE": conn_max_age(f"replica{index}"),
+        "CONN_HEALTH_CHECKS": True,
+        # tests read the test database through the replica aliases
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+# seconds the requests of a user read from the primary after their writes
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 10))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -139,19 +180,56 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("user.authentication.ClaimsJWTAuthentication",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "config.throttling.AnonRateThrottle",
+        "config.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "1000/day"},
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 20,
 }
 
+# cache alias of the throttling counters, see config/throttling.py; set
+# THROTTLE_CACHE_URL=redis://... to share them between worker processes
+# seat maps and cache versions have to be shared by all workers, see
+# airport/checks.py
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+if os.getenv("CACHE_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["CACHE_URL"],
+    }
+THROTTLE_CACHE = "default"
+if os.getenv("THROTTLE_CACHE_URL"):
+    CACHES["throttle"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["THROTTLE_CACHE_URL"],
+    }
+    THROTTLE_CACHE = "throttle"
+
+# access tokens carry the is_staff claim, see user/authentication.py
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.ClaimsTokenRefreshSerializer",
+}
+
+# per request SQL, serializer and total time, see config/middleware.py
+REQUEST_METRICS_SERVER_TIMING = os.getenv("REQUEST_METRICS_SERVER_TIMING") == "1"
+REQUEST_METRICS_SAMPLE_RATE = float(os.getenv("REQUEST_METRICS_SAMPLE_RATE", 0))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "request_metrics": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Airport Service API",
     "DESCRIPTION": "Information and ordering tickets for a flight",
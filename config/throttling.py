@@ -0,0 +1,78 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import throttling
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Sliding window counter in place of the request history of DRF's
+    SimpleRateThrottle. Requests are counted per fixed window of the rate's
+    duration, and the count of the previous window is weighted by how much
+    of it still overlaps the sliding window ending now.
+
+    The state is two integers per key whatever the rate, updated with the
+    atomic incr() of the THROTTLE_CACHE alias. With a cache shared between
+    processes, e.g. Redis, all workers enforce one limit.
+    """
+
+    def get_cache(self):
+        return caches[getattr(settings, "THROTTLE_CACHE", "default")]
+
+    def window_key(self, window: int) -> str:
+        return f"{self.key}:{window}"
+
+    def allow_request(self, request, view) -> bool:
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cache = self.get_cache()
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        current_key = self.window_key(int(window))
+
+        self.previous = cache.get(self.window_key(int(window) - 1), 0)
+        self.weight = 1 - elapsed / self.duration
+        # counted first, so concurrent requests cannot all take the last slot
+        try:
+            self.current = cache.incr(current_key)
+        except ValueError:
+            if cache.add(current_key, 1, 2 * self.duration):
+                self.current = 1
+            else:
+                self.current = cache.incr(current_key)
+
+        if self.previous * self.weight + self.current <= self.num_requests:
+            return True
+
+        cache.decr(current_key)
+        self.current -= 1
+        return False
+
+    def wait(self) -> Optional[float]:
+        """Seconds until the window has room for one more request"""
+        allowed = self.num_requests - 1
+        remaining = self.duration * self.weight
+
+        if self.current <= allowed:
+            # the previous window slides out during the current one
+            if not self.previous:
+                return None
+            excess = self.previous * self.weight + self.current - allowed
+            return excess * self.duration / self.previous
+
+        # the current window has to slide out during the next one
+        return remaining + (self.current - allowed) * self.duration / self.current
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    pass
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+STAFF_CLAIM = "is_staff"
+
+
+def load_user(user_id):
+    try:
+        user = get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id})
+    except get_user_model().DoesNotExist:
+        raise exceptions.AuthenticationFailed(
+            _("User not found"), code="user_not_found"
+        )
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(
+            _("User is inactive"), code="user_inactive"
+        )
+    return user
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    User of a validated access token. pk, id, is_staff, is_authenticated
+    and is_anonymous come from the token claims; reading any other
+    attribute loads the user from the database once.
+
+    Being a lazy object, it is not a model instance for the ORM, so
+    filter and assign by id, e.g. filter(user_id=request.user.id).
+    """
+
+    def __init__(self, validated_token) -> None:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: load_user(user_id))
+
+        # set on the lazy object itself, so reading them loads nothing
+        claims = {
+            "pk": user_id,
+            "id": user_id,
+            "is_authenticated": True,
+            "is_anonymous": False,
+        }
+        if STAFF_CLAIM in validated_token:
+            claims["is_staff"] = validated_token[STAFF_CLAIM]
+        self.__dict__.update(claims)
+
+    def __bool__(self) -> bool:
+        return True
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the user query: request.user is built from
+    the token claims and loaded only when a view needs more of it. A
+    deactivated or deleted user keeps access until the token expires,
+    unless the view loads the user.
+    """
+
+    def get_user(self, validated_token) -> ClaimsUser:
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        return ClaimsUser(validated_token)
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    """The jwtAuth security scheme of the schema, which only matches JWTAuthentication"""
+
+    target_class = "user.authentication.ClaimsJWTAuthentication"
@@ -1,7 +1,14 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from django.utils.translation import gettext as _
 
+from user.authentication import STAFF_CLAIM, load_user
 from user.models import User
 
 
@@ -23,3 +30,38 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry the is_staff claim read by
+    ClaimsJWTAuthentication. The claim is not stored in the refresh token
+    itself: refreshing loads the user again, so a lost staff status or a
+    deactivation applies from the next access token on.
+    """
+
+    user = None
+
+    @property
+    def access_token(self) -> AccessToken:
+        access = super().access_token
+        user = self.user or load_user(self[api_settings.USER_ID_CLAIM])
+        access[STAFF_CLAIM] = user.is_staff
+
+        return access
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+    @classmethod
+    def get_token(cls, user: User) -> ClaimsRefreshToken:
+        token = super().get_token(user)
+        # the user is authenticated already, no need to load it
+        token.user = user
+
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
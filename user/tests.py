@@ -1,16 +1,23 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
 from user.models import User
 
 
 CREATE_USER_URL = reverse("user:create")
 TOKEN_URL = reverse("user:token_obtain_pair")
+TOKEN_REFRESH_URL = reverse("user:token_refresh")
 ME_URL = reverse("user:manage")
+ORDERS_URL = reverse("airport:order-list")
+COUNTRIES_URL = reverse("airport:country-list")
+SCHEMA_URL = reverse("schema")
 
 
 def create_user(**params) -> User:
@@ -139,3 +146,123 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.email, payload["email"])
         self.assertTrue(self.user.check_password(payload["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class TokenClaimsUserTests(TestCase):
+    def setUp(self) -> None:
+        self.payload = {"email": "test@test.com", "password": "Testpass123@"}
+        self.user = create_user(**self.payload)
+        self.client = APIClient()
+
+    def authenticate(self, token) -> None:
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def get_user_queries(self, method, url: str, data=None) -> tuple:
+        with CaptureQueriesContext(connection) as queries:
+            res = getattr(self.client, method)(url, data)
+
+        table = get_user_model()._meta.db_table
+        return res, [
+            query["sql"]
+            for query in queries
+            if f'"{table}"' in query["sql"] and "INSERT" not in query["sql"]
+        ]
+
+    def test_access_tokens_carry_is_staff_claim(self) -> None:
+        res = self.client.post(TOKEN_URL, self.payload)
+
+        self.assertIs(AccessToken(res.data["access"])["is_staff"], False)
+        self.assertNotIn("is_staff", RefreshToken(res.data["refresh"]))
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": res.data["refresh"]})
+        self.assertIs(AccessToken(res.data["access"])["is_staff"], False)
+
+    def test_refresh_reloads_staff_status(self) -> None:
+        self.user.is_staff = True
+        self.user.save()
+        refresh = self.client.post(TOKEN_URL, self.payload).data["refresh"]
+
+        self.user.is_staff = False
+        self.user.save()
+        res, user_queries = self.get_user_queries(
+            "post", TOKEN_REFRESH_URL, {"refresh": refresh}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(user_queries), 1)
+        self.authenticate(res.data["access"])
+        res = self.client.post(COUNTRIES_URL, {"name": "X"})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_refresh_rejects_inactive_user(self) -> None:
+        refresh = self.client.post(TOKEN_URL, self.payload).data["refresh"]
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.post(TOKEN_REFRESH_URL, {"refresh": refresh})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn("access", res.data)
+
+    def test_authenticated_requests_skip_user_query(self) -> None:
+        token = self.client.post(TOKEN_URL, self.payload).data["access"]
+        self.authenticate(token)
+
+        res, user_queries = self.get_user_queries("get", ORDERS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries, [])
+
+        res, user_queries = self.get_user_queries("post", COUNTRIES_URL, {"name": "X"})
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(user_queries, [])
+
+    def test_staff_claim_grants_admin_access(self) -> None:
+        self.user.is_staff = True
+        self.user.save()
+        self.authenticate(self.client.post(TOKEN_URL, self.payload).data["access"])
+
+        res, user_queries = self.get_user_queries("post", COUNTRIES_URL, {"name": "X"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(user_queries, [])
+
+    def test_user_is_loaded_when_other_fields_are_read(self) -> None:
+        self.authenticate(self.client.post(TOKEN_URL, self.payload).data["access"])
+
+        res, user_queries = self.get_user_queries("get", ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.payload["email"])
+        self.assertEqual(len(user_queries), 1)
+
+        res = self.client.patch(ME_URL, {"email": "new@test.com"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "new@test.com")
+
+    def test_tokens_without_staff_claim_load_user(self) -> None:
+        self.user.is_staff = True
+        self.user.save()
+        self.authenticate(AccessToken.for_user(self.user))
+
+        res, user_queries = self.get_user_queries("post", COUNTRIES_URL, {"name": "X"})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(user_queries), 1)
+
+    def test_deleted_user_fails_when_loaded(self) -> None:
+        self.authenticate(self.client.post(TOKEN_URL, self.payload).data["access"])
+        self.user.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_schema_documents_jwt_auth(self) -> None:
+        res = self.client.get(SCHEMA_URL, {"format": "json"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        schema = res.json()
+        self.assertIn("jwtAuth", schema["components"]["securitySchemes"])
+        self.assertIn(
+            {"jwtAuth": []}, schema["paths"]["/api/user/me/"]["get"]["security"]
+        )
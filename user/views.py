@@ -1,15 +1,17 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
+
+from config.middleware import SerializerMetricsMixin
 from user.models import User
 
 from user.serializers import UserSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(SerializerMetricsMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(SerializerMetricsMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
 